@@ -31,14 +31,18 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # Imports
 # ---
 
+import io
 import os
 import yaml
 import logging
 import jwt
+import numpy as np
 from typing import Annotated
-from collections import defaultdict
+from contextlib import asynccontextmanager
+from tempfile import SpooledTemporaryFile
 from datetime import date, timedelta, timezone, datetime
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.encoders import jsonable_encoder
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jwt.exceptions import InvalidTokenError
@@ -47,8 +51,18 @@ from pydantic import BaseModel
 from pydantic import BaseModel
 from openskill.models import PlackettLuce
 
-from bin.mariadb_handler import create_wordle_db, update_player_entry, update_score_entry, add_entry, get_entries, lookup_player, register_player, get_all_players
-from bin.utilities import parse_score, get_wordle_puzzle, calculate_elo, match_player_name
+from bin.storage import create_wordle_db, update_player_entry, add_entry, add_entries, get_entries, get_entry_columns, get_entries_with_players, lookup_player, lookup_players, get_submitted, register_player, get_all_players, get_daily_report_rows, get_weekly_report_rows, get_pool_stats, get_player_cache_stats, get_cache_generations, get_leaderboard, get_matchups, get_matchup_totals, get_rating_history, get_match_rows
+from bin.report_cache import ReportCache
+from bin.leaderboard import SORT_COLUMNS
+from bin.utilities import parse_score, build_score_entry, get_wordle_puzzle
+from bin.replay import replay_ratings, rerate
+from bin.downsample import lttb, weekly
+from bin.elo_engine import head_to_head
+from bin.chat_import import import_chat
+from bin.executors import init_executors, shutdown_executors, get_executor, run_db, run_auth
+from bin.jobs import JobQueue
+from bin.token_cache import TokenCache
+from bin import metrics
 
 # ---
 # Data Definitions
@@ -59,8 +73,13 @@ with open(config_file, 'r') as f:
     config = yaml.safe_load(f)
 
 model = PlackettLuce()
+report_cache = ReportCache(
+    max_bytes=(config.get('report_cache') or {}).get('max_bytes', 8 * 1024 * 1024),
+    check_interval=(config.get('report_cache') or {}).get('check_interval', 5),
+)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+token_cache = TokenCache(max_size=(config.get('token_cache') or {}).get('max_size', 1024))
 
 SECRET_KEY: str = config['security']['secret_key']
 ALGORITHM: str = config['security']['algorithm']
@@ -71,6 +90,9 @@ class Score(BaseModel):
     score: str
     uuid: str
 
+class ScoreBatch(BaseModel):
+    scores: list[Score]
+
 class Player(BaseModel):
     player_name: str
     player_platform: str
@@ -80,6 +102,7 @@ class BackfillData(BaseModel):
     start_puzzle: int
     end_puzzle: int
     calc_type: str
+    dry_run: bool = False
 
 class Token(BaseModel):
     access_token: str
@@ -105,12 +128,34 @@ class UserInDB(User):
 # ---
 
 logging.basicConfig(filename=config['log_file'], level=logging.ERROR, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_executors()
+
+app = FastAPI(lifespan=lifespan)
+init_executors(config)
+metrics_config = config.get('metrics') or {}
+diagnostics_config = config.get('diagnostics') or {}
+jobs = JobQueue(get_executor('calc'), keep_finished=(config.get('jobs') or {}).get('keep_finished', 100), record_metrics=metrics_config.get('enabled', True))
 if create_wordle_db(config):
     pass
 else:
     raise(TypeError("DB Failed to Init Properly"))
 
+metrics.traces.max_size = diagnostics_config.get('keep_traces', 100)
+# Only install the middleware when metrics or tracing is switched on
+metrics_enabled = metrics_config.get('enabled', True)
+trace_header = diagnostics_config.get('trace_header', False)
+trace_all = diagnostics_config.get('trace_all', False)
+if metrics_enabled or trace_header or trace_all:
+    app.add_middleware(
+        metrics.MetricsMiddleware,
+        metrics_enabled=metrics_enabled,
+        trace_header=trace_header,
+        trace_all=trace_all,
+    )
+
 # ---
 # Helper Functions
 # ---
@@ -120,218 +165,156 @@ def check_players(start: int, end: int, hard_mode: bool = True):
     Checks if anyone played a given puzzle
     """
     if hard_mode:
-        query_params = f"WHERE puzzle >= {start} and puzzle <= {end} AND hard_mode = 1"
+        entries = get_entry_columns(config, ['id'], start=start, end=end, hard_mode=1)
     else:
-        query_params = f"WHERE puzzle >= {start} and puzzle <= {end}"
+        entries = get_entry_columns(config, ['id'], start=start, end=end)
 
-    entries = get_entries(config, query_params)
-    if entries == []:
+    if len(entries['id']) == 0:
         return False
     else:
         return True
 
-def calculate_openskill(puzzle: int):
-    """
-    Calculate Openskill rankings for a given day
-    """
-    query_params = f"WHERE puzzle = {puzzle} AND hard_mode = 1"
-    entries = get_entries(config, query_params)
-    if len(entries) == 1:
-        # Don't do calculations when only one player submits
-        for entry in entries:
-            player_data = lookup_player(config, player_id=entry['player_id'])
-            score_data = {
-                'mu': player_data['player_mu'],
-                'sigma': player_data['player_sigma'],
-                'ordinal': player_data['player_ord'],
-                'ordinal_delta': 0
-            }
-            players_data = {
-                'ord_delta': 0,
-                'mu_delta': 0,
-                'sigma_delta': 0
-            }
-            update_score_entry(config, entry['id'], score_data)
-            update_player_entry(config, entry['player_id'], players_data)
-        return False
-    
-    players = []
-    scores = []
-    player_stats = {}
-
-    for entry in entries:
-        player_data = lookup_player(config, player_id=entry['player_id'])
-        players.append([model.rating(name=str(entry['player_id']), mu=player_data['player_mu'], sigma=player_data['player_sigma'])])
-        scores.append(entry['calculated_score'])
-
-        player_stats[entry['player_id']] = {
-            'ordinal': player_data['player_ord'],
-            'mu': player_data['player_mu'],
-            'sigma': player_data['player_sigma']
-        }
+def blame(uuid: str, puzzle: int):
+    """
+    Break a player's ELO change on a puzzle down by opponent, from the matchups recorded when it was rated
+    """
+    rows = get_matchups(config, uuid, puzzle)
+    if rows == []:
+        return f"{uuid} did not play Wordle #{puzzle}!"
+    player = rows[0]
+    if player['elo'] is None or player['elo_delta'] is None:
+        return f"Wordle #{puzzle} hasn't been rated yet!"
+
+    output_string = f"Analysis of {player['player_name']}'s Performance in Wordle #{puzzle}:"
+    output_string = f"{output_string}\n\n{player['player_name']} started with an ELO of {round(player['elo'] - player['elo_delta'], 3)}\n"
+    overall_change = 0
+    for row in rows:
+        if row['opponent_id'] is None:
+            continue
+        change = row['elo_change']
+        overall_change += change
+        if row['result'] == 1:
+            output_string = f"{output_string}\n\tWon against {row['opponent_name']}. ELO Change: {round(change, 3)}"
+        elif row['result'] == 0.5:
+            output_string = f"{output_string}\n\tTied against {row['opponent_name']}. ELO Change: {round(change, 3)}"
+        else:
+            output_string = f"{output_string}\n\tLost against {row['opponent_name']}. ELO Change: {round(change, 3)}"
 
-    match_scores = model.rate(players, scores=scores)
+    output_string = f"{output_string}\n\nIn total {player['player_name']}'s ELO changed by {round(overall_change, 3)}, bringing their new ELO rating to: {round(player['elo'], 3)}"
+    return output_string
 
-    i = 0
-    for entry in entries:
-        player = match_scores[i][0]
-
-        score_data = {
-            'sigma': player.sigma,
-            'mu': player.mu,
-            'ordinal': player.ordinal(),
-            'ordinal_delta': player.ordinal() - player_stats[entry['player_id']]['ordinal']
+def blame_range(uuid: str, start_puzzle: int, end_puzzle: int):
+    """
+    Sum a player's ELO matchups per opponent over a range of puzzles
+    """
+    totals = get_matchup_totals(config, uuid, start_puzzle, end_puzzle)
+    if totals == []:
+        return {
+            'status': 404,
+            'msg': f"{uuid} has no rated hard mode matchups between Wordle #{start_puzzle} and #{end_puzzle}!"
         }
+    player = lookup_player(config, uuid)
+
+    output_string = f"Analysis of {player['player_name']}'s Performance in Wordles #{start_puzzle} - #{end_puzzle}:\n"
+    overall_change = 0
+    for total in totals:
+        overall_change += total['elo_change']
+        output_string = f"{output_string}\n\t{total['opponent_name']}: {total['wins']} won, {total['draws']} tied, {total['losses']} lost. ELO Change: {round(total['elo_change'], 3)}"
+    output_string = f"{output_string}\n\nIn total {player['player_name']}'s ELO changed by {round(overall_change, 3)}"
+    return {
+        'msg': output_string,
+        'opponents': totals
+    }
 
-        players_data = {
-            'player_mu': player.mu,
-            'player_sigma': player.sigma,
-            'player_ord': player.ordinal(),
-            'ord_delta': player.ordinal() - player_stats[entry['player_id']]['ordinal'],
-            'mu_delta': player.mu - player_stats[entry['player_id']]['mu'],
-            'sigma_delta': player.sigma - player_stats[entry['player_id']]['sigma']
+def rating_history(uuid: str, start_puzzle: int = None, end_puzzle: int = None, points: int = None, bucket: str = None, series: str = 'ordinal'):
+    """
+    A player's rating after each rated puzzle, optionally cut down to the last point of each week and/or
+    to at most points points, chosen by LTTB to keep the shape of one series
+    """
+    player = lookup_player(config, uuid)
+    if player == {}:
+        return {
+            'status': 404,
+            'msg': f"{uuid} is not registered!"
         }
 
-        update_score_entry(config, entry['id'], score_data)
-        update_player_entry(config, entry['player_id'], players_data)
-        i += 1
-
-def calculate_match_elo(puzzle: int):
+    history = get_rating_history(config, player['player_id'], start_puzzle, end_puzzle)
+    total = len(history['puzzle'])
+    keep = None
+    if bucket == 'week':
+        keep = weekly(history['puzzle'])
+        history = {col: [values[i] for i in keep] for col, values in history.items()}
+    if points is not None and len(history['puzzle']) > points:
+        keep = lttb(history['puzzle'], history[series], points)
+        history = {col: [values[i] for i in keep] for col, values in history.items()}
+
+    return dict({
+        'player_uuid': uuid,
+        'player_name': player['player_name'],
+        'total_points': total,
+        'downsampled': len(history['puzzle']) < total,
+    }, **history)
+
+def head_to_head_report(start_puzzle: int, end_puzzle: int, uuids: list = None):
     """
-    Legacy ELO Calculation
-    Translate rankings into 1-1 matches between each player, then sum the elo change
+    Matches, wins, draws, losses and ELO exchanged between every pair of players over a range of puzzles,
+    as matrices indexed by the players list
     """
-    query_params = f"WHERE puzzle = {puzzle} AND hard_mode = 1"
-    entries = get_entries(config, query_params)
-    if len(entries) == 1:
-        # Don't do calculations when only one player submits
-        for entry in entries:
-            player_data = lookup_player(config, player_id=entry['player_id'])
-            score_data = {
-                'elo': player_data['player_elo'],
-                'elo_delta': 0,
-            }
-            players_data = {
-                'elo_delta': 0
+    if uuids is not None:
+        found = lookup_players(config, uuids)
+        missing = [uuid for uuid in uuids if uuid not in found]
+        if missing:
+            return {
+                'status': 404,
+                'msg': f"Players not registered: {', '.join(missing)}"
             }
-            update_score_entry(config, entry['id'], score_data)
-            update_player_entry(config, entry['player_id'], players_data)
+        players = [found[uuid] for uuid in dict.fromkeys(uuids)]
+        rows = get_match_rows(config, start_puzzle, end_puzzle, [player['player_id'] for player in players])
+    else:
+        rows = get_match_rows(config, start_puzzle, end_puzzle)
+        played = set(rows['player_id'].tolist())
+        players = sorted([player for player in get_all_players(config) if player['player_id'] in played], key=lambda player: player['player_id'])
 
-        return False
-    
-    player_ids = []
-    grouped = {i: [] for i in range(7)}  # Initialize keys 0 through 6
-    for entry in entries:
-        score = entry.get('calculated_score')
-        grouped[score].append(entry)
-        player_ids.append(entry['player_id'])
-
-    current_ratings = {}
-    for id in player_ids:
-        player_data = lookup_player(config, player_id=id)
-        current_ratings[id] = player_data['player_elo']
-
-    for player in entries:
-        overall_change = 0
-        for i in range(7):
-            if player['calculated_score'] > i:
-                # win condition
-                for opp in grouped[i]:
-                    change = calculate_elo(current_ratings[player['player_id']], current_ratings[opp['player_id']], 1)
-                    overall_change += change
-            elif player['calculated_score'] == i:
-                # draw condition
-                for opp in grouped[i]:
-                    if player == opp:
-                        # Player is included in this, do not calculate against themselves
-                        continue
-                    change = calculate_elo(current_ratings[player['player_id']], current_ratings[opp['player_id']], 0.5)
-                    overall_change += change
-            else:
-                # loss condition
-                for opp in grouped[i]:
-                    change = calculate_elo(current_ratings[player['player_id']], current_ratings[opp['player_id']], 0)
-                    overall_change += change
-        score_data = {
-            'elo': current_ratings[player['player_id']] + overall_change,
-            'elo_delta': overall_change
-        }
-        players_data = {
-            'player_elo': current_ratings[player['player_id']] + overall_change,
-            'elo_delta': overall_change
+    # Scores left behind by players who are no longer registered have no place in the matrices
+    ids = np.asarray([player['player_id'] for player in players], dtype=np.int64)
+    known = np.isin(rows['player_id'], ids)
+    rows = {col: values[known] for col, values in rows.items()}
+
+    if len(rows['puzzle']) == 0:
+        return {
+            'status': 404,
+            'msg': f"No rated hard mode scores between Wordle #{start_puzzle} and #{end_puzzle}!"
         }
-        update_score_entry(config, player['id'], score_data)
-        update_player_entry(config, player['player_id'], players_data)
-        
-def blame(uuid: str, puzzle: int):
-    """
-    Legacy ELO Calculation
-    Translate rankings into 1-1 matches between each player, then sum the elo change
-    """
-    query_params = f"WHERE puzzle = {puzzle} AND hard_mode = 1"
-    entries = get_entries(config, query_params)
-    entries = sorted(entries, key=lambda x: x['calculated_score'], reverse=True)
-    
-    player_ids = []
-    grouped = {i: [] for i in range(7)}  # Initialize keys 0 through 6
-    for entry in entries:
-        score = entry.get('calculated_score')
-        grouped[score].append(entry)
-        player_ids.append(entry['player_id'])
-
-    current_ratings = {}
-    player_info = {}
-    target_id = 0
-    for id in player_ids:
-        player_data = lookup_player(config, player_id=id)
-        if player_data['player_uuid'] == uuid:
-            target_id = player_data['player_id']
-        player_info[id] = player_data
-        current_ratings[id] = player_data['player_elo']
-
-    output_string = ""
-    for player in entries:
-        if player['player_id'] == target_id:
-            output_string = f"{output_string}Analysis of {player_info[player['player_id']]['player_name']}'s Performance in Wordle #{puzzle}:"
-            output_string = f"{output_string}\n\n{player_info[player['player_id']]['player_name']} started with an ELO of {round(current_ratings[player['player_id']], 3)}\n"
-            overall_change = 0
-            for i in range(7):
-                if player['calculated_score'] > i:
-                    # win condition
-                    for opp in grouped[i]:
-                        change = calculate_elo(current_ratings[player['player_id']], current_ratings[opp['player_id']], 1)
-                        overall_change += change
-                        output_string = f"{output_string}\n\tWon against {player_info[opp['player_id']]['player_name']}. ELO Change: {round(change, 3)}"
-                elif player['calculated_score'] == i:
-                    # draw condition
-                    for opp in grouped[i]:
-                        if player == opp:
-                            # Player is included in this, do not calculate against themselves
-                            continue
-                        change = calculate_elo(current_ratings[player['player_id']], current_ratings[opp['player_id']], 0.5)
-                        overall_change += change
-                        output_string = f"{output_string}\n\tTied against {player_info[opp['player_id']]['player_name']}. ELO Change: {round(change, 3)}"
-                else:
-                    # loss condition
-                    for opp in grouped[i]:
-                        change = calculate_elo(current_ratings[player['player_id']], current_ratings[opp['player_id']], 0)
-                        overall_change += change
-                        output_string = f"{output_string}\n\tLost against {player_info[opp['player_id']]['player_name']}. ELO Change: {round(change, 3)}"
-
-            output_string = f"{output_string}\n\nIn total {player_info[player['player_id']]['player_name']}'s ELO changed by {round(overall_change, 3)}, bringing their new ELO rating to: {round(current_ratings[player['player_id']] + overall_change, 3)}"
-    if output_string == "":
-        output_string = f"{uuid} did not play Wordle #{puzzle}!"
-    return output_string
+
+    # Position of each row's player in players
+    order = np.argsort(ids)
+    matches, wins, draws, losses, elo_exchange = head_to_head(
+        rows['puzzle'] - start_puzzle,
+        order[np.searchsorted(ids, rows['player_id'], sorter=order)],
+        rows['calculated_score'],
+        rows['elo'],
+        end_puzzle - start_puzzle + 1,
+        len(players)
+    )
+    return {
+        'start_puzzle': start_puzzle,
+        'end_puzzle': end_puzzle,
+        'players': [{'player_uuid': player['player_uuid'], 'player_name': player['player_name']} for player in players],
+        'matches': matches.astype(int).tolist(),
+        'wins': wins.astype(int).tolist(),
+        'draws': draws.astype(int).tolist(),
+        'losses': losses.astype(int).tolist(),
+        'elo_exchange': elo_exchange.round(3).tolist(),
+    }
 
 def get_daily_ranks(puzzle: int):
     # query_string = f"SELECT player_name, hard_mode, calculated_score FROM scores WHERE puzzle = {puzzle}"
-    # data = get_entries(query_string)
-    query_params = f"WHERE puzzle = {puzzle}"
-    data = get_entries(config, query_params)
+    data = get_entries_with_players(config, puzzle=puzzle)
     for result in data:
         result['hard_mode'] = 'Y' if result['hard_mode'] == 1 else 'N'
-        player_data = lookup_player(config, player_id=result['player_id'])
-        result['player_name'] = player_data['player_name']
+        for col in ['player_uuid', 'player_platform', 'player_mu', 'player_sigma', 'player_ord', 'player_elo']:
+            # Only the player's name is part of the daily ranks output
+            del result[col]
     sorted_players = sorted(data, key=lambda x: x['calculated_score'], reverse=True)
     player_chart = '| Player | Hard Mode | Ranking |\n| --- | --- | --- |'
     i = 0
@@ -356,36 +339,15 @@ def get_daily_report(today: date):
     Provide a ranking of all players in order of their OpenSkill rank
     """
     puzzle = get_wordle_puzzle(today - timedelta(days=1))
-    players = defaultdict(list)
-    player_stats = {}
-    player_data = get_all_players(config)
-
-    query_params = f"WHERE puzzle = {puzzle}"
-    entries = get_entries(config, query_params)
-    for entry in entries:
-        players[entry['player_id']].append(entry)
-    
-    players = dict(players)
-    for player, scores in players.items():
-        player_stats[player] = {}
-
-        for score in scores:
-            player_stats[player]['end_elo'] = round(score['elo'], 3)
-            player_stats[player]['elo_change'] = round(score['elo_delta'], 3)
-
-            player_stats[player]['end_ord'] = round(score['ordinal'], 5)
-            player_stats[player]['ord_change'] = round(score['ordinal_delta'], 5)
-    
-    # sort player_stats by end ordinal
-    sorted_keys = sorted(player_stats, key=lambda k: player_stats[k]['end_ord'], reverse=True)
-    raw_sorted_player_stats = {}
-    for key in sorted_keys:
-        raw_sorted_player_stats[key] = player_stats[key]
 
     sorted_player_stats = {}
-    for k, v in raw_sorted_player_stats.items():
-        player_name = match_player_name(player_data, player_id=k)
-        sorted_player_stats[player_name] = v
+    for row in get_daily_report_rows(config, puzzle):
+        sorted_player_stats[row['player_name']] = {
+            'end_elo': round(row['elo'], 3),
+            'elo_change': round(row['elo_delta'], 3),
+            'end_ord': round(row['ordinal'], 5),
+            'ord_change': round(row['ordinal_delta'], 5)
+        }
 
     output = {
         'sorted_player_stats': sorted_player_stats
@@ -402,46 +364,19 @@ def get_weekly_report(end_date: date):
     start_date = end_date - timedelta(days=7)
     end = get_wordle_puzzle(end_date)
     start = get_wordle_puzzle(start_date)
-    players = defaultdict(list)
-    player_stats = {}
-    player_data = get_all_players(config)
-
-    query_params = f"WHERE puzzle >= {start} and puzzle <= {end}"
-    entries = get_entries(config, query_params)
-    for entry in entries:
-        players[entry['player_id']].append(entry)
-    
-    players = dict(players)
-    for player, scores in players.items():
-        player_stats[player] = {}
-
-        all_scores = []
-        earliest = end + 1
-        latest = 0
-        for score in scores:
-            all_scores.append(score['score'])
-            if score['puzzle'] > latest:
-                player_stats[player]['end_elo'] = round(score['elo'], 3)
-                player_stats[player]['end_ord'] = round(model.rating(mu=score['mu'], sigma=score['sigma']).ordinal(), 5)
-                latest = score['puzzle']
-            if score['puzzle'] < earliest:
-                player_stats[player]['start_elo'] = round(score['elo'], 3)
-                player_stats[player]['start_ord'] = round(model.rating(mu=score['mu'], sigma=score['sigma']).ordinal(), 5)
-                earliest = score['puzzle']
-        player_stats[player]['average_score'] = round(sum(all_scores) / len(all_scores), 1)
-        player_stats[player]['elo_change'] = round(player_stats[player]['end_elo'] - player_stats[player]['start_elo'], 3)
-        player_stats[player]['ord_change'] = round(player_stats[player]['end_ord'] - player_stats[player]['start_ord'], 3)
-    
-    # sort player_stats by end ordinal
-    sorted_keys = sorted(player_stats, key=lambda k: player_stats[k]['end_ord'], reverse=True)
-    raw_sorted_player_stats = {}
-    for key in sorted_keys:
-        raw_sorted_player_stats[key] = player_stats[key]
 
     sorted_player_stats = {}
-    for k, v in raw_sorted_player_stats.items():
-        player_name = match_player_name(player_data, player_id=k)
-        sorted_player_stats[player_name] = v
+    for row in get_weekly_report_rows(config, start, end):
+        player_stats = {
+            'end_elo': round(row['end_elo'], 3),
+            'end_ord': round(row['end_ord'], 5),
+            'start_elo': round(row['start_elo'], 3),
+            'start_ord': round(row['start_ord'], 5),
+            'average_score': round(float(row['average_score']), 1)
+        }
+        player_stats['elo_change'] = round(player_stats['end_elo'] - player_stats['start_elo'], 3)
+        player_stats['ord_change'] = round(player_stats['end_ord'] - player_stats['start_ord'], 3)
+        sorted_player_stats[row['player_name']] = player_stats
 
     output = {
         'sorted_player_stats': sorted_player_stats
@@ -462,6 +397,64 @@ def is_puzzle_valid(puzzle: int):
     else:
         return False
 
+def rerate_job(job, puzzle: int = None):
+    """
+    Rate puzzle (if given) and replay anything after the dirty watermark, skipping puzzles that haven't changed
+    """
+    results = rerate(config, model, puzzle, progress=job.progress)
+    if results['recalculated']:
+        report_cache.invalidate(results['start_puzzle'], results['end_puzzle'])
+    return results
+
+def backfill_job(job, start_puzzle: int, end_puzzle: int, openskill: bool, elo: bool, dry_run: bool):
+    results = replay_ratings(config, model, start_puzzle, end_puzzle, openskill=openskill, elo=elo, dry_run=dry_run, progress=job.progress)
+    if dry_run:
+        results['msg'] = 'Backfill dry run completed, nothing was written.'
+    else:
+        report_cache.invalidate(start_puzzle, end_puzzle)
+        results['msg'] = 'Backfill completed sucessfully.'
+    return results
+
+def job_response(job, created: bool):
+    if created:
+        msg = f"Queued {job.kind} job, check progress at /jobs/{job.id}"
+    else:
+        msg = f"An identical {job.kind} job is already {job.status}, check progress at /jobs/{job.id}"
+    return {
+        'status': 202,
+        'msg': msg,
+        'job_id': job.id,
+        'job_status': job.status
+    }
+
+def sync_report_cache():
+    if report_cache.needs_check():
+        report_cache.sync(get_cache_generations(config))
+
+async def cached_report(request: Request, key: tuple, start: int, end: int, build):
+    """
+    Serve a report covering puzzles [start, end] with an ETag
+    Reports for closed puzzles are cached until those puzzles are recalculated, and a
+    matching If-None-Match gets a 304 back
+    """
+    if is_puzzle_valid(end):
+        # Scores can still be submitted, so always build it fresh
+        return await run_db(build)
+
+    await run_db(sync_report_cache)
+    cached = report_cache.get(key)
+    if cached is None:
+        data = await run_db(build)
+        if isinstance(data, dict) and data.get('status') == 404:
+            return data
+        cached = report_cache.put(key, start, end, JSONResponse(content=jsonable_encoder(data)).body)
+
+    etag, body = cached
+    if_none_match = request.headers.get('if-none-match', '')
+    if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+        return Response(status_code=304, headers={'ETag': etag})
+    return Response(content=body, media_type='application/json', headers={'ETag': etag})
+
 # ---
 # FastAPI Security Functions
 # ---
@@ -493,6 +486,10 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -509,6 +506,8 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     user = get_user(USERS, username=token_data.username)
     if user is None:
         raise credentials_exception
+    if 'exp' in payload:
+        token_cache.put(token, payload['exp'], user)
     return user
 
 async def get_current_active_user(
@@ -516,6 +515,7 @@ async def get_current_active_user(
 ):
     if current_user.disabled:
         raise HTTPException(status_code=400, detail="Inactive user")
+    metrics.set_user(current_user.username)
     return current_user
 
 # ---
@@ -526,7 +526,7 @@ async def get_current_active_user(
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
-    user = authenticate_user(USERS, form_data.username, form_data.password)
+    user = await run_auth(authenticate_user, USERS, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -542,7 +542,7 @@ async def login_for_access_token(
 @app.post('/register')
 async def register(player_data: Player, current_user: Annotated[User, Depends(get_current_active_user)]):
     player_data = dict(player_data)
-    data = lookup_player(config, player_uuid=player_data['player_uuid'])
+    data = await run_db(lookup_player, config, player_uuid=player_data['player_uuid'])
     if data == {}:
         player = model.rating(name='test')
         player_data.update({
@@ -555,7 +555,7 @@ async def register(player_data: Player, current_user: Annotated[User, Depends(ge
             'mu_delta': 0,
             'sigma_delta': 0,
         })
-        register_player(config, player_data)
+        await run_db(register_player, config, player_data)
         return player_data
     else:
         return {'status': 409}
@@ -563,41 +563,33 @@ async def register(player_data: Player, current_user: Annotated[User, Depends(ge
 
 @app.post('/update-registration')
 async def update_registration(player_data: Player, current_user: Annotated[User, Depends(get_current_active_user)]):
-    players = get_all_players(config)
+    players = await run_db(get_all_players, config)
     player_data = dict(player_data)
     for player in players:
         if player['player_uuid'] == player_data['player_uuid']:
             data = {
                 'player_name': player_data['player_name']
             }
-            update_player_entry(config, player['player_id'], data)
-            return lookup_player(config, player_uuid=player_data['player_uuid'])
+            await run_db(update_player_entry, config, player['player_id'], data)
+            return await run_db(lookup_player, config, player_uuid=player_data['player_uuid'])
 
 @app.post('/add-score/')
 async def add_score(score: Score, current_user: Annotated[User, Depends(get_current_active_user)]):
     """
     Add player score to DB
     """
-    player_data = lookup_player(config, score.uuid)
+    player_data = await run_db(lookup_player, config, score.uuid)
     if player_data == {}:
         return {
             'status': 404,
             'msg': f"{score.uuid} is not registered for Wordle!"
         }
     data = parse_score(score.score)
-    score_data = get_entries(config, f"WHERE player_id = {player_data['player_id']} AND puzzle = {data['puzzle']}")
+    score_data = await run_db(get_entries, config, player_id=player_data['player_id'], puzzle=data['puzzle'])
     if score_data == []:
-        data['player_id'] = player_data['player_id']
-        data ['raw_score'] = score.score
-        if data['hard_mode'] == 0:
-            data['elo'] = player_data['player_elo']
-            data['mu'] = player_data['player_mu']
-            data['sigma'] = player_data['player_sigma']
-            data['ordinal'] = player_data['player_ord']
-            data['elo_delta'] = player_data['elo_delta']
-            data['ordinal_delta'] = player_data['ord_delta']
+        data = build_score_entry(data, score.score, player_data)
         if is_puzzle_valid(data['puzzle']):
-            add_entry(config, data)
+            await run_db(add_entry, config, data)
             data['player_name'] = player_data['player_name']
             return data
         else:
@@ -611,6 +603,93 @@ async def add_score(score: Score, current_user: Annotated[User, Depends(get_curr
             'msg': f"{player_data['player_name']} already submitted Wordle #{data['puzzle']}"
         }
 
+@app.post('/add-scores')
+async def add_scores(batch: ScoreBatch, current_user: Annotated[User, Depends(get_current_active_user)]):
+    """
+    Add a batch of player scores to the DB
+    Players and existing submissions are looked up once for the whole batch, and accepted
+    scores are written with a single insert. Each item gets its own status, in order
+    """
+    results = [None] * len(batch.scores)
+    parsed = {}
+    for i, score in enumerate(batch.scores):
+        try:
+            parsed[i] = parse_score(score.score)
+        except AttributeError:
+            results[i] = {
+                'status': 400,
+                'msg': f"Could not read a Wordle score from '{score.score}'"
+            }
+
+    players = await run_db(lookup_players, config, [batch.scores[i].uuid for i in parsed])
+    submitted = await run_db(
+        get_submitted, config,
+        [player['player_id'] for player in players.values()],
+        [data['puzzle'] for data in parsed.values()]
+    )
+
+    entries = []
+    accepted = []
+    for i, data in parsed.items():
+        score = batch.scores[i]
+        player_data = players.get(score.uuid)
+        if player_data is None:
+            results[i] = {
+                'status': 404,
+                'msg': f"{score.uuid} is not registered for Wordle!"
+            }
+        elif (player_data['player_id'], data['puzzle']) in submitted:
+            results[i] = {
+                'status': 409,
+                'msg': f"{player_data['player_name']} already submitted Wordle #{data['puzzle']}"
+            }
+        elif not is_puzzle_valid(data['puzzle']):
+            results[i] = {
+                'status': 409,
+                'msg': f"The window for submitting Wordle #{data['puzzle']} is closed!"
+            }
+        else:
+            # Also catches the same score appearing twice in one batch
+            submitted.add((player_data['player_id'], data['puzzle']))
+            entries.append(build_score_entry(data, score.score, player_data))
+            accepted.append((i, player_data['player_name']))
+
+    await run_db(add_entries, config, entries)
+    for entry, (i, player_name) in zip(entries, accepted):
+        results[i] = dict(entry, status=200, player_name=player_name)
+
+    return {
+        'status': 200,
+        'added': len(entries),
+        'results': results
+    }
+
+@app.post('/import-chat')
+async def import_chat_export(request: Request, current_user: Annotated[User, Depends(get_current_active_user)], fmt: str = 'text'):
+    """
+    Import every score in a chat export sent as the raw request body (plain text or JSON lines)
+    The upload is spooled to disk past a few MB so large exports don't sit in memory
+    Scores older than the rating ledger are only rated once /backfill-scores is run over them
+    """
+    if fmt not in ['text', 'jsonl']:
+        return {
+            'status': 400,
+            'msg': f"Unknown format '{fmt}', use text or jsonl"
+        }
+    with SpooledTemporaryFile(max_size=4 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        lines = io.TextIOWrapper(spool, encoding='utf-8', errors='replace')
+        # An import only writes scores, so it runs with the other DB work rather than queueing behind replays
+        results = await run_db(import_chat, config, lines, fmt)
+        lines.detach()
+    if results['unrated']:
+        # Imports older than the rating ledger aren't re-rated automatically
+        results['msg'] = f"{results['unrated']} hard mode scores from before the rating ledger were imported unrated, rate them with /backfill-scores from start_puzzle {results['unrated_from']} to end_puzzle {results['last_puzzle']}"
+    results['status'] = 200
+    return results
+
 @app.post('/backfill-scores')
 async def backfill_scores(backfill_data: BackfillData, current_user: Annotated[User, Depends(get_current_active_user)]):
     openskill = False
@@ -630,23 +709,19 @@ async def backfill_scores(backfill_data: BackfillData, current_user: Annotated[U
                 'msg': 'Field calc_type should be either openskill, elo, or all'
             }
     
-    for puzzle in range(backfill_data.start_puzzle, backfill_data.end_puzzle + 1):
-        if check_players(puzzle, puzzle, True):
-            if openskill:
-                calculate_openskill(puzzle)
-            if elo:
-                calculate_match_elo(puzzle)
-        else:
-            pass
-    
-    return {
-        'status': 200,
-        'msg': 'Backfill completed sucessfully.'
+    params = {
+        'start_puzzle': backfill_data.start_puzzle,
+        'end_puzzle': backfill_data.end_puzzle,
+        'calc_type': backfill_data.calc_type,
+        'dry_run': backfill_data.dry_run,
     }
+    total = backfill_data.end_puzzle - backfill_data.start_puzzle + 1
+    job, created = jobs.submit('backfill', params, total, backfill_job, backfill_data.start_puzzle, backfill_data.end_puzzle, openskill, elo, backfill_data.dry_run)
+    return job_response(job, created)
 
 @app.get('/score/{uuid}')
 async def get_score(uuid, current_user: Annotated[User, Depends(get_current_active_user)], puzzle: int = get_wordle_puzzle(date.today())):
-    player_data = lookup_player(config, uuid)
+    player_data = await run_db(lookup_player, config, uuid)
 
     if player_data == {}:
         return {
@@ -654,8 +729,7 @@ async def get_score(uuid, current_user: Annotated[User, Depends(get_current_acti
             'msg': f"{uuid} is not registered for Wordle!"
         }
 
-    query_params = f"WHERE puzzle = {puzzle} AND player_id = {player_data['player_id']}"
-    score_data = get_entries(config, query_params)
+    score_data = await run_db(get_entries, config, puzzle=puzzle, player_id=player_data['player_id'])
     if score_data == []:
         return {'status': 404, 'msg': f'{player_data['player_name']} did not played today :('}
     else:
@@ -664,55 +738,194 @@ async def get_score(uuid, current_user: Annotated[User, Depends(get_current_acti
         return score_data
 
 @app.get('/blame/{uuid}')
-async def blame_score(uuid, current_user: Annotated[User, Depends(get_current_active_user)], puzzle: int = get_wordle_puzzle(date.today()) - 1):
-    msg = blame(uuid, puzzle)
-    return {'msg': msg}
+async def blame_score(uuid, request: Request, current_user: Annotated[User, Depends(get_current_active_user)], puzzle: int = get_wordle_puzzle(date.today()) - 1, start_puzzle: int | None = None, end_puzzle: int | None = None):
+    """
+    A player's ELO change by opponent on one puzzle, or summed per opponent over start_puzzle - end_puzzle
+    """
+    if start_puzzle is not None or end_puzzle is not None:
+        if start_puzzle is None or end_puzzle is None or start_puzzle > end_puzzle:
+            return {
+                'status': 400,
+                'msg': 'Fields start_puzzle and end_puzzle should be given together, with start_puzzle <= end_puzzle'
+            }
+
+        def build_range():
+            return blame_range(uuid, start_puzzle, end_puzzle)
+
+        return await cached_report(request, ('blame', uuid, start_puzzle, end_puzzle), start_puzzle, end_puzzle, build_range)
+
+    def build():
+        return {'msg': blame(uuid, puzzle)}
+
+    return await cached_report(request, ('blame', uuid, puzzle), puzzle, puzzle, build)
+
+@app.get('/history/{uuid}')
+async def player_history(uuid, request: Request, current_user: Annotated[User, Depends(get_current_active_user)], start_puzzle: int | None = None, end_puzzle: int | None = None, points: int | None = None, bucket: str | None = None, series: str = 'ordinal'):
+    """
+    A player's elo, mu, sigma and ordinal after each rated hard mode puzzle, as one array per series
+    Long histories can be cut down with bucket=week (last point of each week) and/or points=N (LTTB on series)
+    """
+    if start_puzzle is not None and end_puzzle is not None and start_puzzle > end_puzzle:
+        return {'status': 400, 'msg': 'Field start_puzzle should be <= end_puzzle'}
+    if points is not None and points < 3:
+        return {'status': 400, 'msg': 'Field points should be at least 3'}
+    if bucket not in [None, 'week']:
+        return {'status': 400, 'msg': "Field bucket should be 'week'"}
+    if series not in ['elo', 'mu', 'sigma', 'ordinal']:
+        return {'status': 400, 'msg': 'Field series should be one of elo, mu, sigma, ordinal'}
+
+    def build():
+        return rating_history(uuid, start_puzzle, end_puzzle, points, bucket, series)
+
+    end = end_puzzle if end_puzzle is not None else get_wordle_puzzle(date.today())
+    return await cached_report(request, ('history', uuid, start_puzzle, end_puzzle, points, bucket, series), start_puzzle or 0, end, build)
+
+@app.get('/head-to-head')
+async def head_to_head_matrix(request: Request, current_user: Annotated[User, Depends(get_current_active_user)], start_puzzle: int, end_puzzle: int, players: Annotated[list[str] | None, Query()] = None):
+    """
+    Who beats whom: wins, draws, losses and ELO exchanged between every pair of players (or just the given
+    player uuids) over start_puzzle - end_puzzle. Row i, column j is players[i] against players[j]
+    """
+    if start_puzzle > end_puzzle:
+        return {'status': 400, 'msg': 'Field start_puzzle should be <= end_puzzle'}
+
+    def build():
+        return head_to_head_report(start_puzzle, end_puzzle, players)
+
+    key = ('head-to-head', start_puzzle, end_puzzle, tuple(players) if players is not None else None)
+    return await cached_report(request, key, start_puzzle, end_puzzle, build)
 
 @app.get('/calculate-daily/')
 async def calculate_daily(current_user: Annotated[User, Depends(get_current_active_user)], puzzle_date: date = date.today()):
     puzzle = get_wordle_puzzle(puzzle_date)
-    if check_players(puzzle, puzzle, True):
-        calculate_openskill(puzzle)
-        calculate_match_elo(puzzle)
-    else:
-        pass
-    return {'status': 200}
+    job, created = jobs.submit('calculate-daily', {'puzzle': puzzle}, 1, rerate_job, puzzle)
+    return job_response(job, created)
+
+@app.post('/rerate')
+async def rerate_scores(current_user: Annotated[User, Depends(get_current_active_user)]):
+    """
+    Replay ratings from the earliest puzzle that got new hard mode scores since it was rated
+    """
+    job, created = jobs.submit('rerate', {}, 0, rerate_job)
+    return job_response(job, created)
+
+@app.get('/jobs')
+async def list_jobs(current_user: Annotated[User, Depends(get_current_active_user)]):
+    """
+    Queued, running and recently finished calculation jobs
+    """
+    return {
+        'status': 200,
+        'jobs': [job.to_dict() for job in jobs.list()]
+    }
+
+@app.get('/jobs/{job_id}')
+async def get_job(job_id: str, current_user: Annotated[User, Depends(get_current_active_user)]):
+    job = jobs.get(job_id)
+    if job is None:
+        return {
+            'status': 404,
+            'msg': f"No job with id {job_id}"
+        }
+    return dict(job.to_dict(), status=200)
 
 @app.get('/daily-ranks/')
-async def daily_ranks(current_user: Annotated[User, Depends(get_current_active_user)], report_date: date = date.today()):
+async def daily_ranks(request: Request, current_user: Annotated[User, Depends(get_current_active_user)], report_date: date = date.today()):
     """
     Provide a ranking of all players based on their performance (rank only, hard mode independent) in a given puzzle
     """
     puzzle = get_wordle_puzzle(report_date)
-    if check_players(puzzle, puzzle, False):
-        output = get_daily_ranks(puzzle)
-    else:
-        output = {'status': 404, 'msg': 'Nobody played today :('}
-    return output
+
+    def build():
+        if check_players(puzzle, puzzle, False):
+            return get_daily_ranks(puzzle)
+        return {'status': 404, 'msg': 'Nobody played today :('}
+
+    return await cached_report(request, ('daily-ranks', puzzle), puzzle, puzzle, build)
 
 @app.get('/daily-summary/')
-async def daily_summary(current_user: Annotated[User, Depends(get_current_active_user)], report_date: date = date.today()):
+async def daily_summary(request: Request, current_user: Annotated[User, Depends(get_current_active_user)], report_date: date = date.today()):
     puzzle = get_wordle_puzzle(report_date - timedelta(days=1))
-    if check_players(puzzle, puzzle, False):
-        data = get_daily_report(report_date)
-    else:
-        data = {'status': 404, 'msg': 'Nobody played today :('}
-    return data
+
+    def build():
+        if check_players(puzzle, puzzle, False):
+            return get_daily_report(report_date)
+        return {'status': 404, 'msg': 'Nobody played today :('}
+
+    return await cached_report(request, ('daily-summary', puzzle), puzzle, puzzle, build)
 
 @app.get('/weekly-summary/')
-async def weekly_summary(current_user: Annotated[User, Depends(get_current_active_user)], end_date: date = date.today()):
+async def weekly_summary(request: Request, current_user: Annotated[User, Depends(get_current_active_user)], end_date: date = date.today()):
     start_date = end_date - timedelta(days=7)
     end = get_wordle_puzzle(end_date)
     start = get_wordle_puzzle(start_date)
 
-    if check_players(start, end, False):
-        data = get_weekly_report(end_date)
-    else:
-        data = {'status': 404, 'msg': 'Nobody played today :('}
-    return jsonable_encoder(data)
+    def build():
+        if check_players(start, end, False):
+            return get_weekly_report(end_date)
+        return {'status': 404, 'msg': 'Nobody played today :('}
+
+    return await cached_report(request, ('weekly-summary', start, end), start, end, build)
 
 @app.get('/leaderboard')
-async def leaderboard(current_user: Annotated[User, Depends(get_current_active_user)]):
-    player_data = get_all_players(config)
-    sorted_player_data = sorted(player_data, key=lambda player: player['player_ord'], reverse=True)
-    return sorted_player_data
\ No newline at end of file
+async def leaderboard(current_user: Annotated[User, Depends(get_current_active_user)], sort: str = 'ordinal', limit: int | None = None, offset: int = 0):
+    """
+    Players ranked by OpenSkill ordinal (default) or ELO, optionally paginated with limit & offset
+    """
+    if sort not in SORT_COLUMNS:
+        return {
+            'status': 400,
+            'msg': 'Field sort should be either ordinal or elo'
+        }
+    if limit is not None and limit < 0:
+        return {'status': 400, 'msg': 'Field limit should be at least 0'}
+    return await run_db(get_leaderboard, config, sort, limit, max(offset, 0))
+
+@app.get('/db-stats')
+async def db_stats(current_user: Annotated[User, Depends(get_current_active_user)]):
+    """
+    Connection pool and cache statistics, used to size them under load
+    """
+    return {
+        'pool': get_pool_stats(config),
+        'player_cache': get_player_cache_stats(config),
+        'report_cache': report_cache.stats(),
+        'token_cache': token_cache.stats()
+    }
+
+async def metrics_user(request: Request):
+    # Scrapers can't log in, so metrics.public lets them in without a token
+    if metrics_config.get('public', False):
+        return None
+    token = await oauth2_scheme(request)
+    return await get_current_active_user(await get_current_user(token))
+
+@app.get('/metrics')
+async def get_metrics(current_user: Annotated[User | None, Depends(metrics_user)]):
+    """
+    Request latency, DB and rating counters per route, in the Prometheus text format
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type='text/plain; version=0.0.4')
+
+@app.get('/traces')
+async def list_traces(current_user: Annotated[User, Depends(get_current_active_user)]):
+    """
+    Summaries of the most recent request and job traces, newest first
+    """
+    return {
+        'status': 200,
+        'traces': metrics.traces.list()
+    }
+
+@app.get('/traces/{trace_id}')
+async def get_trace(trace_id: str, current_user: Annotated[User, Depends(get_current_active_user)]):
+    """
+    Every statement (with its duration and row count) and rating call made for a traced request or job
+    """
+    trace = metrics.traces.get(trace_id)
+    if trace is None:
+        return {
+            'status': 404,
+            'msg': f"No trace with id {trace_id}, it may have been dropped for newer ones"
+        }
+    return dict(trace, status=200)
@@ -0,0 +1,150 @@
+"""
+Competitive Ranked Wordle Index Benchmark
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Times the hot score/player lookups against a multi-year synthetic league, with and
+without the indexes added by schema migration 2. Point it at a scratch database:
+
+    python -m benchmarks.index_benchmark --config bench_config.yml --players 40 --years 3
+"""
+
+import json
+import time
+import random
+import argparse
+import statistics
+
+import yaml
+
+from bin.mariadb_handler import create_wordle_db, db_cursor
+from bin.migrations import MARIADB_MIGRATIONS
+from benchmarks.synthetic import generate_players, generate_scores
+
+START_PUZZLE = 1000
+BATCH_SIZE = 5000
+INDEX_MIGRATION = 2
+
+DROP_INDEXES = [
+    "DROP INDEX IF EXISTS `idx_scores_puzzle_hard_mode` ON `scores`",
+    "DROP INDEX IF EXISTS `idx_scores_player_puzzle` ON `scores`",
+    "DROP INDEX IF EXISTS `idx_players_uuid` ON `players`",
+]
+
+def load_league(config: dict, players: int, puzzles: int, seed: int):
+    player_rows = generate_players(players, seed=seed)
+    cols = list(player_rows[0].keys())
+    with db_cursor(config) as (conn, cur):
+        cur.execute("SELECT COUNT(*) FROM scores")
+        if cur.fetchone()[0] > 0:
+            raise SystemExit("scores table is not empty, point the benchmark at a scratch database")
+        cur.executemany(
+            f"INSERT INTO players ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+            [tuple(row[col] for col in cols) for row in player_rows]
+        )
+        conn.commit()
+        cur.execute("SELECT player_id, player_uuid FROM players")
+        player_ids = dict(cur.fetchall())
+
+        batch = []
+        cols = ['player_id', 'puzzle', 'raw_score', 'score', 'calculated_score', 'hard_mode']
+        query_string = f"INSERT INTO scores ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})"
+        for row in generate_scores(list(player_ids), START_PUZZLE, puzzles, seed=seed):
+            batch.append(tuple(row[col] for col in cols))
+            if len(batch) >= BATCH_SIZE:
+                cur.executemany(query_string, batch)
+                batch = []
+        if batch:
+            cur.executemany(query_string, batch)
+        conn.commit()
+    return player_ids
+
+def time_queries(config: dict, player_ids: dict, puzzles: int, repeat: int, seed: int):
+    rng = random.Random(seed)
+    queries = {
+        'scores_by_puzzle_hard_mode': lambda: ("SELECT id FROM scores WHERE puzzle = ? AND hard_mode = 1", (rng.randrange(START_PUZZLE, START_PUZZLE + puzzles),)),
+        'scores_by_player_puzzle': lambda: ("SELECT id FROM scores WHERE player_id = ? AND puzzle = ?", (rng.choice(list(player_ids)), rng.randrange(START_PUZZLE, START_PUZZLE + puzzles))),
+        'player_by_uuid': lambda: ("SELECT player_id FROM players WHERE player_uuid = ?", (rng.choice(list(player_ids.values())),)),
+    }
+    results = {}
+    with db_cursor(config) as (conn, cur):
+        for name, make_query in queries.items():
+            timings = []
+            for _ in range(repeat):
+                query_string, params = make_query()
+                start = time.perf_counter()
+                cur.execute(query_string, params)
+                cur.fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = {
+                'median_ms': round(statistics.median(timings), 4),
+                'p95_ms': round(sorted(timings)[int(len(timings) * 0.95) - 1], 4),
+            }
+    return results
+
+def set_indexes(config: dict, enabled: bool):
+    if enabled:
+        statements = next(statements for version, _, statements in MARIADB_MIGRATIONS if version == INDEX_MIGRATION)
+    else:
+        statements = DROP_INDEXES
+    with db_cursor(config) as (conn, cur):
+        for statement in statements:
+            cur.execute(statement)
+        conn.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark score/player lookups with and without indexes')
+    parser.add_argument('--config', default='config.yml', help='Config file pointing at a scratch MariaDB database')
+    parser.add_argument('--players', type=int, default=40)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    if not create_wordle_db(config):
+        raise SystemExit("DB Failed to Init Properly")
+
+    puzzles = int(args.years * 365)
+    start = time.perf_counter()
+    player_ids = load_league(config, args.players, puzzles, args.seed)
+    load_time = time.perf_counter() - start
+
+    results = {
+        'players': args.players,
+        'puzzles': puzzles,
+        'load_seconds': round(load_time, 2),
+        'indexed': time_queries(config, player_ids, puzzles, args.repeat, args.seed),
+    }
+    set_indexes(config, False)
+    try:
+        results['unindexed'] = time_queries(config, player_ids, puzzles, args.repeat, args.seed)
+    finally:
+        set_indexes(config, True)
+
+    print(f"{args.players} players, {puzzles} puzzles (loaded in {results['load_seconds']}s)")
+    print(f"{'query':<30}{'indexed median ms':>20}{'unindexed median ms':>22}")
+    for name in results['indexed']:
+        print(f"{name:<30}{results['indexed'][name]['median_ms']:>20}{results['unindexed'][name]['median_ms']:>22}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
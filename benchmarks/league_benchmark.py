@@ -0,0 +1,252 @@
+"""
+Competitive Ranked Wordle League Benchmark
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Seeds a synthetic league into a local backend (in memory, or a scratch SQLite file)
+and times the rating functions and the main endpoints against it, in one process with
+no network. Results are written as JSON so runs from different commits can be compared:
+
+    python -m benchmarks.league_benchmark --players 40 --puzzles 365 --output before.json
+    python -m benchmarks.league_benchmark --players 40 --puzzles 365 --compare before.json
+"""
+
+import os
+import json
+import math
+import time
+import random
+import shutil
+import secrets
+import argparse
+import platform
+import importlib
+import statistics
+import subprocess
+import tempfile
+from datetime import date, timedelta
+from itertools import groupby
+
+import yaml
+from passlib.context import CryptContext
+from openskill.models import PlackettLuce
+
+from bin.storage import create_wordle_db, get_entry_records, get_all_players
+from bin.ratings import rate_openskill, rate_match_elo
+from bin.replay import RATING_COLS
+from bin.utilities import get_wordle_puzzle
+from benchmarks.synthetic import load_league
+
+BENCH_USER = 'benchmark'
+
+def summarize(timings: list):
+    timings = sorted(timings)
+    return {
+        'runs': len(timings),
+        'median_ms': round(statistics.median(timings), 4),
+        'p95_ms': round(timings[math.ceil(len(timings) * 0.95) - 1], 4),
+        'min_ms': round(timings[0], 4),
+        'max_ms': round(timings[-1], 4),
+    }
+
+def timed(func, runs: int):
+    """
+    Time func(run) for run in range(runs), in milliseconds
+    """
+    timings = []
+    for run in range(runs):
+        start = time.perf_counter()
+        func(run)
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def build_config(backend: str, workdir: str, password: str, seed: int):
+    """
+    Config for the app under test, with a single user for the benchmark to log in as
+    """
+    return {
+        'storage': {'backend': backend},
+        'memory': {'name': f"benchmark-{seed}"},
+        'sqlite': {'path': os.path.join(workdir, 'benchmark.db')},
+        'log_file': os.path.join(workdir, 'benchmark.log'),
+        'security': {
+            'secret_key': secrets.token_hex(32),
+            'algorithm': 'HS256',
+            'token_expiration': 60,
+            'users': {
+                BENCH_USER: {
+                    'username': BENCH_USER,
+                    # Cheap hash, /token isn't what is being measured
+                    'hashed_password': CryptContext(schemes=['bcrypt'], bcrypt__rounds=4).hash(password),
+                    'disabled': False,
+                }
+            }
+        },
+    }
+
+def bench_ratings(config: dict, start_puzzle: int, end_puzzle: int, repeat: int):
+    """
+    rate_openskill and rate_match_elo on each puzzle in the range, from the players' current ratings
+    """
+    model = PlackettLuce()
+    players = {player['player_id']: player for player in get_all_players(config)}
+    entries = get_entry_records(config, start=start_puzzle, end=end_puzzle, hard_mode=1)
+    puzzles = []
+    for _, puzzle_entries in groupby(entries, key=lambda entry: entry.puzzle):
+        puzzles.append([dict(entry.to_dict(), **{col: players[entry.player_id][col] for col in RATING_COLS}) for entry in puzzle_entries])
+
+    results = {}
+    for name, rate in [('rate_openskill', lambda puzzle: rate_openskill(model, puzzle)), ('rate_match_elo', rate_match_elo)]:
+        results[name] = timed(lambda run: rate(puzzles[run % len(puzzles)]), len(puzzles) * repeat)
+    return results
+
+def bench_endpoints(app, players: list, start_puzzle: int, end_puzzle: int, password: str, repeat: int, seed: int):
+    from fastapi.testclient import TestClient
+
+    def check(response):
+        body = response.json()
+        if response.status_code != 200 or (isinstance(body, dict) and body.get('status', 200) >= 400):
+            raise SystemExit(f"{response.request.method} {response.request.url} failed: {body}")
+        return body
+
+    def wait(response):
+        job = app.jobs.get(check(response)['job_id'])
+        job.future.result()
+        if job.status != 'done':
+            raise SystemExit(f"{job.kind} job failed: {job.error}")
+
+    results = {}
+    with TestClient(app.app) as client:
+        token = check(client.post('/token', data={'username': BENCH_USER, 'password': password}))['access_token']
+        headers = {'Authorization': f"Bearer {token}"}
+
+        # The first backfill rates the whole league from scratch, the rest replay over already rated scores
+        backfill = {'start_puzzle': start_puzzle, 'end_puzzle': end_puzzle, 'calc_type': 'all'}
+        results['backfill_scores'] = timed(lambda run: wait(client.post('/backfill-scores', headers=headers, json=backfill)), max(repeat // 10, 1))
+        results['leaderboard'] = timed(lambda run: check(client.get('/leaderboard', headers=headers, params={'limit': 25})), repeat)
+
+        # The week up to yesterday, which is closed and so can be served from the report cache
+        weekly = {'end_date': (date.today() - timedelta(days=1)).isoformat()}
+        def weekly_cold(run):
+            app.report_cache.clear()
+            check(client.get('/weekly-summary/', headers=headers, params=weekly))
+        results['weekly_summary'] = timed(weekly_cold, repeat)
+        results['weekly_summary_cached'] = timed(lambda run: check(client.get('/weekly-summary/', headers=headers, params=weekly)), repeat)
+
+        rng = random.Random(seed)
+        today = get_wordle_puzzle(date.today())
+        submissions = [{'score': f"Wordle {today:,} {rng.randint(2, 6)}/6*", 'uuid': player['player_uuid']} for player in players]
+        results['add_score'] = timed(lambda run: check(client.post('/add-score/', headers=headers, json=submissions[run])), len(submissions))
+
+        # Only the first run has anything to rate, later ones find the puzzle unchanged in the rating ledger
+        results['calculate_daily'] = timed(lambda run: wait(client.get('/calculate-daily/', headers=headers)), 1)
+        results['calculate_daily_unchanged'] = timed(lambda run: wait(client.get('/calculate-daily/', headers=headers)), repeat)
+    return results
+
+def print_results(results: dict, baseline: dict = None):
+    if baseline is None:
+        print(f"{'scenario':<30}{'median ms':>12}{'p95 ms':>12}")
+        for name, result in results['scenarios'].items():
+            print(f"{name:<30}{result['median_ms']:>12}{result['p95_ms']:>12}")
+        return
+
+    print(f"Compared with {baseline['meta'].get('commit')} ({baseline['meta']['backend']}, {baseline['meta']['players']} players, {baseline['meta']['puzzles']} puzzles)")
+    print(f"{'scenario':<30}{'baseline ms':>14}{'median ms':>12}{'change':>10}")
+    for name, result in results['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None or not before['median_ms']:
+            print(f"{name:<30}{'-':>14}{result['median_ms']:>12}{'-':>10}")
+            continue
+        change = (result['median_ms'] - before['median_ms']) / before['median_ms']
+        print(f"{name:<30}{before['median_ms']:>14}{result['median_ms']:>12}{change:>+10.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the rating functions and endpoints against a synthetic league')
+    parser.add_argument('--backend', choices=['memory', 'sqlite'], default='memory')
+    parser.add_argument('--players', type=int, default=40)
+    parser.add_argument('--puzzles', type=int, default=365)
+    parser.add_argument('--play-rate', type=float, default=0.8, help='Share of players submitting each puzzle')
+    parser.add_argument('--hard-mode-share', type=float, default=0.7, help='Share of players who play in hard mode')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='Write results as JSON to this file')
+    parser.add_argument('--compare', default=None, help='Results JSON from an earlier run to compare against')
+    args = parser.parse_args()
+
+    # The league ends yesterday, so today's puzzle is open for /add-score/ and the weekly summary has data
+    end_puzzle = get_wordle_puzzle(date.today()) - 1
+    start_puzzle = end_puzzle - args.puzzles + 1
+
+    workdir = tempfile.mkdtemp(prefix='wordle-benchmark-')
+    try:
+        password = secrets.token_hex(8)
+        config = build_config(args.backend, workdir, password, args.seed)
+        config_path = os.path.join(workdir, 'config.yml')
+        with open(config_path, 'w') as f:
+            yaml.safe_dump(config, f)
+        if not create_wordle_db(config):
+            raise SystemExit("DB Failed to Init Properly")
+
+        scenarios = {}
+        start = time.perf_counter()
+        players = load_league(config, args.players, args.puzzles, start_puzzle, play_rate=args.play_rate, hard_mode_share=args.hard_mode_share, seed=args.seed)
+        load_seconds = time.perf_counter() - start
+
+        # app.py reads its config and opens the backend at import
+        os.environ['CONFIG_FILE'] = config_path
+        app = importlib.import_module('app')
+        scenarios.update(bench_endpoints(app, players, start_puzzle, end_puzzle, password, args.repeat, args.seed))
+        scenarios.update(bench_ratings(config, start_puzzle, end_puzzle, max(args.repeat // 10, 1)))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'date': date.today().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': args.backend,
+            'players': args.players,
+            'puzzles': args.puzzles,
+            'play_rate': args.play_rate,
+            'hard_mode_share': args.hard_mode_share,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'load_seconds': round(load_seconds, 3),
+        },
+        'scenarios': scenarios,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+    print(f"{args.players} players, {args.puzzles} puzzles on {args.backend} (loaded in {results['meta']['load_seconds']}s)")
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
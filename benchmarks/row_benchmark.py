@@ -0,0 +1,120 @@
+"""
+Competitive Ranked Wordle Row Fetch Benchmark
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Compares the three ways of reading a range of score rows: get_entries (a dict per row),
+get_entry_records (ScoreRow records) and get_entry_columns (NumPy arrays), on the same
+synthetic league. For each it reports fetch time and the memory the result holds on to:
+
+    python -m benchmarks.row_benchmark --backend sqlite --players 300 --puzzles 730
+"""
+
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from datetime import date
+
+from bin.storage import create_wordle_db, get_entries, get_entry_records, get_entry_columns
+from bin.utilities import get_wordle_puzzle
+from benchmarks.synthetic import load_league
+from benchmarks.league_benchmark import timed, git_commit
+
+# What a replay reads from each row
+COLUMNS = ['id', 'player_id', 'puzzle', 'calculated_score']
+
+def measure_memory(fetch):
+    """
+    Bytes held by the result of fetch(), and the peak allocated while building it
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = fetch()
+        held, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {'held_bytes': held - before, 'peak_bytes': peak - before}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dict, record and column fetches of score rows')
+    parser.add_argument('--backend', choices=['memory', 'sqlite'], default='sqlite')
+    parser.add_argument('--players', type=int, default=300)
+    parser.add_argument('--puzzles', type=int, default=730)
+    parser.add_argument('--play-rate', type=float, default=0.8, help='Share of players submitting each puzzle')
+    parser.add_argument('--hard-mode-share', type=float, default=0.7, help='Share of players who play in hard mode')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    end_puzzle = get_wordle_puzzle(date.today()) - 1
+    start_puzzle = end_puzzle - args.puzzles + 1
+
+    workdir = tempfile.mkdtemp(prefix='wordle-row-benchmark-')
+    try:
+        config = {
+            'storage': {'backend': args.backend},
+            'memory': {'name': f"row-benchmark-{args.seed}"},
+            'sqlite': {'path': os.path.join(workdir, 'benchmark.db')},
+        }
+        if not create_wordle_db(config):
+            raise SystemExit("DB Failed to Init Properly")
+        load_league(config, args.players, args.puzzles, start_puzzle, play_rate=args.play_rate, hard_mode_share=args.hard_mode_share, seed=args.seed)
+
+        fetches = {
+            'get_entries': lambda: get_entries(config, start=start_puzzle, end=end_puzzle),
+            'get_entry_records': lambda: get_entry_records(config, start=start_puzzle, end=end_puzzle),
+            'get_entry_columns': lambda: get_entry_columns(config, COLUMNS, start=start_puzzle, end=end_puzzle),
+        }
+        rows = len(fetches['get_entry_records']())
+        scenarios = {}
+        for name, fetch in fetches.items():
+            scenarios[name] = dict(timed(lambda run: fetch(), args.repeat), **measure_memory(fetch))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'date': date.today().isoformat(),
+            'backend': args.backend,
+            'players': args.players,
+            'puzzles': args.puzzles,
+            'rows': rows,
+            'columns': COLUMNS,
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'scenarios': scenarios,
+    }
+
+    print(f"{rows} score rows from {args.players} players over {args.puzzles} puzzles on {args.backend}")
+    print(f"{'fetch':<22}{'median ms':>12}{'held MiB':>12}{'peak MiB':>12}")
+    for name, result in scenarios.items():
+        print(f"{name:<22}{result['median_ms']:>12}{result['held_bytes'] / 2 ** 20:>12.2f}{result['peak_bytes'] / 2 ** 20:>12.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
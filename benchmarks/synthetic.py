@@ -0,0 +1,97 @@
+"""
+Competitive Ranked Wordle Synthetic League Generator
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import random
+
+# Rough share of games solved in 1 - 6 guesses, then failed (X)
+GUESS_WEIGHTS = [0.005, 0.06, 0.23, 0.34, 0.23, 0.10, 0.035]
+
+def generate_players(count: int, seed: int = 0):
+    """
+    Player rows in the shape register_player expects, with the starting ratings from /register
+    """
+    rng = random.Random(seed)
+    players = []
+    for i in range(count):
+        players.append({
+            'player_name': f"Player {i}",
+            'player_platform': rng.choice(['teams', 'discord', 'whatsapp']),
+            'player_uuid': f"synthetic-{seed}-{i}",
+            'player_elo': 400,
+            'player_mu': 25.0,
+            'player_sigma': 25.0 / 3,
+            'player_ord': 0.0,
+            'elo_delta': 0,
+            'ord_delta': 0,
+            'mu_delta': 0,
+            'sigma_delta': 0,
+        })
+    return players
+
+def generate_scores(player_ids: list, start_puzzle: int, puzzles: int, play_rate: float = 0.8, hard_mode_share: float = 0.7, seed: int = 0):
+    """
+    Yield unrated score rows in the shape add_entry expects, puzzle by puzzle
+    Each player gets a fixed skill offset so some players consistently do better than others
+    """
+    rng = random.Random(seed)
+    skill = {player_id: rng.gauss(0, 0.6) for player_id in player_ids}
+    hard_mode = {player_id: rng.random() < hard_mode_share for player_id in player_ids}
+
+    for puzzle in range(start_puzzle, start_puzzle + puzzles):
+        for player_id in player_ids:
+            if rng.random() > play_rate:
+                continue
+            guess = rng.choices(range(1, 8), weights=GUESS_WEIGHTS)[0]
+            score = min(7, max(1, round(guess - skill[player_id])))
+            # Most players stick to one mode, but not every day
+            hard = hard_mode[player_id] if rng.random() < 0.95 else not hard_mode[player_id]
+            raw = f"Wordle {puzzle:,} {'X' if score == 7 else score}/6{'*' if hard else ''}"
+            yield {
+                'player_id': player_id,
+                'puzzle': puzzle,
+                'raw_score': raw,
+                'score': score,
+                'calculated_score': 7 - score,
+                'hard_mode': 1 if hard else 0,
+            }
+
+def load_league(config: dict, players: int, puzzles: int, start_puzzle: int, play_rate: float = 0.8, hard_mode_share: float = 0.7, seed: int = 0, batch_size: int = 5000):
+    """
+    Register the players and add their scores through the storage interface, so any backend can be seeded
+    Returns the registered player rows
+    """
+    from bin.storage import register_player, lookup_players, add_entries
+
+    player_rows = generate_players(players, seed=seed)
+    for player in player_rows:
+        register_player(config, player)
+    registered = lookup_players(config, [player['player_uuid'] for player in player_rows])
+    player_ids = [registered[player['player_uuid']]['player_id'] for player in player_rows]
+
+    batch = []
+    for row in generate_scores(player_ids, start_puzzle, puzzles, play_rate=play_rate, hard_mode_share=hard_mode_share, seed=seed):
+        if not row['hard_mode']:
+            # Non hard mode scores carry the player's ratings at the time, the starting ones are close enough here
+            row.update(elo=400, mu=25.0, sigma=25.0 / 3, ordinal=0.0, elo_delta=0, ordinal_delta=0)
+        batch.append(row)
+        if len(batch) >= batch_size:
+            add_entries(config, batch, closed=True)
+            batch = []
+    add_entries(config, batch, closed=True)
+    return list(registered.values())
@@ -0,0 +1,202 @@
+"""
+Competitive Ranked Wordle Chat Import
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Backfills scores from a group chat export. The export is read one line at a time and
+scores are written in fixed size batches, so memory use doesn't grow with the file.
+Duplicates are checked against the DB per batch, after the earlier batches are in.
+
+Plain text exports are expected to look like "<timestamp> - Sender: message" or
+"[timestamp] Sender: message"; lines without a sender belong to the previous message.
+JSON lines exports need a sender (player name) or uuid key and a text key per line.
+
+Imported hard mode scores are only queued for the next /calculate-daily/ re-rate when
+they fall inside the rating ledger, so a large import of old history doesn't quietly
+replay years of ratings. Older ones are counted as unrated, with unrated_from the
+earliest of them and last_puzzle the latest hard mode puzzle imported; rate them once
+the import is done by running /backfill-scores over unrated_from - last_puzzle.
+
+    python -m bin.chat_import --config config.yml chat.txt
+"""
+
+import re
+import json
+import time
+import logging
+import argparse
+from datetime import date
+
+from bin.storage import get_all_players, get_submitted, add_entries, get_ledger_start
+from bin.utilities import find_scores, build_score_entry, get_wordle_puzzle
+
+BATCH_SIZE = 500
+
+LINE_PATTERN = re.compile(
+    r'^(?:\[[^\]]*\]\s*|[^:]*?\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AaPp]\.?[Mm]\.?)?\s*-\s*)?'
+    r'(?P<sender>[^:\[\]]{1,64}):\s(?P<text>.*)$'
+)
+
+def read_text(lines):
+    """
+    (sender, text) for each line of a plain text export
+    """
+    sender = None
+    for line in lines:
+        match = LINE_PATTERN.match(line.strip())
+        if match:
+            sender = match.group('sender').strip()
+            yield sender, match.group('text')
+        elif sender is not None:
+            yield sender, line
+
+def read_jsonl(lines, sender_key: str = 'sender', text_key: str = 'text'):
+    """
+    (sender, text) for each line of a JSON lines export. A uuid key takes priority over the sender name
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = None
+        if not isinstance(record, dict):
+            logging.warning(f"Skipping unreadable chat import line: {line[:80]}")
+            continue
+        sender = record.get('uuid') or record.get(sender_key)
+        text = record.get(text_key)
+        if sender is not None and isinstance(text, str):
+            yield str(sender), text
+
+def count_lines(lines, stats: dict):
+    for line in lines:
+        stats['lines'] += 1
+        yield line
+
+def _flush(config: dict, batch: list, stats: dict, current_puzzle: int, dirty_from: int):
+    submitted = get_submitted(config, [entry['player_id'] for entry in batch], [entry['puzzle'] for entry in batch])
+    entries = []
+    for entry in batch:
+        key = (entry['player_id'], entry['puzzle'])
+        if key in submitted:
+            stats['duplicates'] += 1
+            continue
+        submitted.add(key)
+        entries.append(entry)
+    closed = any(entry['puzzle'] < current_puzzle for entry in entries)
+    unrated = [entry['puzzle'] for entry in entries if entry['hard_mode'] == 1 and entry['puzzle'] < dirty_from]
+    if unrated:
+        stats['unrated'] += len(unrated)
+        stats['unrated_from'] = min(unrated) if stats['unrated_from'] is None else min(stats['unrated_from'], min(unrated))
+    hard_mode = [entry['puzzle'] for entry in entries if entry['hard_mode'] == 1]
+    if hard_mode:
+        stats['last_puzzle'] = max(hard_mode) if stats['last_puzzle'] is None else max(stats['last_puzzle'], max(hard_mode))
+    stats['added'] += add_entries(config, entries, closed=closed, dirty_from=dirty_from)
+
+def import_chat(config: dict, lines, fmt: str = 'text', senders: dict = None, batch_size: int = BATCH_SIZE):
+    """
+    Import every score found in an iterable of chat export lines
+        fmt         str     'text' or 'jsonl'
+        senders     dict    Optional chat sender -> player uuid mapping, for names that don't match a player
+    Returns counts of lines, scores found, scores added, duplicates and unknown senders,
+    along with the throughput in lines per second
+    Hard mode scores from before the rating ledger aren't queued for re-rating, they are counted as
+    unrated, with unrated_from the earliest of their puzzles and last_puzzle the latest hard mode puzzle added
+    """
+    stats = {
+        'lines': 0,
+        'found': 0,
+        'added': 0,
+        'duplicates': 0,
+        'unknown_senders': 0,
+        'unrated': 0,
+        'unrated_from': None,
+        'last_puzzle': None,
+    }
+    players = {}
+    for player in get_all_players(config):
+        players[player['player_name'].lower()] = player
+        players[player['player_uuid']] = player
+    for sender, player_uuid in (senders or {}).items():
+        if player_uuid in players:
+            players[sender.lower()] = players[player_uuid]
+
+    current_puzzle = get_wordle_puzzle(date.today())
+    # With an empty ledger nothing has been rated incrementally yet, so only today's scores are queued
+    dirty_from = get_ledger_start(config)
+    if dirty_from is None:
+        dirty_from = current_puzzle
+    lines = count_lines(lines, stats)
+    if fmt == 'jsonl':
+        messages = read_jsonl(lines)
+    else:
+        messages = read_text(lines)
+
+    start = time.perf_counter()
+    batch = []
+    unknown = set()
+    for sender, text in messages:
+        for data in find_scores(text):
+            stats['found'] += 1
+            player = players.get(sender) or players.get(sender.lower())
+            if player is None:
+                stats['unknown_senders'] += 1
+                if len(unknown) < 100:
+                    unknown.add(sender)
+                continue
+            batch.append(build_score_entry(data, data.pop('raw_score'), player))
+            if len(batch) >= batch_size:
+                _flush(config, batch, stats, current_puzzle, dirty_from)
+                batch = []
+    if batch:
+        _flush(config, batch, stats, current_puzzle, dirty_from)
+
+    elapsed = time.perf_counter() - start
+    stats['seconds'] = round(elapsed, 3)
+    stats['lines_per_second'] = round(stats['lines'] / elapsed, 1) if elapsed > 0 else None
+    stats['unknown_sender_names'] = sorted(unknown)
+    return stats
+
+def main():
+    import yaml
+    from bin.storage import create_wordle_db
+
+    parser = argparse.ArgumentParser(description='Import Wordle scores from a group chat export')
+    parser.add_argument('export', help='Chat export file')
+    parser.add_argument('--config', default='config.yml')
+    parser.add_argument('--format', choices=['text', 'jsonl'], default=None, help='Defaults to jsonl for .jsonl files, text otherwise')
+    parser.add_argument('--senders', default=None, help='YAML/JSON file mapping chat sender names to player uuids')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    if not create_wordle_db(config):
+        raise SystemExit("DB Failed to Init Properly")
+    senders = None
+    if args.senders:
+        with open(args.senders, 'r') as f:
+            senders = yaml.safe_load(f)
+    fmt = args.format or ('jsonl' if args.export.endswith('.jsonl') else 'text')
+
+    with open(args.export, 'r', encoding='utf-8', errors='replace') as f:
+        stats = import_chat(config, f, fmt=fmt, senders=senders, batch_size=args.batch_size)
+    print(json.dumps(stats, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Competitive Ranked Wordle Database Connection Pool
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+
+from bin import metrics
+
+class PoolTimeout(Exception):
+    pass
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB connections
+        connect     callable    Opens a new connection
+        size        int         Maximum number of open connections
+        timeout     float       Seconds to wait for a free connection before raising PoolTimeout
+        pre_ping    bool        Ping idle connections before handing them out, replacing dead ones
+        recycle     float       Replace connections older than this many seconds (0 disables)
+    """
+    def __init__(self, connect, size: int = 5, timeout: float = 30, pre_ping: bool = True, recycle: float = 3600):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self.recycle = recycle
+
+        self._idle = deque()
+        self._created = {}
+        self._open = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'connects': 0,
+            'recycled': 0,
+            'ping_failures': 0,
+        }
+
+    def _new_connection(self):
+        conn = self.connect()
+        metrics.count('wordle_db_connects_total')
+        with self._cond:
+            self._created[id(conn)] = time.monotonic()
+            self._stats['connects'] += 1
+        return conn
+
+    def _close(self, conn):
+        with self._cond:
+            self._created.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception as e:
+            logging.debug(f"Error closing pooled connection: {e}")
+
+    def _check(self, conn):
+        """
+        Apply the recycle and pre-ping policies to an idle connection, returning a usable one
+        """
+        created = self._created.get(id(conn), 0)
+        if self.recycle and time.monotonic() - created > self.recycle:
+            self._close(conn)
+            with self._cond:
+                self._stats['recycled'] += 1
+            return self._new_connection()
+        if self.pre_ping:
+            try:
+                conn.ping()
+            except Exception:
+                self._close(conn)
+                with self._cond:
+                    self._stats['ping_failures'] += 1
+                return self._new_connection()
+        return conn
+
+    def acquire(self):
+        with self._cond:
+            waited = False
+            start = time.monotonic()
+            while not self._idle and self._open >= self.size:
+                if not waited:
+                    waited = True
+                    self._stats['waits'] += 1
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if not self._idle and self._open >= self.size:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(f"No DB connection available after {self.timeout}s")
+            if waited:
+                self._stats['wait_time'] += time.monotonic() - start
+
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                self._open += 1
+            self._in_use += 1
+            self._stats['checkouts'] += 1
+
+        try:
+            if conn is None:
+                return self._new_connection()
+            return self._check(conn)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, discard: bool = False):
+        if discard:
+            self._close(conn)
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._open -= 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for conn in idle:
+            self._close(conn)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self.size,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+            })
+        return stats
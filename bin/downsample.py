@@ -0,0 +1,80 @@
+"""
+Competitive Ranked Wordle Series Downsampling
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Shrinks long rating histories for charts. Both methods pick which points to keep
+and return their indexes, so every series of a history (elo, mu, sigma, ordinal)
+can be cut down the same way.
+
+    lttb    Largest-Triangle-Three-Buckets, keeps the points that best preserve the
+            visual shape of one series
+    weekly  The last point of each week, since a rating is a running state
+"""
+
+from datetime import timedelta
+
+import numpy as np
+
+from bin.utilities import get_puzzle_date
+
+def lttb(x, y, points: int):
+    """
+    Indexes of the points LTTB keeps to draw y against x with the given number of points
+    The first and last points are always kept, so points must be at least 3
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if points >= n:
+        return list(range(n))
+
+    # Everything between the end points is split into points - 2 buckets
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    keep = [0]
+    previous = 0
+    for i in range(points - 2):
+        start, stop = edges[i], edges[i + 1]
+        # The next bucket's average is the third corner of the triangle
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_start = stop if i + 2 < len(edges) else n - 1
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        keep.append(previous)
+    keep.append(n - 1)
+    return keep
+
+def weekly(puzzles):
+    """
+    Indexes of the last point in each calendar week (Monday to Sunday), for points in puzzle order
+    """
+    keep = []
+    last_week = None
+    for i, puzzle in enumerate(puzzles):
+        day = get_puzzle_date(int(puzzle))
+        week = day - timedelta(days=day.weekday())
+        if week == last_week:
+            keep[-1] = i
+        else:
+            keep.append(i)
+            last_week = week
+    return keep
@@ -0,0 +1,135 @@
+"""
+Competitive Ranked Wordle Vectorized ELO Engine
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Every player is matched 1-1 against every other player on a puzzle, exactly as
+utilities.calculate_elo does pair by pair. Results only depend on which
+calculated_score bucket (0 - 6) each player falls in, so wins and draws are
+counted per bucket, and only the expected scores need the full rating matrix.
+That matrix is built in row blocks to keep memory bounded for large leagues.
+"""
+
+import numpy as np
+
+K_FACTOR = 32
+RATING_SCALE = 400.0
+SCORE_BUCKETS = 7
+BLOCK_SIZE = 1024
+
+def expected_scores(ratings, opp_ratings):
+    """
+    Matrix of win probabilities for each rating against each opponent rating
+    """
+    diff = (opp_ratings[None, :] - ratings[:, None]) / RATING_SCALE
+    return 1.0 / (1.0 + np.power(10.0, diff))
+
+def match_results(scores, opp_scores):
+    """
+    Matrix of match results (1 win, 0.5 draw, 0 loss) for each score against each opponent score
+    """
+    return (np.sign(scores[:, None] - opp_scores[None, :]) + 1) / 2.0
+
+def match_elo_deltas(scores, ratings):
+    """
+    Total ELO change for each player after being matched against every other player
+        scores      array   calculated_score per player
+        ratings     array   ELO rating per player before the puzzle
+    Returns an array of deltas in the same order
+    """
+    scores = np.asarray(scores, dtype=np.int64)
+    ratings = np.asarray(ratings, dtype=np.float64)
+    n = len(scores)
+    if n < 2:
+        return np.zeros(n)
+
+    # Wins count a full point, draws half a point, the self-draw is removed below
+    counts = np.bincount(scores, minlength=SCORE_BUCKETS)
+    below = np.cumsum(counts) - counts
+    points = below[scores] + 0.5 * (counts[scores] - 1)
+
+    # Expected score against everyone, minus the 0.5 expected against yourself
+    expected = np.empty(n)
+    for start in range(0, n, BLOCK_SIZE):
+        block = ratings[start:start + BLOCK_SIZE]
+        expected[start:start + BLOCK_SIZE] = expected_scores(block, ratings).sum(axis=1)
+    expected -= 0.5
+
+    return K_FACTOR * (points - expected)
+
+def match_elo_matrix(scores, ratings):
+    """
+    Full matrix of ELO changes, row player against column opponent, for small puzzles
+    """
+    scores = np.asarray(scores, dtype=np.int64)
+    ratings = np.asarray(ratings, dtype=np.float64)
+
+    changes = K_FACTOR * (match_results(scores, scores) - expected_scores(ratings, ratings))
+    np.fill_diagonal(changes, 0)
+    return changes
+
+def head_to_head(puzzle_index, player_index, scores, ratings, n_puzzles: int, n_players: int):
+    """
+    Head-to-head totals between every pair of players over many puzzles
+        puzzle_index    array   Position (0 - n_puzzles) of each score's puzzle
+        player_index    array   Position (0 - n_players) of each score's player
+        scores          array   calculated_score of each score
+        ratings         array   Player's ELO going into each puzzle
+    Returns (matches, wins, draws, losses, elo_exchange) n_players x n_players matrices, row player
+    against column opponent, where elo_exchange is the ELO the row player took from the column player
+    """
+    scores = np.asarray(scores, dtype=np.int64)
+    ratings = np.asarray(ratings, dtype=np.float64)
+
+    # Dense puzzle x player grids, with nothing played marked as score -1
+    grid = np.full((n_puzzles, n_players), -1, dtype=np.int64)
+    grid[puzzle_index, player_index] = scores
+    played = (grid >= 0).astype(np.float64)
+
+    # Pair counts are sums over puzzles of outer products, so they are matrix products per score bucket
+    matches = played.T @ played
+    wins = np.zeros((n_players, n_players))
+    draws = np.zeros((n_players, n_players))
+    below = np.zeros((n_puzzles, n_players))
+    for bucket in range(SCORE_BUCKETS):
+        at = (grid == bucket).astype(np.float64)
+        wins += at.T @ below
+        draws += at.T @ at
+        below += at
+    np.fill_diagonal(matches, 0)
+    np.fill_diagonal(draws, 0)
+    losses = wins.T
+
+    # Expected scores need the ratings of both players on each puzzle. With q = 10^(rating / 400),
+    # expected_scores is q_i / (q_i + q_j); absent players get q 0 as the row and q inf as the column
+    # so every pair they are in adds nothing. Ratings are centred per puzzle to keep q in range
+    level = np.zeros((n_puzzles, n_players))
+    level[puzzle_index, player_index] = ratings
+    counts = np.maximum(played.sum(axis=1, keepdims=True), 1)
+    level -= (level * played).sum(axis=1, keepdims=True) / counts
+    q = np.power(10.0, level / RATING_SCALE)
+    q_row = np.where(played > 0, q, 0.0)
+    q_col = np.where(played > 0, q, np.inf)
+
+    expected = np.zeros((n_players, n_players))
+    block = max(BLOCK_SIZE * BLOCK_SIZE // max(n_players * n_players, 1), 1)
+    for start in range(0, n_puzzles, block):
+        rows = q_row[start:start + block, :, None]
+        expected += (rows / (rows + q_col[start:start + block, None, :])).sum(axis=0)
+    np.fill_diagonal(expected, 0)
+
+    elo_exchange = K_FACTOR * (wins + 0.5 * draws - expected)
+    return matches, wins, draws, losses, elo_exchange
@@ -0,0 +1,70 @@
+"""
+Competitive Ranked Wordle Worker Pools
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+The DB driver is blocking, so async routes hand their DB calls to a bounded thread
+pool instead of running them on the event loop. Rating calculations get their own
+pool so a long backfill can't take every thread away from the read endpoints, and
+bcrypt gets a small one of its own so a burst of logins can't starve either.
+
+Replays (calculate-daily and backfill jobs) read and clear the rating watermark
+without taking a lock, so they rely on the calc pool running one at a time:
+workers.calc_threads must stay at 1 until they do.
+"""
+
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+_executors = {}
+
+def init_executors(config: dict):
+    """
+    Build the worker pools from the workers section of the config
+    """
+    workers = config.get('workers') or {}
+    pool_size = ((config.get('mariadb') or {}).get('pool') or {}).get('size', 5)
+    _executors['db'] = ThreadPoolExecutor(max_workers=workers.get('db_threads', pool_size), thread_name_prefix='wordle-db')
+    _executors['calc'] = ThreadPoolExecutor(max_workers=workers.get('calc_threads', 1), thread_name_prefix='wordle-calc')
+    _executors['auth'] = ThreadPoolExecutor(max_workers=workers.get('auth_threads', 2), thread_name_prefix='wordle-auth')
+
+def shutdown_executors():
+    for executor in _executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors.clear()
+
+def get_executor(kind: str):
+    return _executors[kind]
+
+async def _run(kind: str, func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # Carry the caller's context vars (the request's metrics scope) over to the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executors[kind], functools.partial(context.run, func, *args, **kwargs))
+
+async def run_db(func, *args, **kwargs):
+    """
+    Run a blocking DB handler call (or short report built from them) off the event loop
+    """
+    return await _run('db', func, *args, **kwargs)
+
+async def run_auth(func, *args, **kwargs):
+    """
+    Run password hashing/verification off the event loop
+    """
+    return await _run('auth', func, *args, **kwargs)
@@ -0,0 +1,135 @@
+"""
+Competitive Ranked Wordle Background Jobs
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Rating calculations run as jobs on the calc worker pool, so the request that starts
+one returns straight away with a job id to poll. A job submitted while an identical
+one (same kind and parameters) is still queued or running gets the existing job back.
+"""
+
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+
+from bin import metrics
+
+class Job:
+    def __init__(self, kind: str, params: dict, total: int):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = 'queued'
+        self.done = 0
+        self.total = total
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+
+    def progress(self, done: int, total: int = None):
+        """
+        Record puzzles processed so far, called from the worker thread
+        """
+        self.done = done
+        if total is not None:
+            self.total = total
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'job_status': self.status,
+            'done': self.done,
+            'total': self.total,
+            'result': self.result,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+class JobQueue:
+    """
+    Tracks jobs submitted to an executor
+        executor        Executor    Pool the jobs run on
+        keep_finished   int         Finished jobs kept around for /jobs lookups
+        record_metrics  bool        Record job counts and run times for /metrics
+    """
+    def __init__(self, executor, keep_finished: int = 100, record_metrics: bool = True):
+        self.executor = executor
+        self.keep_finished = keep_finished
+        self.record_metrics = record_metrics
+
+        self._jobs = OrderedDict()
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, params: dict, total: int, func, *args, **kwargs):
+        """
+        Queue func(job, *args, **kwargs) unless the same job is already queued or running
+        Returns (job, created)
+        """
+        key = (kind, tuple(sorted(params.items())))
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                return job, False
+            job = Job(kind, params, total)
+            self._jobs[job.id] = job
+            self._active[key] = job
+            # A job queued by a traced request is traced too, under its own id
+            trace = metrics.current_trace()
+            if trace is not None:
+                trace.jobs.append(job.id)
+            job.future = self.executor.submit(self._run, key, job, func, trace is not None, *args, **kwargs)
+        return job, True
+
+    def _run(self, key, job: Job, func, traced: bool, *args, **kwargs):
+        job.status = 'running'
+        job.started = time.time()
+        try:
+            with metrics.track(f"job:{job.kind}", histogram='wordle_job_duration_seconds', trace_id=job.id if traced else None, record=self.record_metrics):
+                job.result = func(job, *args, **kwargs)
+            job.status = 'done'
+        except Exception as e:
+            logging.exception(f"Job {job.id} ({job.kind}) failed")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                self._active.pop(key, None)
+                self._prune()
+        return job.result
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished is not None]
+        for job_id in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
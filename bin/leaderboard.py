@@ -0,0 +1,106 @@
+"""
+Competitive Ranked Wordle Leaderboard
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Players are kept in sorted lists (one per sort order) that are updated in place when
+ratings change, so serving a page is O(log n + k) and doesn't need the DB.
+"""
+
+import math
+import threading
+from sortedcontainers import SortedList
+
+SORT_COLUMNS = {
+    'ordinal': 'player_ord',
+    'elo': 'player_elo',
+}
+
+def _sort_key(player: dict, col: str):
+    # Highest rating first, unrated players last, ties in player_id order
+    value = player.get(col)
+    return (-value if value is not None else math.inf, player['player_id'])
+
+class Leaderboard:
+    def __init__(self):
+        self._players = {}
+        self._ranks = {sort: SortedList() for sort in SORT_COLUMNS}
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.loaded = False
+
+    def load_token(self):
+        """
+        Taken before reading players from the DB, so load can tell if a write raced the read
+        """
+        with self._lock:
+            return self._writes
+
+    def load(self, players: list, token: int):
+        with self._lock:
+            self._players = {player['player_id']: dict(player) for player in players}
+            for sort, col in SORT_COLUMNS.items():
+                self._ranks[sort] = SortedList(_sort_key(player, col) for player in self._players.values())
+            # Players written while we were reading may be stale, so rebuild again next time
+            self.loaded = token == self._writes
+
+    def invalidate(self):
+        with self._lock:
+            self._writes += 1
+            self.loaded = False
+
+    def add(self, player: dict):
+        with self._lock:
+            self._writes += 1
+            if not self.loaded:
+                return
+            if player['player_id'] in self._players:
+                self._remove(player['player_id'])
+            self._players[player['player_id']] = dict(player)
+            for sort, col in SORT_COLUMNS.items():
+                self._ranks[sort].add(_sort_key(player, col))
+
+    def _remove(self, player_id: int):
+        player = self._players.pop(player_id)
+        for sort, col in SORT_COLUMNS.items():
+            self._ranks[sort].remove(_sort_key(player, col))
+
+    def update(self, player_id: int, data: dict):
+        """
+        Apply a player update, re-ranking them if a rating changed
+        """
+        with self._lock:
+            self._writes += 1
+            if not self.loaded:
+                return
+            player = self._players.get(player_id)
+            if player is None:
+                # Someone we haven't seen, rebuild on the next read
+                self.loaded = False
+                return
+            for sort, col in SORT_COLUMNS.items():
+                if col in data:
+                    self._ranks[sort].remove(_sort_key(player, col))
+                    self._ranks[sort].add(_sort_key(dict(player, **data), col))
+            player.update(data)
+
+    def page(self, sort: str = 'ordinal', limit: int = None, offset: int = 0):
+        """
+        Players ranked by the given sort, starting at offset
+        """
+        with self._lock:
+            stop = None if limit is None else offset + limit
+            return [dict(self._players[player_id]) for _, player_id in self._ranks[sort].islice(offset, stop)]
@@ -15,10 +15,20 @@ GNU General Public License for more details.
 
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
-"""
 
+Connection pooling and schema migrations for the MariaDB backend. The queries
+themselves are shared with SQLite and live in bin/sql_storage.py.
+"""
 
 import mariadb
+import threading
+from contextlib import contextmanager
+
+from bin.db_pool import ConnectionPool
+from bin.migrations import MARIADB_MIGRATIONS, migrate
+
+_pools = {}
+_pools_lock = threading.Lock()
 
 def connect_db(config):
     conn = mariadb.connect(
@@ -28,268 +38,72 @@ def connect_db(config):
             port=config['mariadb']['port'],
             database=config['mariadb']['database'],
         )
-    cur = conn.cursor()
-    return conn, cur
+    return conn
+
+def db_key(config: dict):
+    db_config = config['mariadb']
+    return (db_config['host'], db_config['port'], db_config['database'], db_config['user'])
+
+def get_pool(config: dict):
+    """
+    Get (or lazily build) the connection pool for the configured MariaDB server
+    """
+    db_config = config['mariadb']
+    key = db_key(config)
+    with _pools_lock:
+        if key not in _pools:
+            pool_config = db_config.get('pool') or {}
+            _pools[key] = ConnectionPool(
+                lambda: connect_db(config),
+                size=pool_config.get('size', 5),
+                timeout=pool_config.get('timeout', 30),
+                pre_ping=pool_config.get('pre_ping', True),
+                recycle=pool_config.get('recycle', 3600),
+            )
+        return _pools[key]
+
+def get_pool_stats(config: dict):
+    return get_pool(config).stats()
+
+@contextmanager
+def db_cursor(config: dict):
+    """
+    Borrow a pooled connection, yielding (conn, cur)
+    Any open transaction is rolled back when the connection goes back to the pool,
+    so callers must commit their own writes
+    """
+    pool = get_pool(config)
+    conn = pool.acquire()
+    discard = False
+    try:
+        cur = conn.cursor()
+        try:
+            yield conn, cur
+        finally:
+            cur.close()
+    finally:
+        try:
+            conn.rollback()
+        except mariadb.Error:
+            # Connection is unusable, drop it rather than handing it out again
+            discard = True
+        pool.release(conn, discard=discard)
 
 def create_wordle_db(config):
+    """
+    Create the tables, or upgrade an existing database to the latest schema
+    """
     try:
-        conn, cur = connect_db(config)
-        cur.execute("CREATE TABLE IF NOT EXISTS `players` (`player_name` text NOT NULL, `player_mu` float NOT NULL, `player_sigma` float NOT NULL, `player_ord` float DEFAULT NULL, `elo_delta` double DEFAULT NULL, `ord_delta` double DEFAULT NULL, `mu_delta` double DEFAULT NULL, `sigma_delta` double DEFAULT NULL, `player_id` int(11) NOT NULL AUTO_INCREMENT, `player_platform` text NOT NULL, `player_uuid` text NOT NULL, `player_elo` float NOT NULL DEFAULT 400, PRIMARY KEY (`player_id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_uca1400_ai_ci;")
-        cur.execute("CREATE TABLE IF NOT EXISTS `scores` (`id` int(11) NOT NULL AUTO_INCREMENT, `player_id` int(11) DEFAULT NULL, `puzzle` int(11) DEFAULT NULL, `raw_score` text DEFAULT NULL, `score` int(11) DEFAULT NULL, `calculated_score` int(11) DEFAULT NULL, `hard_mode` int(11) DEFAULT NULL, `elo` double DEFAULT NULL, `mu` double DEFAULT NULL, `sigma` double DEFAULT NULL, `ordinal` double DEFAULT NULL, `elo_delta` double DEFAULT NULL, `ordinal_delta` double DEFAULT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_uca1400_ai_ci;")
-        conn.commit()
-        conn.close()
+        with db_cursor(config) as (conn, cur):
+            # Serialize migrations when several workers start at once
+            cur.execute("SELECT GET_LOCK('wordle_migrations', 60)")
+            cur.fetchone()
+            try:
+                migrate(conn, cur, MARIADB_MIGRATIONS)
+            finally:
+                cur.execute("SELECT RELEASE_LOCK('wordle_migrations')")
+                cur.fetchone()
         return True
     except Exception as e:
         print(e)
         return False
-
-def update_score_entry(config: dict, id: int, data: dict):
-    conn, cur = connect_db(config)
-
-    new_fields = ""
-    i = 1
-    for k, v in data.items():
-        if i == len(data):
-            if (isinstance(v, int) or isinstance(v, float)):
-                new_fields = f"{new_fields} {k} = {v}"
-            else:
-                new_fields = f"{new_fields} {k} = '{v}'"
-        else:
-            if (isinstance(v, int) or isinstance(v, float)):
-                new_fields = f"{new_fields} {k} = {v},"
-            else:
-                new_fields = f"{new_fields} {k} = '{v}',"
-        i += 1
-
-    query_string = f"UPDATE scores SET{new_fields} WHERE id = {id}"
-    cur.execute(query_string)
-
-    conn.commit()
-    conn.close()
-
-def update_player_entry(config: dict, player_id: int, data: dict):
-    conn, cur = connect_db(config)
-
-    new_fields = ""
-    i = 1
-    for k, v in data.items():
-        if i == len(data):
-            if (isinstance(v, int) or isinstance(v, float)):
-                new_fields = f"{new_fields} {k} = {v}"
-            else:
-                new_fields = f"{new_fields} {k} = '{v}'"
-        else:
-            if (isinstance(v, int) or isinstance(v, float)):
-                new_fields = f"{new_fields} {k} = {v},"
-            else:
-                new_fields = f"{new_fields} {k} = '{v}',"
-        i += 1
-
-    query_string = f"UPDATE players SET{new_fields} WHERE player_id = {player_id}"
-    cur.execute(query_string)
-
-    conn.commit()
-    conn.close()
-
-def add_entry(config: dict, data: dict):
-    conn, cur = connect_db(config)
-
-    cols = ""
-    vals = ""
-    i = 1
-    for k, v in data.items():
-        if i == len(data):
-            if (isinstance(v, int) or isinstance(v, float)):
-                cols = f"{cols} {k}"
-                vals = f"{vals} {v}"
-            else:
-                cols = f"{cols} {k}"
-                vals = f"{vals} '{v}'"
-        else:
-            if (isinstance(v, int) or isinstance(v, float)):
-                cols = f"{cols} {k},"
-                vals = f"{vals} {v},"
-            else:
-                cols = f"{cols} {k},"
-                vals = f"{vals} '{v}',"
-        i += 1
-
-    query_string = f"INSERT INTO scores ({cols}) VALUES ({vals})"
-    cur.execute(query_string)
-
-    conn.commit()
-    conn.close()
-
-def register_player(config: dict, player_data: dict):
-    conn, cur = connect_db(config)
-
-    cols = ""
-    vals = ""
-    i = 1
-    for k, v in player_data.items():
-        if i == len(player_data):
-            if (isinstance(v, int) or isinstance(v, float)):
-                cols = f"{cols} {k}"
-                vals = f"{vals} {v}"
-            else:
-                cols = f"{cols} {k}"
-                vals = f"{vals} '{v}'"
-        else:
-            if (isinstance(v, int) or isinstance(v, float)):
-                cols = f"{cols} {k},"
-                vals = f"{vals} {v},"
-            else:
-                cols = f"{cols} {k},"
-                vals = f"{vals} '{v}',"
-        i += 1
-
-    query_string = f"INSERT INTO players ({cols}) VALUES ({vals})"
-    cur.execute(query_string)
-
-    conn.commit()
-    conn.close()
-
-def get_entries(config: dict, query_params: str):
-    conn, cur = connect_db(config)
-    
-    cols = [
-        'id', 
-        'player_id', 
-        'puzzle', 
-        'raw_score', 
-        'score', 
-        'calculated_score', 
-        'hard_mode', 
-        'elo', 
-        'mu', 
-        'sigma', 
-        'ordinal', 
-        'elo_delta',
-        'ordinal_delta' 
-    ]
-
-    query_string = f"SELECT "
-    i = 1
-    for col in cols:
-        query_add = ""
-        if i == len(cols):
-            query_add = f"{col} "
-        else:
-            query_add = f"{col}, "
-        query_string = f"{query_string}{query_add}"
-        i += 1
-    query_string = f"{query_string}FROM scores {query_params}" 
-    
-    # if query_params['puzzle']:
-    #     query_string = f"{query_string} WHERE puzzle = '{query_params['puzzle']}'"
-    # elif query_params['start'] and query_params['end']:
-    #     query_string = f"{query_string} WHERE puzzle >= {query_params['start']} and puzzle <= {query_params['end']}"
-    cur.execute(query_string)
-    scores_raw = cur.fetchall()
-    
-    
-    score_data = []
-    for row in scores_raw:
-        i = 0
-        row_dict = {}
-        for cell in row:
-            row_dict[cols[i]] = cell
-            i += 1
-        score_data.append(row_dict)
-
-    conn.close()
-    return score_data
-
-def lookup_player(config: dict, player_uuid: str = False, player_id: int = False):
-    conn, cur = connect_db(config)
-
-    cols = [
-        'player_id', 
-        'player_uuid', 
-        'player_name', 
-        'player_platform', 
-        'player_mu', 
-        'player_sigma', 
-        'player_ord', 
-        'player_elo', 
-        'elo_delta', 
-        'ord_delta', 
-        'mu_delta', 
-        'sigma_delta' 
-    ]
-
-    query_string = f"SELECT "
-    i = 1
-    for col in cols:
-        query_add = ""
-        if i == len(cols):
-            query_add = f"{col} "
-        else:
-            query_add = f"{col}, "
-        query_string = f"{query_string}{query_add}"
-        i += 1
-
-    if player_uuid:
-        query_string = f"{query_string}FROM players WHERE player_uuid = '{player_uuid}'"
-    elif player_id:
-        query_string = f"{query_string}FROM players WHERE player_id = '{player_id}'"
-    cur.execute(query_string)
-    player_raw = cur.fetchall()
-    if player_raw == []:
-        return {}
-    else:
-        player_raw = player_raw[0]
-    
-    i = 0
-    player_data = {}
-    for cell in player_raw:
-        player_data[cols[i]] = cell
-        i += 1
-
-    conn.close()
-    return player_data
-
-def get_all_players(config: dict):
-    conn, cur = connect_db(config)
-
-    cols = [
-        'player_id', 
-        'player_uuid', 
-        'player_name', 
-        'player_platform', 
-        'player_mu', 
-        'player_sigma', 
-        'player_ord', 
-        'player_elo', 
-        'elo_delta', 
-        'ord_delta', 
-        'mu_delta', 
-        'sigma_delta' 
-    ]
-
-    query_string = f"SELECT "
-    i = 1
-    for col in cols:
-        query_add = ""
-        if i == len(cols):
-            query_add = f"{col} "
-        else:
-            query_add = f"{col}, "
-        query_string = f"{query_string}{query_add}"
-        i += 1
-
-    query_string = f"{query_string}FROM players"
-    cur.execute(query_string)
-    player_raw = cur.fetchall()
-
-    players = []
-    for player in player_raw:
-        player_data = {}
-        i = 0
-        for cell in player:
-            player_data[cols[i]] = cell
-            i += 1
-        players.append(player_data)
-
-    conn.close()
-    return players
\ No newline at end of file
@@ -0,0 +1,532 @@
+"""
+Competitive Ranked Wordle In-Memory Storage
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+The storage interface (see bin/storage.py) kept entirely in process, for CI,
+profiling and load tests that shouldn't need a database server. Nothing is written
+to disk, so everything is gone when the process exits.
+
+Scores are indexed by puzzle (with a sorted array of puzzle numbers for range
+lookups), by player_id and by (player_id, puzzle); players by player_id and uuid.
+Rows are copied on the way in and out, so callers can't change the store by
+mutating what they got back, the same as with a real database.
+"""
+
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from operator import itemgetter
+
+from bin.leaderboard import Leaderboard
+from bin.rows import SCORE_COLS, ScoreRow, score_values, score_columns
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+PLAYER_COLS = [
+    'player_id',
+    'player_uuid',
+    'player_name',
+    'player_platform',
+    'player_mu',
+    'player_sigma',
+    'player_ord',
+    'player_elo',
+    'elo_delta',
+    'ord_delta',
+    'mu_delta',
+    'sigma_delta'
+]
+
+JOINED_PLAYER_COLS = ['player_uuid', 'player_name', 'player_platform', 'player_mu', 'player_sigma', 'player_ord', 'player_elo']
+
+HISTORY_COLS = ['puzzle', 'elo', 'mu', 'sigma', 'ordinal']
+
+class MemoryStore:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.scores = {}
+        self.players = {}
+        self.puzzles = []
+        self.by_puzzle = {}
+        self.by_player = {}
+        self.by_player_puzzle = {}
+        self.uuids = {}
+        self.generations = {'players': 0, 'scores': 0}
+        self.ledger = {}
+        self.matchups = {}
+        self.matchup_players = {}
+        self.watermark = [None, 0]
+        self.leaderboard = Leaderboard()
+        self.leaderboard.load([], self.leaderboard.load_token())
+        self._next_score_id = 1
+        self._next_player_id = 1
+        # Same shapes as the SQLite connection and player cache stats, for /db-stats
+        self._held = 0
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+        }
+        self._cache_stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+    @contextmanager
+    def checkout(self):
+        """
+        Hold the store lock, counted like a checkout of the shared SQLite connection
+        """
+        if not self.lock.acquire(blocking=False):
+            start = time.monotonic()
+            self.lock.acquire()
+            self._stats['waits'] += 1
+            self._stats['wait_time'] += time.monotonic() - start
+        self._stats['checkouts'] += 1
+        self._held += 1
+        try:
+            yield
+        finally:
+            self._held -= 1
+            self.lock.release()
+
+    def add_score(self, data: dict):
+        unknown = set(data) - set(SCORE_COLS)
+        if unknown:
+            raise ValueError(f"Unknown score columns: {', '.join(sorted(unknown))}")
+        row = {col: data.get(col) for col in SCORE_COLS}
+        row['id'] = self._next_score_id
+        self._next_score_id += 1
+        self.scores[row['id']] = row
+
+        puzzle = row['puzzle']
+        if puzzle not in self.by_puzzle:
+            self.by_puzzle[puzzle] = []
+            bisect.insort(self.puzzles, puzzle)
+        self.by_puzzle[puzzle].append(row['id'])
+        self.by_player.setdefault(row['player_id'], []).append(row['id'])
+        self.by_player_puzzle.setdefault((row['player_id'], puzzle), []).append(row['id'])
+
+    def mark_dirty(self, puzzle: int):
+        if self.watermark[0] is None or self.watermark[0] > puzzle:
+            self.watermark[0] = puzzle
+        self.watermark[1] += 1
+
+    def score_ids(self, puzzle: int = None, start: int = None, end: int = None, player_id: int = None):
+        """
+        Candidate score ids from the narrowest index that applies, in (puzzle, id) order
+        """
+        if player_id is not None and puzzle is not None:
+            return list(self.by_player_puzzle.get((player_id, puzzle), []))
+        if puzzle is not None:
+            return list(self.by_puzzle.get(puzzle, []))
+        if player_id is not None:
+            return sorted(self.by_player.get(player_id, []), key=lambda id: (self.scores[id]['puzzle'], id))
+        low = 0 if start is None else bisect.bisect_left(self.puzzles, start)
+        high = len(self.puzzles) if end is None else bisect.bisect_right(self.puzzles, end)
+        return [id for puzzle in self.puzzles[low:high] for id in self.by_puzzle[puzzle]]
+
+def _store(config: dict):
+    """
+    Get (or lazily build) the store named by memory.name in the config
+    """
+    key = (config.get('memory') or {}).get('name', 'default')
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = MemoryStore()
+        return _stores[key]
+
+def reset(config: dict):
+    """
+    Throw away everything in the configured store
+    """
+    key = (config.get('memory') or {}).get('name', 'default')
+    with _stores_lock:
+        _stores.pop(key, None)
+
+def create_wordle_db(config: dict):
+    _store(config)
+    return True
+
+def get_pool_stats(config: dict):
+    store = _store(config)
+    stats = dict(store._stats)
+    stats['wait_time'] = round(stats['wait_time'], 6)
+    stats['size'] = 1
+    stats['in_use'] = 1 if store._held else 0
+    return stats
+
+def get_player_cache_stats(config: dict):
+    # Every player is always in memory, so lookups are hits unless the player isn't registered
+    store = _store(config)
+    stats = dict(store._cache_stats)
+    stats['size'] = len(store.players)
+    stats['max_size'] = None
+    return stats
+
+def get_cache_generations(config: dict):
+    store = _store(config)
+    with store.checkout():
+        return dict(store.generations)
+
+def get_dirty_watermark(config: dict):
+    store = _store(config)
+    with store.checkout():
+        return store.watermark[0], store.watermark[1]
+
+def get_rating_ledger(config: dict, start_puzzle: int):
+    store = _store(config)
+    with store.checkout():
+        rows = [store.ledger[puzzle] for puzzle in sorted(store.ledger) if puzzle >= start_puzzle]
+    ledger = []
+    for row in rows:
+        row = json.loads(row)
+        ledger.append({
+            'puzzle': row['puzzle'],
+            'inputs_hash': row['inputs_hash'],
+            'ratings_before': {int(player_id): data for player_id, data in row['ratings_before'].items()},
+            'ratings_after': {int(player_id): data for player_id, data in row['ratings_after'].items()},
+        })
+    return ledger
+
+def get_ledger_start(config: dict):
+    store = _store(config)
+    with store.checkout():
+        return min(store.ledger) if store.ledger else None
+
+def get_ratings_before(config: dict, puzzle: int):
+    store = _store(config)
+    ratings = {}
+    with store.checkout():
+        for id in store.score_ids(None, None, puzzle - 1, None):
+            row = store.scores[id]
+            if row['puzzle'] >= puzzle or row['hard_mode'] != 1 or row['elo'] is None or row['mu'] is None:
+                continue
+            ratings[row['player_id']] = {'player_mu': row['mu'], 'player_sigma': row['sigma'], 'player_ord': row['ordinal'], 'player_elo': row['elo']}
+    return ratings
+
+def update_score_entry(config: dict, id: int, data: dict):
+    store = _store(config)
+    with store.checkout():
+        if id in store.scores:
+            store.scores[id].update(data)
+        store.generations['scores'] += 1
+
+def update_player_entry(config: dict, player_id: int, data: dict):
+    store = _store(config)
+    with store.checkout():
+        player = store.players.get(player_id)
+        if player is None:
+            return
+        if 'player_uuid' in data:
+            store.uuids.pop(player['player_uuid'], None)
+            store.uuids[data['player_uuid']] = player_id
+        player.update(data)
+        store.generations['players'] += 1
+        store.leaderboard.update(player_id, data)
+
+def bulk_update_entries(config: dict, score_updates: list, player_updates: list, ledger: list = None, clear_ledger_after: int = None, watermark_version: int = None, matchups: dict = None):
+    """
+    Apply many score and player updates at once, see sql_storage.bulk_update_entries
+    """
+    store = _store(config)
+    with store.checkout():
+        for row in ledger or []:
+            store.ledger[row['puzzle']] = json.dumps(row)
+        if clear_ledger_after is not None:
+            for puzzle in [puzzle for puzzle in store.ledger if puzzle > clear_ledger_after]:
+                del store.ledger[puzzle]
+        if watermark_version is not None and store.watermark[1] == watermark_version:
+            store.watermark[0] = None
+        for puzzle, rows in (matchups or {}).items():
+            for player_id in store.matchup_players.pop(puzzle, set()):
+                store.matchups[player_id].pop(puzzle, None)
+            for row in rows:
+                store.matchups.setdefault(row[1], {}).setdefault(puzzle, {})[row[2]] = tuple(row)
+                store.matchup_players.setdefault(puzzle, set()).add(row[1])
+        for id, data in score_updates:
+            if id in store.scores:
+                store.scores[id].update(data)
+        for player_id, data in player_updates:
+            if player_id in store.players:
+                store.players[player_id].update(data)
+                store.leaderboard.update(player_id, data)
+        if score_updates:
+            store.generations['scores'] += 1
+        if player_updates:
+            store.generations['players'] += 1
+
+def add_entry(config: dict, data: dict):
+    store = _store(config)
+    with store.checkout():
+        store.add_score(data)
+        if data.get('hard_mode') == 1:
+            store.mark_dirty(data['puzzle'])
+
+def add_entries(config: dict, entries: list, closed: bool = False, dirty_from: int = None):
+    if not entries:
+        return 0
+    store = _store(config)
+    with store.checkout():
+        for entry in entries:
+            store.add_score(entry)
+        rated = [entry['puzzle'] for entry in entries if entry.get('hard_mode') == 1 and (dirty_from is None or entry['puzzle'] >= dirty_from)]
+        if rated:
+            store.mark_dirty(min(rated))
+        if closed:
+            store.generations['scores'] += 1
+    return len(entries)
+
+def register_player(config: dict, player_data: dict):
+    store = _store(config)
+    with store.checkout():
+        if player_data['player_uuid'] in store.uuids:
+            raise ValueError(f"{player_data['player_uuid']} is already registered")
+        player = {col: player_data.get(col) for col in PLAYER_COLS}
+        if player['player_elo'] is None:
+            player['player_elo'] = 400
+        player['player_id'] = store._next_player_id
+        store._next_player_id += 1
+        store.players[player['player_id']] = player
+        store.uuids[player['player_uuid']] = player['player_id']
+        store.generations['players'] += 1
+        store.leaderboard.add(player)
+
+def _filtered_ids(store: MemoryStore, puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    """
+    Ids of the score rows matching every filter given, in (puzzle, id) order
+    """
+    ids = []
+    for id in store.score_ids(puzzle, start, end, player_id):
+        row = store.scores[id]
+        if start is not None and row['puzzle'] < start:
+            continue
+        if end is not None and row['puzzle'] > end:
+            continue
+        if hard_mode is not None and row['hard_mode'] != hard_mode:
+            continue
+        ids.append(id)
+    return ids
+
+def get_entries(config: dict, puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    """
+    Score rows matching every filter given, in (puzzle, id) order
+    """
+    store = _store(config)
+    with store.checkout():
+        return [dict(store.scores[id]) for id in _filtered_ids(store, puzzle, start, end, player_id, hard_mode)]
+
+def get_entry_records(config: dict, puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    store = _store(config)
+    with store.checkout():
+        return [ScoreRow._make(score_values(store.scores[id])) for id in _filtered_ids(store, puzzle, start, end, player_id, hard_mode)]
+
+def get_entry_columns(config: dict, cols: list, puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    unknown = set(cols) - set(SCORE_COLS)
+    if unknown:
+        raise ValueError(f"Unknown score columns: {', '.join(sorted(unknown))}")
+    store = _store(config)
+    with store.checkout():
+        values = itemgetter(*cols)
+        rows = [values(store.scores[id]) for id in _filtered_ids(store, puzzle, start, end, player_id, hard_mode)]
+    if len(cols) == 1:
+        rows = [(value,) for value in rows]
+    return score_columns(cols, rows)
+
+def get_entries_with_players(config: dict, puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    store = _store(config)
+    with store.checkout():
+        rows = []
+        for row in get_entries(config, puzzle, start, end, player_id, hard_mode):
+            player = store.players.get(row['player_id'])
+            if player is None:
+                continue
+            rows.append(dict(row, **{col: player[col] for col in JOINED_PLAYER_COLS}))
+    return rows
+
+def _desc(value):
+    # ORDER BY value DESC, with NULLs last
+    return (value is None, -value if value is not None else 0)
+
+def get_daily_report_rows(config: dict, puzzle: int):
+    store = _store(config)
+    with store.checkout():
+        rows = []
+        for row in get_entries_with_players(config, puzzle=puzzle):
+            rows.append({
+                'player_id': row['player_id'],
+                'player_name': row['player_name'],
+                'elo': row['elo'],
+                'elo_delta': row['elo_delta'],
+                'ordinal': row['ordinal'],
+                'ordinal_delta': row['ordinal_delta'],
+            })
+    return sorted(rows, key=lambda row: (_desc(row['ordinal']), row['player_id']))
+
+def get_weekly_report_rows(config: dict, start: int, end: int):
+    store = _store(config)
+    by_player = {}
+    with store.checkout():
+        for row in get_entries_with_players(config, start=start, end=end):
+            by_player.setdefault(row['player_id'], []).append(row)
+
+    rows = []
+    for player_id, scores in by_player.items():
+        first = scores[0]
+        last = scores[-1]
+        played = [score['score'] for score in scores if score['score'] is not None]
+        rows.append({
+            'player_id': player_id,
+            'player_name': first['player_name'],
+            'start_elo': first['elo'],
+            'end_elo': last['elo'],
+            'start_ord': first['ordinal'],
+            'end_ord': last['ordinal'],
+            'average_score': sum(played) / len(played) if played else None,
+        })
+    return sorted(rows, key=lambda row: (_desc(row['end_ord']), row['player_id']))
+
+def get_matchups(config: dict, player_uuid: str, puzzle: int):
+    store = _store(config)
+    with store.checkout():
+        player = store.players.get(store.uuids.get(player_uuid))
+        if player is None:
+            return []
+        score = next((store.scores[id] for id in store.by_player_puzzle.get((player['player_id'], puzzle), []) if store.scores[id]['hard_mode'] == 1), None)
+        if score is None:
+            return []
+        base = {
+            'player_id': player['player_id'],
+            'player_name': player['player_name'],
+            'elo': score['elo'],
+            'elo_delta': score['elo_delta'],
+        }
+        rows = []
+        for _, _, opponent_id, result, elo_change in store.matchups.get(player['player_id'], {}).get(puzzle, {}).values():
+            opponent = store.players.get(opponent_id) or {}
+            rows.append(dict(base, opponent_id=opponent_id, opponent_name=opponent.get('player_name'), result=result, elo_change=elo_change))
+    if not rows:
+        return [dict(base, opponent_id=None, opponent_name=None, result=None, elo_change=None)]
+    return sorted(rows, key=lambda row: (-row['result'], row['opponent_name'] or ''))
+
+def get_matchup_totals(config: dict, player_uuid: str, start_puzzle: int, end_puzzle: int):
+    store = _store(config)
+    totals = {}
+    with store.checkout():
+        player_id = store.uuids.get(player_uuid)
+        for puzzle, rows in store.matchups.get(player_id, {}).items():
+            if puzzle < start_puzzle or puzzle > end_puzzle:
+                continue
+            for _, _, opponent_id, result, elo_change in rows.values():
+                opponent = store.players.get(opponent_id)
+                if opponent is None:
+                    continue
+                if opponent_id not in totals:
+                    totals[opponent_id] = {
+                        'opponent_id': opponent_id,
+                        'opponent_name': opponent['player_name'],
+                        'matches': 0,
+                        'wins': 0,
+                        'draws': 0,
+                        'losses': 0,
+                        'elo_change': 0.0,
+                    }
+                total = totals[opponent_id]
+                total['matches'] += 1
+                total['wins'] += result == 1
+                total['draws'] += result == 0.5
+                total['losses'] += result == 0
+                total['elo_change'] += elo_change
+    return sorted(totals.values(), key=lambda total: (total['elo_change'], total['opponent_id']))
+
+def get_rating_history(config: dict, player_id: int, start_puzzle: int = None, end_puzzle: int = None):
+    store = _store(config)
+    history = {col: [] for col in HISTORY_COLS}
+    with store.checkout():
+        for id in store.score_ids(None, start_puzzle, end_puzzle, player_id):
+            row = store.scores[id]
+            if row['hard_mode'] != 1 or row['elo'] is None:
+                continue
+            if start_puzzle is not None and row['puzzle'] < start_puzzle:
+                continue
+            if end_puzzle is not None and row['puzzle'] > end_puzzle:
+                continue
+            for col in HISTORY_COLS:
+                history[col].append(row[col])
+    return history
+
+def get_match_rows(config: dict, start_puzzle: int, end_puzzle: int, player_ids: list = None):
+    store = _store(config)
+    rows = []
+    wanted = set(player_ids) if player_ids is not None else None
+    with store.checkout():
+        for id in store.score_ids(None, start_puzzle, end_puzzle, None):
+            row = store.scores[id]
+            if row['hard_mode'] != 1 or row['elo'] is None:
+                continue
+            if wanted is not None and row['player_id'] not in wanted:
+                continue
+            # NULL in SQL arithmetic is NULL, which comes back as NaN
+            elo = row['elo'] - row['elo_delta'] if row['elo_delta'] is not None else None
+            rows.append((row['puzzle'], row['player_id'], row['calculated_score'], elo))
+    return score_columns(['puzzle', 'player_id', 'calculated_score', 'elo'], rows)
+
+def lookup_player(config: dict, player_uuid: str = False, player_id: int = False):
+    store = _store(config)
+    with store.checkout():
+        if player_uuid:
+            player_id = store.uuids.get(player_uuid)
+        player = store.players.get(player_id)
+        store._cache_stats['hits' if player is not None else 'misses'] += 1
+        return dict(player) if player is not None else {}
+
+def lookup_players(config: dict, player_uuids: list):
+    store = _store(config)
+    with store.checkout():
+        players = {}
+        for player_uuid in player_uuids:
+            player_id = store.uuids.get(player_uuid)
+            store._cache_stats['hits' if player_id is not None else 'misses'] += 1
+            if player_id is not None:
+                players[player_uuid] = dict(store.players[player_id])
+    return players
+
+def get_submitted(config: dict, player_ids: list, puzzles: list):
+    store = _store(config)
+    with store.checkout():
+        return set(
+            (player_id, puzzle)
+            for player_id in set(player_ids)
+            for puzzle in set(puzzles)
+            if (player_id, puzzle) in store.by_player_puzzle
+        )
+
+def get_all_players(config: dict):
+    store = _store(config)
+    with store.checkout():
+        return [dict(player) for player in store.players.values()]
+
+def get_leaderboard(config: dict, sort: str = 'ordinal', limit: int = None, offset: int = 0):
+    store = _store(config)
+    with store.checkout():
+        return store.leaderboard.page(sort, limit, offset)
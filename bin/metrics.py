@@ -0,0 +1,431 @@
+"""
+Competitive Ranked Wordle Metrics
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Per-route counters and latency histograms, served at /metrics in the Prometheus text
+format. Each request (or calculation job) gets a Scope held in a context variable,
+which the DB handler and rating functions add to without taking a lock; the scope is
+folded into the shared registry once, when the request finishes. Outside a request or
+job the hooks do nothing.
+
+A scope can also carry a Trace, for diagnosing a single slow call: every statement run
+with its duration and row count, and the time spent in rating code. A logged in client
+asks for one with an X-Wordle-Trace: 1 header (or diagnostics.trace_all traces every
+request) and gets a Server-Timing summary and an X-Wordle-Trace-Id back, with the full
+trace at /traces/{id}. Jobs queued by a traced request are traced under their job id.
+Untraced requests only pay for a "trace is None" check.
+"""
+
+import time
+import uuid
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+TRACE_HEADER = b'x-wordle-trace'
+MAX_TRACE_EVENTS = 2000
+MAX_SQL_LENGTH = 300
+
+# Timers that count as rating code in a trace
+RATING_TIMERS = {'wordle_openskill_rate', 'wordle_elo'}
+
+HELP = {
+    'wordle_request_duration_seconds': 'Request latency by route',
+    'wordle_job_duration_seconds': 'Calculation job run time by job kind',
+    'wordle_db_connections_total': 'DB connections checked out',
+    'wordle_db_connects_total': 'New DB connections opened',
+    'wordle_db_query_calls_total': 'DB statements executed',
+    'wordle_db_query_seconds_total': 'Time spent executing DB statements',
+    'wordle_db_commits_total': 'DB transactions committed',
+    'wordle_openskill_rate_calls_total': 'OpenSkill model.rate calls',
+    'wordle_openskill_rate_seconds_total': 'Time spent in OpenSkill model.rate',
+    'wordle_elo_calls_total': 'Pairwise ELO calculations',
+    'wordle_elo_seconds_total': 'Time spent in the pairwise ELO calculation',
+    'wordle_backfill_puzzles_total': 'Puzzles processed by backfill',
+    'wordle_rerate_puzzles_total': 'Puzzles processed by rerate, recalculated or reused from the rating ledger',
+}
+
+_current = contextvars.ContextVar('wordle_metrics_scope', default=None)
+
+class Scope:
+    """
+    Counts for one request or job, only ever touched by the work done for it
+    """
+    __slots__ = ('route', 'histogram', 'counts', 'trace')
+
+    def __init__(self, route: str, histogram: str, trace=None):
+        self.route = route
+        self.histogram = histogram
+        self.counts = {}
+        self.trace = trace
+
+    def add(self, name: str, value: float, labels: tuple = ()):
+        key = (name, labels)
+        self.counts[key] = self.counts.get(key, 0) + value
+
+class Registry:
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def merge(self, scope: Scope, seconds: float):
+        with self._lock:
+            for (name, labels), value in scope.counts.items():
+                key = (name, (('route', scope.route),) + labels)
+                self._counters[key] = self._counters.get(key, 0) + value
+
+            key = (scope.histogram, scope.route)
+            if key not in self._histograms:
+                self._histograms[key] = [0] * len(self.buckets) + [0, 0.0]
+            histogram = self._histograms[key]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += 1
+            histogram[-1] += seconds
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        """
+        Everything recorded so far in the Prometheus text exposition format
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(value) for key, value in self._histograms.items()}
+
+        lines = []
+        for name in sorted(set(name for name, _ in histograms)):
+            _header(lines, name, 'histogram')
+            for (metric, route), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                label = f'route="{_escape(route)}"'
+                for bound, bucket_count in zip(self.buckets, histogram):
+                    lines.append(f'{name}_bucket{{{label},le="{bound}"}} {bucket_count}')
+                lines.append(f'{name}_bucket{{{label},le="+Inf"}} {histogram[-2]}')
+                lines.append(f'{name}_sum{{{label}}} {histogram[-1]}')
+                lines.append(f'{name}_count{{{label}}} {histogram[-2]}')
+
+        for name in sorted(set(name for name, _ in counters)):
+            _header(lines, name, 'counter')
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    label = ','.join(f'{key}="{_escape(str(label_value))}"' for key, label_value in labels)
+                    lines.append(f'{name}{{{label}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+def _header(lines: list, name: str, kind: str):
+    if name in HELP:
+        lines.append(f'# HELP {name} {HELP[name]}')
+    lines.append(f'# TYPE {name} {kind}')
+
+def _escape(value: str):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Trace:
+    """
+    Everything one traced request or job did, in order
+        keep    bool    Store the trace when it finishes. Header traces are only kept once the caller has logged in
+    """
+    def __init__(self, trace_id: str, route: str, keep: bool = True):
+        self.id = trace_id
+        self.route = route
+        self.keep = keep
+        self.user = None
+        self.http_status = None
+        self.jobs = []
+        self.events = []
+        self.dropped = 0
+        self.created = time.time()
+        self._start = time.perf_counter()
+
+    @property
+    def kept(self):
+        return self.keep or self.user is not None
+
+    def _add(self, event: dict):
+        if len(self.events) < MAX_TRACE_EVENTS:
+            self.events.append(event)
+            return event
+        self.dropped += 1
+        return None
+
+    def query(self, statement: str, seconds: float, rows: int, many: bool = False):
+        event = {
+            'at_ms': round((time.perf_counter() - self._start - seconds) * 1000, 3),
+            'sql': ' '.join(str(statement).split())[:MAX_SQL_LENGTH],
+            'ms': round(seconds * 1000, 3),
+            'rows': rows if rows is not None and rows >= 0 else None,
+        }
+        if many:
+            event['many'] = True
+        return self._add(event)
+
+    def span(self, name: str, seconds: float):
+        self._add({
+            'at_ms': round((time.perf_counter() - self._start - seconds) * 1000, 3),
+            'span': name,
+            'ms': round(seconds * 1000, 3),
+        })
+
+    def summary(self):
+        queries = [event for event in self.events if 'sql' in event]
+        return {
+            'trace_id': self.id,
+            'route': self.route,
+            'http_status': self.http_status,
+            'created': self.created,
+            'total_ms': round((time.perf_counter() - self._start) * 1000, 3),
+            'queries': len(queries) + self.dropped,
+            'db_ms': round(sum(event['ms'] for event in queries), 3),
+            'rating_ms': round(sum(event['ms'] for event in self.events if event.get('span') in RATING_TIMERS), 3),
+            'jobs': list(self.jobs),
+        }
+
+    def server_timing(self):
+        summary = self.summary()
+        return f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries", rating;dur={summary["rating_ms"]}, total;dur={summary["total_ms"]}'
+
+    def to_dict(self):
+        output = self.summary()
+        output['user'] = self.user
+        output['dropped_events'] = self.dropped
+        output['events'] = self.events
+        return output
+
+class TraceStore:
+    """
+    The most recent finished traces, by id
+    """
+    def __init__(self, max_size: int = 100):
+        self.max_size = max_size
+        self._traces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, trace: Trace):
+        data = trace.to_dict()
+        with self._lock:
+            self._traces[trace.id] = data
+            self._traces.move_to_end(trace.id)
+            while len(self._traces) > self.max_size:
+                self._traces.popitem(last=False)
+
+    def get(self, trace_id: str):
+        with self._lock:
+            return self._traces.get(trace_id)
+
+    def list(self):
+        with self._lock:
+            return [{key: value for key, value in trace.items() if key != 'events'} for trace in reversed(self._traces.values())]
+
+registry = Registry()
+traces = TraceStore()
+
+@contextmanager
+def track(route: str = 'unmatched', histogram: str = 'wordle_request_duration_seconds', trace_id: str = None, record: bool = True):
+    """
+    Collect counts for the work done inside the block (including anything it hands to the worker pools),
+    recorded under route when it exits. The route can be changed through the yielded scope
+    With a trace_id the block is traced too, and the trace stored if it is kept
+    With record off the counts are dropped, for a block that is only traced
+    """
+    scope = Scope(route, histogram, Trace(trace_id, route) if trace_id else None)
+    token = _current.set(scope)
+    start = time.perf_counter()
+    try:
+        yield scope
+    finally:
+        _current.reset(token)
+        if record:
+            registry.merge(scope, time.perf_counter() - start)
+        if scope.trace is not None and scope.trace.kept:
+            scope.trace.route = scope.route
+            traces.put(scope.trace)
+
+def count(name: str, value: float = 1, **labels):
+    scope = _current.get()
+    if scope is not None:
+        scope.add(name, value, tuple(sorted(labels.items())))
+
+def current_trace():
+    scope = _current.get()
+    return scope.trace if scope is not None else None
+
+def set_user(username: str):
+    """
+    Note who made the request, so a trace they asked for by header is kept
+    """
+    scope = _current.get()
+    if scope is not None and scope.trace is not None:
+        scope.trace.user = username
+
+@contextmanager
+def timer(name: str, **labels):
+    """
+    Add the time spent in the block to <name>_seconds_total and one to <name>_calls_total
+    """
+    scope = _current.get()
+    if scope is None:
+        yield
+        return
+    labels = tuple(sorted(labels.items()))
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        scope.add(f"{name}_seconds_total", elapsed, labels)
+        scope.add(f"{name}_calls_total", 1, labels)
+        if scope.trace is not None:
+            scope.trace.span(name, elapsed)
+
+def _route_path(scope: dict):
+    # The router fills in the matched route on the way down
+    route = scope.get('route')
+    return route.path if route is not None else None
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing each HTTP request, labelled with the route template it matched
+        metrics_enabled bool    Record request counts and latency for /metrics
+        trace_header    bool    Trace requests sent with X-Wordle-Trace: 1 by a logged in user
+        trace_all       bool    Trace every request
+    """
+    def __init__(self, app, metrics_enabled: bool = True, trace_header: bool = False, trace_all: bool = False):
+        self.app = app
+        self.metrics_enabled = metrics_enabled
+        self.trace_header = trace_header
+        self.trace_all = trace_all
+
+    def _wants_trace(self, scope: dict):
+        if self.trace_all:
+            return True
+        if self.trace_header:
+            return any(name == TRACE_HEADER and value in (b'1', b'true') for name, value in scope['headers'])
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        trace_id = uuid.uuid4().hex if self._wants_trace(scope) else None
+        if trace_id is None and not self.metrics_enabled:
+            return await self.app(scope, receive, send)
+        with track(trace_id=trace_id, record=self.metrics_enabled) as metrics_scope:
+            trace = metrics_scope.trace
+            if trace is not None:
+                trace.keep = self.trace_all
+                send = self._traced_send(send, scope, trace)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                route = _route_path(scope)
+                if route is not None:
+                    metrics_scope.route = route
+
+    def _traced_send(self, send, scope: dict, trace: Trace):
+        async def traced_send(message):
+            if message['type'] == 'http.response.start':
+                trace.http_status = message['status']
+                trace.route = _route_path(scope) or trace.route
+                if trace.kept:
+                    headers = list(message.get('headers', []))
+                    headers.append((b'x-wordle-trace-id', trace.id.encode()))
+                    headers.append((b'server-timing', trace.server_timing().encode()))
+                    message = dict(message, headers=headers)
+            await send(message)
+        return traced_send
+
+# ---
+# DB instrumentation
+# ---
+
+class CountingCursor:
+    """
+    Cursor wrapper timing each statement, handed out by db_cursor while a scope is active
+    """
+    def __init__(self, cur, scope: Scope):
+        self._cur = cur
+        self._scope = scope
+        self._event = None
+
+    def _record(self, statement, seconds: float, many: bool = False):
+        self._scope.add('wordle_db_query_seconds_total', seconds)
+        self._scope.add('wordle_db_query_calls_total', 1)
+        if self._scope.trace is not None:
+            self._event = self._scope.trace.query(statement, seconds, self._cur.rowcount, many)
+
+    def execute(self, statement, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cur.execute(statement, *args, **kwargs)
+        finally:
+            self._record(statement, time.perf_counter() - start)
+
+    def executemany(self, statement, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cur.executemany(statement, *args, **kwargs)
+        finally:
+            self._record(statement, time.perf_counter() - start, many=True)
+
+    def fetchall(self):
+        rows = self._cur.fetchall()
+        if self._event is not None:
+            self._event['rows'] = len(rows)
+        return rows
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        if self._event is not None and self._event['rows'] is None:
+            self._event['rows'] = 0 if row is None else 1
+        return row
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+class CountingConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def commit(self):
+        count('wordle_db_commits_total')
+        return self._conn.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def instrument(conn, cur):
+    """
+    (conn, cur) wrapped to count statements and commits, or as they are when there is no scope to count them in
+    """
+    scope = _current.get()
+    if scope is None:
+        return conn, cur
+    scope.add('wordle_db_connections_total', 1)
+    return CountingConnection(conn), CountingCursor(cur, scope)
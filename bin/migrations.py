@@ -0,0 +1,146 @@
+"""
+Competitive Ranked Wordle Schema Migrations
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Migrations are (version, description, statements) tuples applied in order. The
+highest applied version is recorded in the schema_version table, so existing
+databases are upgraded in place the next time the app starts. Statements should
+be safe to re-run (IF NOT EXISTS) since MariaDB commits DDL implicitly and a
+migration can't be rolled back halfway through. For the same reason, data a
+migration can't handle is caught by its MIGRATION_CHECKS entry before any of its
+statements run, and reported with a MigrationError.
+"""
+
+import logging
+
+MARIADB_MIGRATIONS = [
+    (1, 'Initial schema', [
+        "CREATE TABLE IF NOT EXISTS `players` (`player_name` text NOT NULL, `player_mu` float NOT NULL, `player_sigma` float NOT NULL, `player_ord` float DEFAULT NULL, `elo_delta` double DEFAULT NULL, `ord_delta` double DEFAULT NULL, `mu_delta` double DEFAULT NULL, `sigma_delta` double DEFAULT NULL, `player_id` int(11) NOT NULL AUTO_INCREMENT, `player_platform` text NOT NULL, `player_uuid` text NOT NULL, `player_elo` float NOT NULL DEFAULT 400, PRIMARY KEY (`player_id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_uca1400_ai_ci;",
+        "CREATE TABLE IF NOT EXISTS `scores` (`id` int(11) NOT NULL AUTO_INCREMENT, `player_id` int(11) DEFAULT NULL, `puzzle` int(11) DEFAULT NULL, `raw_score` text DEFAULT NULL, `score` int(11) DEFAULT NULL, `calculated_score` int(11) DEFAULT NULL, `hard_mode` int(11) DEFAULT NULL, `elo` double DEFAULT NULL, `mu` double DEFAULT NULL, `sigma` double DEFAULT NULL, `ordinal` double DEFAULT NULL, `elo_delta` double DEFAULT NULL, `ordinal_delta` double DEFAULT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_uca1400_ai_ci;",
+    ]),
+    (2, 'Index hot query columns', [
+        "CREATE INDEX IF NOT EXISTS `idx_scores_puzzle_hard_mode` ON `scores` (`puzzle`, `hard_mode`);",
+        "CREATE INDEX IF NOT EXISTS `idx_scores_player_puzzle` ON `scores` (`player_id`, `puzzle`);",
+        "ALTER TABLE `players` MODIFY `player_uuid` varchar(255) NOT NULL;",
+        "CREATE UNIQUE INDEX IF NOT EXISTS `idx_players_uuid` ON `players` (`player_uuid`);",
+    ]),
+    (3, 'Cache invalidation counters', [
+        "CREATE TABLE IF NOT EXISTS `cache_generation` (`name` varchar(64) NOT NULL, `generation` bigint NOT NULL DEFAULT 0, PRIMARY KEY (`name`)) ENGINE=InnoDB;",
+        "INSERT IGNORE INTO `cache_generation` (`name`, `generation`) VALUES ('players', 0);",
+    ]),
+    (4, 'Score cache invalidation counter', [
+        "INSERT IGNORE INTO `cache_generation` (`name`, `generation`) VALUES ('scores', 0);",
+    ]),
+    (5, 'Rating ledger and dirty watermark', [
+        "CREATE TABLE IF NOT EXISTS `rating_ledger` (`puzzle` int(11) NOT NULL, `inputs_hash` char(64) NOT NULL, `ratings_before` longtext NOT NULL, `ratings_after` longtext NOT NULL, `applied_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (`puzzle`)) ENGINE=InnoDB;",
+        "CREATE TABLE IF NOT EXISTS `rating_watermark` (`name` varchar(64) NOT NULL, `puzzle` int(11) DEFAULT NULL, `version` bigint NOT NULL DEFAULT 0, PRIMARY KEY (`name`)) ENGINE=InnoDB;",
+        "INSERT IGNORE INTO `rating_watermark` (`name`, `puzzle`, `version`) VALUES ('dirty_from', NULL, 0);",
+    ]),
+    (6, 'Per-opponent ELO matchups', [
+        "CREATE TABLE IF NOT EXISTS `matchups` (`puzzle` int(11) NOT NULL, `player_id` int(11) NOT NULL, `opponent_id` int(11) NOT NULL, `result` float NOT NULL, `elo_change` double NOT NULL, PRIMARY KEY (`player_id`, `puzzle`, `opponent_id`), KEY `idx_matchups_puzzle` (`puzzle`)) ENGINE=InnoDB;",
+    ]),
+]
+
+# Same versions as MARIADB_MIGRATIONS, so schema_version means the same thing on both
+SQLITE_MIGRATIONS = [
+    (1, 'Initial schema', [
+        "CREATE TABLE IF NOT EXISTS players (player_name text NOT NULL, player_mu real NOT NULL, player_sigma real NOT NULL, player_ord real DEFAULT NULL, elo_delta real DEFAULT NULL, ord_delta real DEFAULT NULL, mu_delta real DEFAULT NULL, sigma_delta real DEFAULT NULL, player_id integer PRIMARY KEY AUTOINCREMENT, player_platform text NOT NULL, player_uuid text NOT NULL, player_elo real NOT NULL DEFAULT 400)",
+        "CREATE TABLE IF NOT EXISTS scores (id integer PRIMARY KEY AUTOINCREMENT, player_id integer DEFAULT NULL, puzzle integer DEFAULT NULL, raw_score text DEFAULT NULL, score integer DEFAULT NULL, calculated_score integer DEFAULT NULL, hard_mode integer DEFAULT NULL, elo real DEFAULT NULL, mu real DEFAULT NULL, sigma real DEFAULT NULL, ordinal real DEFAULT NULL, elo_delta real DEFAULT NULL, ordinal_delta real DEFAULT NULL)",
+    ]),
+    (2, 'Index hot query columns', [
+        "CREATE INDEX IF NOT EXISTS idx_scores_puzzle_hard_mode ON scores (puzzle, hard_mode)",
+        "CREATE INDEX IF NOT EXISTS idx_scores_player_puzzle ON scores (player_id, puzzle)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_players_uuid ON players (player_uuid)",
+    ]),
+    (3, 'Cache invalidation counters', [
+        "CREATE TABLE IF NOT EXISTS cache_generation (name text NOT NULL PRIMARY KEY, generation integer NOT NULL DEFAULT 0)",
+        "INSERT OR IGNORE INTO cache_generation (name, generation) VALUES ('players', 0)",
+    ]),
+    (4, 'Score cache invalidation counter', [
+        "INSERT OR IGNORE INTO cache_generation (name, generation) VALUES ('scores', 0)",
+    ]),
+    (5, 'Rating ledger and dirty watermark', [
+        "CREATE TABLE IF NOT EXISTS rating_ledger (puzzle integer NOT NULL PRIMARY KEY, inputs_hash text NOT NULL, ratings_before text NOT NULL, ratings_after text NOT NULL, applied_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP)",
+        "CREATE TABLE IF NOT EXISTS rating_watermark (name text NOT NULL PRIMARY KEY, puzzle integer DEFAULT NULL, version integer NOT NULL DEFAULT 0)",
+        "INSERT OR IGNORE INTO rating_watermark (name, puzzle, version) VALUES ('dirty_from', NULL, 0)",
+    ]),
+    (6, 'Per-opponent ELO matchups', [
+        "CREATE TABLE IF NOT EXISTS matchups (puzzle integer NOT NULL, player_id integer NOT NULL, opponent_id integer NOT NULL, result real NOT NULL, elo_change real NOT NULL, PRIMARY KEY (player_id, puzzle, opponent_id)) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS idx_matchups_puzzle ON matchups (puzzle)",
+    ]),
+]
+
+class MigrationError(Exception):
+    pass
+
+def check_unique_player_uuids(cur):
+    """
+    Refuse to add the unique player_uuid index while players share a UUID
+    """
+    cur.execute("SELECT player_uuid, player_id FROM players WHERE player_uuid IN (SELECT player_uuid FROM players GROUP BY player_uuid HAVING COUNT(*) > 1) ORDER BY player_uuid, player_id")
+    duplicates = {}
+    for player_uuid, player_id in cur.fetchall():
+        duplicates.setdefault(player_uuid, []).append(player_id)
+    if duplicates:
+        listed = '; '.join(f"{player_uuid} (player_ids {', '.join(str(player_id) for player_id in player_ids)})" for player_uuid, player_ids in duplicates.items())
+        ids = [player_id for player_ids in duplicates.values() for player_id in player_ids]
+        cur.execute(f"SELECT MIN(puzzle) FROM scores WHERE player_id IN ({', '.join(['?'] * len(ids))})", tuple(ids))
+        first_puzzle = cur.fetchone()[0]
+        if first_puzzle is None:
+            rerate = "These players have no scores, so nothing needs re-rating."
+        else:
+            rerate = f"Then re-rate the merged scores with /backfill-scores from start_puzzle {first_puzzle}, their first puzzle, to the latest puzzle."
+        raise MigrationError(
+            f"Can't add the unique index on players.player_uuid, these UUIDs belong to more than one player: {listed}. "
+            "For each UUID keep the lowest player_id, move the others' scores onto it "
+            "(UPDATE scores SET player_id = <kept> WHERE player_id = <duplicate>), delete the duplicate players rows, "
+            f"and restart the app to finish the migration. {rerate}"
+        )
+
+# Run before the statements of a migration, so it fails before changing anything
+MIGRATION_CHECKS = {
+    2: check_unique_player_uuids,
+}
+
+def get_schema_version(cur):
+    cur.execute("SELECT MAX(version) FROM schema_version")
+    row = cur.fetchone()
+    if row is None or row[0] is None:
+        return 0
+    return row[0]
+
+def migrate(conn, cur, migrations: list, target: int = None):
+    """
+    Apply every migration newer than the recorded schema version, up to target (default: latest)
+    Returns the schema version the database is now at
+    """
+    cur.execute("CREATE TABLE IF NOT EXISTS schema_version (version int NOT NULL PRIMARY KEY, description text NOT NULL, applied_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP)")
+    conn.commit()
+
+    current = get_schema_version(cur)
+    for version, description, statements in migrations:
+        if version <= current or (target is not None and version > target):
+            continue
+        if version in MIGRATION_CHECKS:
+            MIGRATION_CHECKS[version](cur)
+        logging.info(f"Applying schema migration {version}: {description}")
+        for statement in statements:
+            cur.execute(statement)
+        cur.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)", (version, description))
+        conn.commit()
+        current = version
+    return current
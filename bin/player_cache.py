@@ -0,0 +1,146 @@
+"""
+Competitive Ranked Wordle Player Cache
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Player rows are cached per process and indexed by both player_id and player_uuid.
+Writes made through the DB handler update the cache directly. Writes made by other
+workers bump a shared generation counter in the DB, which each cache compares
+against at most every check_interval seconds, dropping everything when it moved.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+class PlayerCache:
+    """
+    LRU cache of player rows with a TTL
+        max_size        int     Maximum number of players held
+        ttl             float   Seconds a cached player is trusted for
+        check_interval  float   Seconds between checks of the shared generation counter
+    """
+    def __init__(self, max_size: int = 1024, ttl: float = 300, check_interval: float = 5):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.check_interval = check_interval
+
+        self._players = OrderedDict()
+        self._uuids = {}
+        self._lock = threading.Lock()
+        self.generation = None
+        self._last_check = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+    def _remove(self, player_id):
+        expires, player = self._players.pop(player_id)
+        self._uuids.pop(player['player_uuid'], None)
+
+    def get(self, player_id: int = None, player_uuid: str = None):
+        """
+        Copy of the cached player, or None on a miss
+        """
+        with self._lock:
+            if player_id is None:
+                player_id = self._uuids.get(player_uuid)
+            cached = self._players.get(player_id)
+            if cached is None:
+                self._stats['misses'] += 1
+                return None
+            expires, player = cached
+            if expires < time.monotonic():
+                self._remove(player_id)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._players.move_to_end(player_id)
+            self._stats['hits'] += 1
+            return dict(player)
+
+    def put(self, player: dict):
+        with self._lock:
+            if player['player_id'] in self._players:
+                self._remove(player['player_id'])
+            self._players[player['player_id']] = (time.monotonic() + self.ttl, dict(player))
+            self._uuids[player['player_uuid']] = player['player_id']
+            while len(self._players) > self.max_size:
+                player_id = next(iter(self._players))
+                self._remove(player_id)
+                self._stats['evictions'] += 1
+
+    def update(self, player_id: int, data: dict):
+        """
+        Write-through for a player update, only touches players already cached
+        """
+        with self._lock:
+            cached = self._players.get(player_id)
+            if cached is None:
+                return
+            expires, player = cached
+            if 'player_uuid' in data:
+                self._uuids.pop(player['player_uuid'], None)
+                self._uuids[data['player_uuid']] = player_id
+            player.update(data)
+
+    def clear(self):
+        with self._lock:
+            self._players.clear()
+            self._uuids.clear()
+            self._stats['invalidations'] += 1
+
+    def needs_check(self):
+        return time.monotonic() - self._last_check >= self.check_interval
+
+    def sync(self, generation: int):
+        """
+        Compare against the shared generation counter, clearing if another worker wrote players
+        Returns True if the cache was cleared
+        """
+        self._last_check = time.monotonic()
+        cleared = False
+        if generation != self.generation:
+            if self.generation is not None:
+                self.clear()
+                cleared = True
+            self.generation = generation
+        return cleared
+
+    def written(self, generation: int):
+        """
+        Record the generation produced by our own write
+        If it skipped past the one we knew, another worker wrote in between
+        Returns True if the cache was cleared
+        """
+        cleared = False
+        if self.generation is not None and generation > self.generation + 1:
+            self.clear()
+            cleared = True
+        if self.generation is None or generation > self.generation:
+            self.generation = generation
+        return cleared
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._players)
+            stats['max_size'] = self.max_size
+        return stats
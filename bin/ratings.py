@@ -0,0 +1,160 @@
+"""
+Competitive Ranked Wordle Rating Calculations
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+These functions do not touch the DB. Each takes the hard mode entries for a single
+puzzle, joined with the player's ratings going into that puzzle (player_mu,
+player_sigma, player_ord, player_elo), and returns the (id, data) score updates and
+(player_id, data) player updates to apply.
+"""
+
+import numpy as np
+
+from bin import metrics
+from bin.elo_engine import match_elo_deltas, match_elo_matrix, match_results
+
+def rate_openskill(model, entries: list):
+    """
+    Calculate Openskill rankings for a single puzzle
+    """
+    score_updates = []
+    player_updates = []
+    if len(entries) == 1:
+        # Don't do calculations when only one player submits
+        for entry in entries:
+            score_data = {
+                'mu': entry['player_mu'],
+                'sigma': entry['player_sigma'],
+                'ordinal': entry['player_ord'],
+                'ordinal_delta': 0
+            }
+            players_data = {
+                'ord_delta': 0,
+                'mu_delta': 0,
+                'sigma_delta': 0
+            }
+            score_updates.append((entry['id'], score_data))
+            player_updates.append((entry['player_id'], players_data))
+        return score_updates, player_updates
+
+    players = []
+    scores = []
+    player_stats = {}
+
+    for entry in entries:
+        players.append([model.rating(name=str(entry['player_id']), mu=entry['player_mu'], sigma=entry['player_sigma'])])
+        scores.append(entry['calculated_score'])
+
+        player_stats[entry['player_id']] = {
+            'ordinal': entry['player_ord'],
+            'mu': entry['player_mu'],
+            'sigma': entry['player_sigma']
+        }
+
+    with metrics.timer('wordle_openskill_rate'):
+        match_scores = model.rate(players, scores=scores)
+
+    i = 0
+    for entry in entries:
+        player = match_scores[i][0]
+
+        score_data = {
+            'sigma': player.sigma,
+            'mu': player.mu,
+            'ordinal': player.ordinal(),
+            'ordinal_delta': player.ordinal() - player_stats[entry['player_id']]['ordinal']
+        }
+
+        players_data = {
+            'player_mu': player.mu,
+            'player_sigma': player.sigma,
+            'player_ord': player.ordinal(),
+            'ord_delta': player.ordinal() - player_stats[entry['player_id']]['ordinal'],
+            'mu_delta': player.mu - player_stats[entry['player_id']]['mu'],
+            'sigma_delta': player.sigma - player_stats[entry['player_id']]['sigma']
+        }
+
+        score_updates.append((entry['id'], score_data))
+        player_updates.append((entry['player_id'], players_data))
+        i += 1
+
+    return score_updates, player_updates
+
+def rate_match_elo(entries: list):
+    """
+    Legacy ELO Calculation
+    Translate rankings into 1-1 matches between each player, then sum the elo change
+    """
+    score_updates = []
+    player_updates = []
+    if len(entries) == 1:
+        # Don't do calculations when only one player submits
+        for entry in entries:
+            score_data = {
+                'elo': entry['player_elo'],
+                'elo_delta': 0,
+            }
+            players_data = {
+                'elo_delta': 0
+            }
+            score_updates.append((entry['id'], score_data))
+            player_updates.append((entry['player_id'], players_data))
+        return score_updates, player_updates
+
+    with metrics.timer('wordle_elo'):
+        elo_deltas = match_elo_deltas(
+            [entry['calculated_score'] for entry in entries],
+            [entry['player_elo'] for entry in entries]
+        )
+
+    for player, overall_change in zip(entries, elo_deltas.tolist()):
+        score_data = {
+            'elo': player['player_elo'] + overall_change,
+            'elo_delta': overall_change
+        }
+        players_data = {
+            'player_elo': player['player_elo'] + overall_change,
+            'elo_delta': overall_change
+        }
+        score_updates.append((player['id'], score_data))
+        player_updates.append((player['player_id'], players_data))
+
+    return score_updates, player_updates
+
+def match_elo_matchups(entries: list):
+    """
+    Each player's result and ELO change against every opponent on a single puzzle, from the ratings going into it
+    Returns (puzzle, player_id, opponent_id, result, elo_change) rows, for /blame
+    """
+    if len(entries) < 2:
+        return []
+    scores = [entry['calculated_score'] for entry in entries]
+    with metrics.timer('wordle_elo'):
+        results = match_results(np.asarray(scores, dtype=np.int64), np.asarray(scores, dtype=np.int64))
+        changes = match_elo_matrix(scores, [entry['player_elo'] for entry in entries])
+
+    # Every (player, opponent) pair except players against themselves, row by row
+    ids = np.asarray([entry['player_id'] for entry in entries])
+    pairs = ids[:, None] != ids[None, :]
+    player_ids = np.broadcast_to(ids[:, None], pairs.shape)[pairs]
+    opponent_ids = np.broadcast_to(ids[None, :], pairs.shape)[pairs]
+    puzzle = entries[0]['puzzle']
+    return [
+        (puzzle, player_id, opponent_id, result, change)
+        for player_id, opponent_id, result, change in zip(player_ids.tolist(), opponent_ids.tolist(), results[pairs].tolist(), changes[pairs].tolist())
+    ]
+
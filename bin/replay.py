@@ -0,0 +1,272 @@
+"""
+Competitive Ranked Wordle Rating Replay
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Every puzzle that gets rated is recorded in the rating ledger: a hash of its inputs
+(the hard mode scores and each player's ratings going in) and the player ratings it
+produced. Adding a hard mode score moves a "dirty from" watermark back to its puzzle,
+and rerate replays from there, recalculating only the puzzles whose inputs changed
+and reusing the ledger for the rest.
+"""
+
+import json
+import hashlib
+from datetime import date
+from itertools import groupby
+from operator import attrgetter
+
+import numpy as np
+
+from bin import metrics
+from bin.storage import get_entry_records, get_entry_columns, get_all_players, bulk_update_entries, get_dirty_watermark, get_rating_ledger, get_ratings_before
+from bin.ratings import rate_openskill, rate_match_elo, match_elo_matchups
+from bin.utilities import get_wordle_puzzle
+
+RATING_COLS = ['player_mu', 'player_sigma', 'player_ord', 'player_elo']
+
+def _diff(old: dict, new: dict):
+    """
+    Columns whose value changed, as col: [old, new]
+    """
+    return {col: [old.get(col), value] for col, value in new.items() if old.get(col) != value}
+
+def _puzzle_inputs(puzzle_entries: list, ratings: dict):
+    """
+    Ratings going into a puzzle for everyone who played it, and a hash of everything the result depends on
+    """
+    before = {entry.player_id: dict(ratings[entry.player_id]) for entry in puzzle_entries}
+    inputs = {
+        'scores': [[entry.id, entry.player_id, entry.calculated_score] for entry in puzzle_entries],
+        'ratings': {str(player_id): data for player_id, data in before.items()},
+    }
+    inputs_hash = hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+    return before, inputs_hash
+
+def _rate_puzzle(model, puzzle_entries: list, ratings: dict, openskill: bool = True, elo: bool = True):
+    """
+    Rate one puzzle from the given ratings, updating them in place
+    Returns the score and player changes, keyed by score id and player_id, and the
+    per-opponent ELO matchups (None when ELO wasn't rated)
+    """
+    rating_updates = []
+    matchups = None
+    # Only the fields the rating functions read, shared by both since neither changes them
+    rated = [
+        dict(ratings[entry.player_id], id=entry.id, player_id=entry.player_id, puzzle=entry.puzzle, calculated_score=entry.calculated_score)
+        for entry in puzzle_entries
+    ]
+    if openskill:
+        rating_updates.append(rate_openskill(model, rated))
+    if elo:
+        rating_updates.append(rate_match_elo(rated))
+        matchups = match_elo_matchups(rated)
+
+    score_changes = {}
+    player_changes = {}
+    for score_updates, player_updates in rating_updates:
+        for id, data in score_updates:
+            score_changes.setdefault(id, {}).update(data)
+        for player_id, data in player_updates:
+            player_changes.setdefault(player_id, {}).update(data)
+    _apply(ratings, player_changes)
+    return score_changes, player_changes, matchups
+
+def _initial_ratings(model):
+    """
+    Ratings a newly registered player starts with, as set by /register
+    """
+    rating = model.rating()
+    return {'player_mu': rating.mu, 'player_sigma': rating.sigma, 'player_ord': rating.ordinal(), 'player_elo': 400}
+
+def _apply(ratings: dict, player_changes: dict):
+    for player_id, data in player_changes.items():
+        for col in RATING_COLS:
+            if col in data:
+                ratings[player_id][col] = data[col]
+
+def replay_ratings(config: dict, model, start_puzzle: int, end_puzzle: int, openskill: bool = True, elo: bool = True, dry_run: bool = False, progress=None):
+    """
+    Re-rate every hard mode score in [start_puzzle, end_puzzle] in memory
+    Gives the same result as running calculate_openskill and calculate_match_elo for each puzzle in turn,
+    but every score and player is read in one pass and all changes are written back in one transaction
+    With dry_run the computed diffs are returned and nothing is written
+    progress, if given, is called as progress(puzzles_done, puzzles_total) after each puzzle
+    A full (openskill and elo) replay is recorded in the rating ledger, replacing anything after end_puzzle
+    """
+    entries = get_entry_records(config, start=start_puzzle, end=end_puzzle, hard_mode=1)
+    players = {player['player_id']: player for player in get_all_players(config)}
+
+    # Ratings going into the next puzzle, starting from what is currently stored
+    ratings = {player_id: {col: player[col] for col in RATING_COLS} for player_id, player in players.items()}
+    score_changes = {}
+    player_changes = {}
+    matchups = {}
+    ledger = []
+    puzzles = 0
+
+    # Same as the join in get_entries_with_players, scores for unknown players are not rated
+    entries = [entry for entry in entries if entry.player_id in players]
+    total = len(set(entry.puzzle for entry in entries))
+    if progress:
+        progress(0, total)
+    for puzzle, puzzle_entries in groupby(entries, key=attrgetter('puzzle')):
+        puzzle_entries = list(puzzle_entries)
+        puzzles += 1
+        metrics.count('wordle_backfill_puzzles_total')
+
+        before, inputs_hash = _puzzle_inputs(puzzle_entries, ratings)
+        puzzle_scores, puzzle_players, puzzle_matchups = _rate_puzzle(model, puzzle_entries, ratings, openskill, elo)
+        if puzzle_matchups is not None:
+            matchups[puzzle] = puzzle_matchups
+        for id, data in puzzle_scores.items():
+            score_changes.setdefault(id, {}).update(data)
+        for player_id, data in puzzle_players.items():
+            player_changes.setdefault(player_id, {}).update(data)
+        ledger.append({
+            'puzzle': puzzle,
+            'inputs_hash': inputs_hash,
+            'ratings_before': before,
+            'ratings_after': puzzle_players,
+        })
+        if progress:
+            progress(puzzles, total)
+
+    output = {
+        'puzzles': puzzles,
+        'scores': len(score_changes),
+        'players': len(player_changes),
+    }
+
+    if dry_run:
+        scores = {entry.id: entry.to_dict() for entry in entries if entry.id in score_changes}
+        output['score_diffs'] = []
+        for id, data in score_changes.items():
+            changes = _diff(scores[id], data)
+            if changes:
+                output['score_diffs'].append({
+                    'id': id,
+                    'puzzle': scores[id]['puzzle'],
+                    'player_id': scores[id]['player_id'],
+                    'changes': changes
+                })
+        output['player_diffs'] = []
+        for player_id, data in player_changes.items():
+            changes = _diff(players[player_id], data)
+            if changes:
+                output['player_diffs'].append({
+                    'player_id': player_id,
+                    'player_name': players[player_id]['player_name'],
+                    'changes': changes
+                })
+        return output
+
+    if openskill and elo:
+        # Everything after start_puzzle has just been rated, so an earlier watermark is the only one left standing
+        dirty_from, version = get_dirty_watermark(config)
+        if dirty_from is None or dirty_from < start_puzzle:
+            version = None
+        bulk_update_entries(config, list(score_changes.items()), list(player_changes.items()), ledger=ledger, clear_ledger_after=end_puzzle, watermark_version=version, matchups=matchups)
+    else:
+        # A partial replay doesn't describe a full rating, so later ledger entries no longer hold
+        bulk_update_entries(config, list(score_changes.items()), list(player_changes.items()), clear_ledger_after=start_puzzle - 1, matchups=matchups)
+    return output
+
+def rerate(config: dict, model, puzzle: int = None, progress=None):
+    """
+    Bring ratings up to date, replaying from the dirty watermark (or puzzle, if earlier) through the last rated puzzle,
+    or today's if that is earlier
+    Puzzles whose inputs match the ledger reuse the recorded ratings instead of being recalculated, so
+    running it again without new scores changes nothing
+    progress, if given, is called as progress(puzzles_done, puzzles_total) after each puzzle
+    """
+    dirty_from, version = get_dirty_watermark(config)
+    starts = [start for start in (dirty_from, puzzle) if start is not None]
+    if not starts:
+        return {'start_puzzle': None, 'end_puzzle': None, 'puzzles': 0, 'recalculated': 0, 'skipped': 0, 'scores': 0, 'players': 0}
+    start_puzzle = min(starts)
+    ledger = {row['puzzle']: row for row in get_rating_ledger(config, start_puzzle)}
+    # The last rated puzzle, from the scores as well since the ledger may not cover it. Scores for
+    # puzzles that haven't come out yet are left for when they do
+    rated = get_entry_columns(config, ['puzzle', 'elo'], start=start_puzzle, hard_mode=1)
+    rated_puzzles = rated['puzzle'][~np.isnan(rated['elo'])].tolist()
+    end_puzzle = min(max([start_puzzle] + starts + list(ledger) + rated_puzzles[-1:]), get_wordle_puzzle(date.today()))
+
+    players = {player['player_id']: player for player in get_all_players(config)}
+    entries = [entry for entry in get_entry_records(config, start=start_puzzle, end=end_puzzle, hard_mode=1) if entry.player_id in players]
+
+    # Everyone goes back to the ratings they had going into start_puzzle: their last rated score before it,
+    # or for players with none, what the ledger says they started with, or a new player's ratings.
+    # The stored ratings already include everything being replayed, and the ledger can't be relied on
+    # alone since it is empty for anything rated before it existed
+    ratings = {player_id: _initial_ratings(model) for player_id in players}
+    started = set()
+    for row in ledger.values():
+        for player_id, data in row['ratings_before'].items():
+            if player_id in ratings and player_id not in started:
+                ratings[player_id] = dict(data)
+                started.add(player_id)
+    for player_id, data in get_ratings_before(config, start_puzzle).items():
+        if player_id in ratings:
+            ratings[player_id] = data
+
+    score_changes = {}
+    player_changes = {}
+    matchups = {}
+    ledger_rows = []
+    puzzles = 0
+    recalculated = 0
+    total = len(set(entry.puzzle for entry in entries))
+    if progress:
+        progress(0, total)
+    for puzzle, puzzle_entries in groupby(entries, key=attrgetter('puzzle')):
+        puzzle_entries = list(puzzle_entries)
+        puzzles += 1
+
+        before, inputs_hash = _puzzle_inputs(puzzle_entries, ratings)
+        row = ledger.get(puzzle)
+        if row is not None and row['inputs_hash'] == inputs_hash:
+            puzzle_players = row['ratings_after']
+            _apply(ratings, puzzle_players)
+            metrics.count('wordle_rerate_puzzles_total', result='reused')
+        else:
+            puzzle_scores, puzzle_players, matchups[puzzle] = _rate_puzzle(model, puzzle_entries, ratings)
+            score_changes.update(puzzle_scores)
+            ledger_rows.append({
+                'puzzle': puzzle,
+                'inputs_hash': inputs_hash,
+                'ratings_before': before,
+                'ratings_after': puzzle_players,
+            })
+            recalculated += 1
+            metrics.count('wordle_rerate_puzzles_total', result='recalculated')
+        for player_id, data in puzzle_players.items():
+            player_changes.setdefault(player_id, {}).update(data)
+        if progress:
+            progress(puzzles, total)
+
+    if not recalculated:
+        player_changes = {}
+    bulk_update_entries(config, list(score_changes.items()), list(player_changes.items()), ledger=ledger_rows, watermark_version=version, matchups=matchups)
+    return {
+        'start_puzzle': start_puzzle,
+        'end_puzzle': end_puzzle,
+        'puzzles': puzzles,
+        'recalculated': recalculated,
+        'skipped': puzzles - recalculated,
+        'scores': len(score_changes),
+        'players': len(player_changes),
+    }
@@ -0,0 +1,125 @@
+"""
+Competitive Ranked Wordle Report Cache
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Rendered report bodies for closed puzzles, keyed by endpoint and puzzle range. Each
+entry carries a strong ETag (hash of the body) so clients can revalidate with
+If-None-Match. Entries are dropped when the puzzles they cover are recalculated in
+this process, or when the shared cache generations show another worker wrote scores
+or players.
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+class ReportCache:
+    """
+    LRU cache of rendered reports bounded by total body size
+        max_bytes       int     Maximum total size of cached bodies
+        check_interval  float   Seconds between checks of the shared generation counters
+    """
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, check_interval: float = 5):
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.generations = None
+        self._last_check = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidations': 0,
+        }
+
+    def _remove(self, key):
+        etag, body, puzzles = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def get(self, key):
+        """
+        (etag, body) for a cached report, or None on a miss
+        """
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            etag, body, puzzles = cached
+            return etag, body
+
+    def put(self, key, start: int, end: int, body: bytes):
+        """
+        Cache a rendered report covering puzzles [start, end], returning (etag, body)
+        """
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        if len(body) > self.max_bytes:
+            return etag, body
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (etag, body, (start, end))
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+        return etag, body
+
+    def invalidate(self, start: int, end: int):
+        """
+        Drop every report covering any puzzle in [start, end]
+        """
+        with self._lock:
+            for key, (etag, body, (entry_start, entry_end)) in list(self._entries.items()):
+                if entry_start <= end and start <= entry_end:
+                    self._remove(key)
+                    self._stats['invalidations'] += 1
+            # Ratings changed too, so look at the shared generations on the next read
+            self._last_check = 0
+
+    def clear(self):
+        with self._lock:
+            self._stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def needs_check(self):
+        return time.monotonic() - self._last_check >= self.check_interval
+
+    def sync(self, generations: dict):
+        """
+        Compare against the shared generation counters, clearing if scores or players were written
+        """
+        self._last_check = time.monotonic()
+        if generations != self.generations:
+            if self.generations is not None:
+                self.clear()
+            self.generations = generations
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+            stats['max_bytes'] = self.max_bytes
+        return stats
@@ -0,0 +1,85 @@
+"""
+Competitive Ranked Wordle Score Rows
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Compact forms of score rows for code that reads long ranges of them. get_entries
+returns one dict per row, which the API hands straight back, but a replay or report
+over a few years of a league only reads a handful of fields from each row.
+
+    ScoreRow        A tuple-backed record, read by attribute (row.puzzle)
+    score_columns   One NumPy array per column, for numeric work over a whole range
+"""
+
+from collections import namedtuple
+from operator import itemgetter
+
+import numpy as np
+
+SCORE_COLS = [
+    'id',
+    'player_id',
+    'puzzle',
+    'raw_score',
+    'score',
+    'calculated_score',
+    'hard_mode',
+    'elo',
+    'mu',
+    'sigma',
+    'ordinal',
+    'elo_delta',
+    'ordinal_delta'
+]
+
+# NULL ints come back as float columns with NaN, NULL floats as NaN
+COLUMN_TYPES = {
+    'id': np.int64,
+    'player_id': np.int64,
+    'puzzle': np.int64,
+    'raw_score': object,
+    'score': np.int64,
+    'calculated_score': np.int64,
+    'hard_mode': np.int64,
+    'elo': np.float64,
+    'mu': np.float64,
+    'sigma': np.float64,
+    'ordinal': np.float64,
+    'elo_delta': np.float64,
+    'ordinal_delta': np.float64,
+}
+
+class ScoreRow(namedtuple('ScoreRow', SCORE_COLS)):
+    __slots__ = ()
+
+    def to_dict(self):
+        return dict(zip(SCORE_COLS, self))
+
+score_values = itemgetter(*SCORE_COLS)
+
+def score_columns(cols: list, rows: list):
+    """
+    Turn rows of the given columns (as fetched, one tuple per row) into {col: array}
+    """
+    if len(rows) == 0:
+        return {col: np.empty(0, dtype=COLUMN_TYPES.get(col, object)) for col in cols}
+    columns = {}
+    for col, values in zip(cols, zip(*rows)):
+        dtype = COLUMN_TYPES.get(col, object)
+        if dtype is np.int64 and None in values:
+            dtype = np.float64
+        columns[col] = np.array(values, dtype=dtype)
+    return columns
@@ -0,0 +1,673 @@
+"""
+Competitive Ranked Wordle SQL Storage
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+The storage interface (see bin/storage.py) for SQL databases. Every statement is
+parameterized with ? placeholders and sticks to SQL that MariaDB and SQLite both
+accept, so the only driver specific parts are connecting, db_cursor and migrations,
+which live in bin/mariadb_handler.py and bin/sqlite3_handler.py.
+"""
+
+import json
+import importlib
+import threading
+from contextlib import contextmanager
+
+from bin import metrics
+from bin.player_cache import PlayerCache
+from bin.leaderboard import Leaderboard
+from bin.rows import SCORE_COLS, ScoreRow, score_columns
+
+# Imported on first use, so SQLite installs don't need the MariaDB connector
+DRIVERS = {
+    'mariadb': 'bin.mariadb_handler',
+    'sqlite': 'bin.sqlite3_handler',
+}
+
+# Matchup rows per executemany, a full backfill writes players^2 rows a puzzle
+MATCHUP_BATCH_SIZE = 5000
+
+_caches_lock = threading.Lock()
+_player_caches = {}
+_leaderboards = {}
+
+PLAYER_COLS = [
+    'player_id',
+    'player_uuid',
+    'player_name',
+    'player_platform',
+    'player_mu',
+    'player_sigma',
+    'player_ord',
+    'player_elo',
+    'elo_delta',
+    'ord_delta',
+    'mu_delta',
+    'sigma_delta'
+]
+
+def _driver(config: dict):
+    return importlib.import_module(DRIVERS[(config.get('storage') or {}).get('backend', 'mariadb')])
+
+def _db_key(config: dict):
+    return _driver(config).db_key(config)
+
+@contextmanager
+def db_cursor(config: dict):
+    """
+    Yields (conn, cur) from the configured driver
+    Any open transaction is rolled back afterwards, so callers must commit their own writes
+    """
+    with _driver(config).db_cursor(config) as (conn, cur):
+        yield metrics.instrument(conn, cur)
+
+def create_wordle_db(config: dict):
+    return _driver(config).create_wordle_db(config)
+
+def get_pool_stats(config: dict):
+    return _driver(config).get_pool_stats(config)
+
+def get_player_cache(config: dict):
+    """
+    Get (or lazily build) the player cache for the configured database
+    """
+    key = _db_key(config)
+    with _caches_lock:
+        if key not in _player_caches:
+            cache_config = config.get('player_cache') or {}
+            _player_caches[key] = PlayerCache(
+                max_size=cache_config.get('max_size', 1024),
+                ttl=cache_config.get('ttl', 300),
+                check_interval=cache_config.get('check_interval', 5),
+            )
+        return _player_caches[key]
+
+def get_player_cache_stats(config: dict):
+    return get_player_cache(config).stats()
+
+def _get_leaderboard(config: dict):
+    key = _db_key(config)
+    with _caches_lock:
+        if key not in _leaderboards:
+            _leaderboards[key] = Leaderboard()
+        return _leaderboards[key]
+
+def _sync_player_cache(config: dict, cache: PlayerCache):
+    """
+    Drop the player cache and leaderboard if another worker changed the players table since the last check
+    """
+    if not cache.needs_check():
+        return
+    with db_cursor(config) as (conn, cur):
+        cur.execute("SELECT generation FROM cache_generation WHERE name = 'players'")
+        row = cur.fetchone()
+    if cache.sync(row[0] if row else 0):
+        _get_leaderboard(config).invalidate()
+
+def _players_written(config: dict, generation: int, player_updates: list):
+    """
+    Write-through for our own player updates
+    """
+    cache = get_player_cache(config)
+    leaderboard = _get_leaderboard(config)
+    if cache.written(generation):
+        leaderboard.invalidate()
+    for player_id, data in player_updates:
+        cache.update(player_id, data)
+        leaderboard.update(player_id, data)
+
+def _bump_generation(cur, name: str):
+    """
+    Mark a table as changed for other workers' caches, in the caller's transaction
+    """
+    cur.execute("UPDATE cache_generation SET generation = generation + 1 WHERE name = ?", (name,))
+    cur.execute("SELECT generation FROM cache_generation WHERE name = ?", (name,))
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+def _mark_dirty(cur, puzzle: int):
+    """
+    Move the dirty watermark back to puzzle if it's earlier, in the caller's transaction
+    """
+    cur.execute(
+        "UPDATE rating_watermark SET puzzle = CASE WHEN puzzle IS NULL OR puzzle > ? THEN ? ELSE puzzle END, version = version + 1 WHERE name = 'dirty_from'",
+        (puzzle, puzzle)
+    )
+
+def get_dirty_watermark(config: dict):
+    """
+    (puzzle, version) for the earliest puzzle with hard mode scores added since it was last rated
+    puzzle is None when ratings are up to date
+    """
+    with db_cursor(config) as (conn, cur):
+        cur.execute("SELECT puzzle, version FROM rating_watermark WHERE name = 'dirty_from'")
+        row = cur.fetchone()
+    if row is None:
+        return None, 0
+    return row[0], row[1]
+
+def get_rating_ledger(config: dict, start_puzzle: int):
+    """
+    Ledger rows from start_puzzle onwards, with ratings keyed by player_id
+    """
+    with db_cursor(config) as (conn, cur):
+        cur.execute("SELECT puzzle, inputs_hash, ratings_before, ratings_after FROM rating_ledger WHERE puzzle >= ? ORDER BY puzzle", (start_puzzle,))
+        rows = cur.fetchall()
+    ledger = []
+    for puzzle, inputs_hash, ratings_before, ratings_after in rows:
+        ledger.append({
+            'puzzle': puzzle,
+            'inputs_hash': inputs_hash,
+            'ratings_before': {int(player_id): data for player_id, data in json.loads(ratings_before).items()},
+            'ratings_after': {int(player_id): data for player_id, data in json.loads(ratings_after).items()},
+        })
+    return ledger
+
+def get_ledger_start(config: dict):
+    with db_cursor(config) as (conn, cur):
+        cur.execute("SELECT MIN(puzzle) FROM rating_ledger")
+        rows = cur.fetchall()
+    return rows[0][0] if rows else None
+
+def get_ratings_before(config: dict, puzzle: int):
+    """
+    Each player's ratings after their last rated hard mode score before puzzle, keyed by player_id
+    """
+    query_string = """
+        SELECT s.player_id, s.mu, s.sigma, s.ordinal, s.elo
+        FROM scores s
+        JOIN (
+            SELECT player_id, MAX(puzzle) AS puzzle FROM scores
+            WHERE hard_mode = 1 AND puzzle < ? AND elo IS NOT NULL AND mu IS NOT NULL
+            GROUP BY player_id
+        ) last ON last.player_id = s.player_id AND last.puzzle = s.puzzle
+        WHERE s.hard_mode = 1 AND s.elo IS NOT NULL AND s.mu IS NOT NULL
+        ORDER BY s.id
+    """
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, (puzzle,))
+        rows = cur.fetchall()
+    # A player with two scores on their last puzzle was rated on the later one
+    ratings = {}
+    for player_id, mu, sigma, ordinal, elo in rows:
+        ratings[player_id] = {'player_mu': mu, 'player_sigma': sigma, 'player_ord': ordinal, 'player_elo': elo}
+    return ratings
+
+def get_cache_generations(config: dict):
+    """
+    Current change counters for the players and scores tables
+    """
+    with db_cursor(config) as (conn, cur):
+        cur.execute("SELECT name, generation FROM cache_generation")
+        rows = cur.fetchall()
+    return dict(rows)
+
+def update_score_entry(config: dict, id: int, data: dict):
+    new_fields = ", ".join(f"{col} = ?" for col in data)
+    with db_cursor(config) as (conn, cur):
+        cur.execute(f"UPDATE scores SET {new_fields} WHERE id = ?", tuple(data.values()) + (id,))
+        _bump_generation(cur, 'scores')
+        conn.commit()
+
+def update_player_entry(config: dict, player_id: int, data: dict):
+    new_fields = ", ".join(f"{col} = ?" for col in data)
+    with db_cursor(config) as (conn, cur):
+        cur.execute(f"UPDATE players SET {new_fields} WHERE player_id = ?", tuple(data.values()) + (player_id,))
+        generation = _bump_generation(cur, 'players')
+        conn.commit()
+
+    _players_written(config, generation, [(player_id, data)])
+
+def _grouped_updates(updates: list):
+    """
+    Group (key, data) updates by the set of columns they touch so each group can be sent with executemany
+    """
+    groups = {}
+    for key, data in updates:
+        cols = tuple(data.keys())
+        groups.setdefault(cols, []).append(tuple(data.values()) + (key,))
+    return groups
+
+def bulk_update_entries(config: dict, score_updates: list, player_updates: list, ledger: list = None, clear_ledger_after: int = None, watermark_version: int = None, matchups: dict = None):
+    """
+    Apply many score and player updates in a single transaction
+        score_updates       list    (score id, data) pairs, as passed to update_score_entry
+        player_updates      list    (player_id, data) pairs, as passed to update_player_entry
+        ledger              list    Rating ledger rows to record alongside the updates
+        clear_ledger_after  int     Drop ledger rows for puzzles after this one
+        watermark_version   int     Clear the dirty watermark, if it hasn't moved since this version was read
+        matchups            dict    puzzle: ELO matchup rows replacing everything recorded for that puzzle
+    """
+    if not score_updates and not player_updates and not ledger and clear_ledger_after is None and watermark_version is None and not matchups:
+        return
+
+    with db_cursor(config) as (conn, cur):
+        if ledger:
+            cur.executemany(
+                "REPLACE INTO rating_ledger (puzzle, inputs_hash, ratings_before, ratings_after) VALUES (?, ?, ?, ?)",
+                [(row['puzzle'], row['inputs_hash'], json.dumps(row['ratings_before']), json.dumps(row['ratings_after'])) for row in ledger]
+            )
+        if clear_ledger_after is not None:
+            cur.execute("DELETE FROM rating_ledger WHERE puzzle > ?", (clear_ledger_after,))
+        if watermark_version is not None:
+            cur.execute("UPDATE rating_watermark SET puzzle = NULL WHERE name = 'dirty_from' AND version = ?", (watermark_version,))
+        if matchups:
+            cur.executemany("DELETE FROM matchups WHERE puzzle = ?", [(puzzle,) for puzzle in matchups])
+            rows = [row for puzzle_rows in matchups.values() for row in puzzle_rows]
+            for start in range(0, len(rows), MATCHUP_BATCH_SIZE):
+                cur.executemany("REPLACE INTO matchups (puzzle, player_id, opponent_id, result, elo_change) VALUES (?, ?, ?, ?, ?)", rows[start:start + MATCHUP_BATCH_SIZE])
+        for cols, rows in _grouped_updates(score_updates).items():
+            new_fields = ", ".join(f"{col} = ?" for col in cols)
+            cur.executemany(f"UPDATE scores SET {new_fields} WHERE id = ?", rows)
+        for cols, rows in _grouped_updates(player_updates).items():
+            new_fields = ", ".join(f"{col} = ?" for col in cols)
+            cur.executemany(f"UPDATE players SET {new_fields} WHERE player_id = ?", rows)
+        if score_updates:
+            _bump_generation(cur, 'scores')
+        if player_updates:
+            generation = _bump_generation(cur, 'players')
+        conn.commit()
+
+    if player_updates:
+        _players_written(config, generation, player_updates)
+
+def add_entry(config: dict, data: dict):
+    query_string = f"INSERT INTO scores ({', '.join(data)}) VALUES ({', '.join('?' for _ in data)})"
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, tuple(data.values()))
+        if data.get('hard_mode') == 1:
+            _mark_dirty(cur, data['puzzle'])
+        conn.commit()
+
+def add_entries(config: dict, entries: list, closed: bool = False, dirty_from: int = None):
+    """
+    Insert many score entries with a single multi-row INSERT
+    Columns missing from an entry are written as NULL
+    Set closed when importing scores for closed puzzles, so cached reports get dropped
+    With dirty_from, hard mode scores for earlier puzzles don't move the dirty watermark
+    """
+    if not entries:
+        return 0
+    cols = []
+    for entry in entries:
+        cols.extend(col for col in entry if col not in cols)
+    row = f"({', '.join('?' for _ in cols)})"
+    query_string = f"INSERT INTO scores ({', '.join(cols)}) VALUES {', '.join(row for _ in entries)}"
+    params = tuple(entry.get(col) for entry in entries for col in cols)
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, params)
+        rated = [entry['puzzle'] for entry in entries if entry.get('hard_mode') == 1 and (dirty_from is None or entry['puzzle'] >= dirty_from)]
+        if rated:
+            _mark_dirty(cur, min(rated))
+        if closed:
+            _bump_generation(cur, 'scores')
+        conn.commit()
+    return len(entries)
+
+def register_player(config: dict, player_data: dict):
+    query_string = f"INSERT INTO players ({', '.join(player_data)}) VALUES ({', '.join('?' for _ in player_data)})"
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, tuple(player_data.values()))
+        player_id = cur.lastrowid
+        generation = _bump_generation(cur, 'players')
+        conn.commit()
+
+    _players_written(config, generation, [])
+    player_data = dict(player_data, player_id=player_id)
+    if all(col in player_data for col in PLAYER_COLS):
+        player_data = {col: player_data[col] for col in PLAYER_COLS}
+        get_player_cache(config).put(player_data)
+        _get_leaderboard(config).add(player_data)
+    else:
+        _get_leaderboard(config).invalidate()
+
+def _score_filters(prefix: str = '', puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    """
+    WHERE clause and params for the score filters shared by get_entries and get_entries_with_players
+    """
+    clauses = []
+    params = []
+    for clause, value in [
+        ('puzzle = ?', puzzle),
+        ('puzzle >= ?', start),
+        ('puzzle <= ?', end),
+        ('player_id = ?', player_id),
+        ('hard_mode = ?', hard_mode),
+    ]:
+        if value is not None:
+            clauses.append(f"{prefix}{clause}")
+            params.append(value)
+    if not clauses:
+        return "", ()
+    return f"WHERE {' AND '.join(clauses)}", tuple(params)
+
+def get_entries(config: dict, puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    """
+    Score rows matching every filter given, in (puzzle, id) order
+        puzzle      int     A single puzzle
+        start, end  int     An inclusive puzzle range, either end can be left open
+        player_id   int     A single player
+        hard_mode   int     1 for hard mode scores only, 0 for the rest
+    """
+    where, params = _score_filters('', puzzle, start, end, player_id, hard_mode)
+    query_string = f"SELECT {', '.join(SCORE_COLS)} FROM scores {where} ORDER BY puzzle, id"
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, params)
+        rows = cur.fetchall()
+
+    return [dict(zip(SCORE_COLS, row)) for row in rows]
+
+def get_entry_records(config: dict, puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    """
+    Score rows filtered as in get_entries, as ScoreRow records
+    """
+    where, params = _score_filters('', puzzle, start, end, player_id, hard_mode)
+    query_string = f"SELECT {', '.join(SCORE_COLS)} FROM scores {where} ORDER BY puzzle, id"
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, params)
+        rows = cur.fetchall()
+
+    return list(map(ScoreRow._make, rows))
+
+def get_entry_columns(config: dict, cols: list, puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    """
+    Only the given columns of the score rows filtered as in get_entries, as {col: array}
+    """
+    unknown = set(cols) - set(SCORE_COLS)
+    if unknown:
+        raise ValueError(f"Unknown score columns: {', '.join(sorted(unknown))}")
+    where, params = _score_filters('', puzzle, start, end, player_id, hard_mode)
+    query_string = f"SELECT {', '.join(cols)} FROM scores {where} ORDER BY puzzle, id"
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, params)
+        rows = cur.fetchall()
+
+    return score_columns(cols, rows)
+
+def get_entries_with_players(config: dict, puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    """
+    Score rows, filtered as in get_entries, joined with the submitting player's name and current ratings
+    """
+    player_cols = [
+        'player_uuid',
+        'player_name',
+        'player_platform',
+        'player_mu',
+        'player_sigma',
+        'player_ord',
+        'player_elo'
+    ]
+    cols = SCORE_COLS + player_cols
+
+    where, params = _score_filters('s.', puzzle, start, end, player_id, hard_mode)
+    select_cols = [f"s.{col}" for col in SCORE_COLS] + [f"p.{col}" for col in player_cols]
+    query_string = f"SELECT {', '.join(select_cols)} FROM scores s JOIN players p ON p.player_id = s.player_id {where} ORDER BY s.puzzle, s.id"
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, params)
+        rows = cur.fetchall()
+
+    return [dict(zip(cols, row)) for row in rows]
+
+def get_daily_report_rows(config: dict, puzzle: int):
+    """
+    Each player's ratings after a puzzle, with their name, highest ordinal first
+    """
+    cols = ['player_id', 'player_name', 'elo', 'elo_delta', 'ordinal', 'ordinal_delta']
+    query_string = """
+        SELECT s.player_id, p.player_name, s.elo, s.elo_delta, s.ordinal, s.ordinal_delta
+        FROM scores s JOIN players p USING (player_id)
+        WHERE s.puzzle = ?
+        ORDER BY s.ordinal DESC, s.player_id
+    """
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, (puzzle,))
+        rows = cur.fetchall()
+
+    return [dict(zip(cols, row)) for row in rows]
+
+def get_weekly_report_rows(config: dict, start: int, end: int):
+    """
+    Each player's first and last ratings and average score over [start, end], with their name, highest ending ordinal first
+    """
+    cols = ['player_id', 'player_name', 'start_elo', 'end_elo', 'start_ord', 'end_ord', 'average_score']
+    query_string = """
+        SELECT w.player_id, p.player_name, w.start_elo, w.end_elo, w.start_ord, w.end_ord, w.average_score
+        FROM (
+            SELECT player_id,
+                MAX(CASE WHEN first_rank = 1 THEN elo END) AS start_elo,
+                MAX(CASE WHEN last_rank = 1 THEN elo END) AS end_elo,
+                MAX(CASE WHEN first_rank = 1 THEN ordinal END) AS start_ord,
+                MAX(CASE WHEN last_rank = 1 THEN ordinal END) AS end_ord,
+                AVG(score) AS average_score
+            FROM (
+                SELECT player_id, elo, ordinal, score,
+                    ROW_NUMBER() OVER (PARTITION BY player_id ORDER BY puzzle ASC) AS first_rank,
+                    ROW_NUMBER() OVER (PARTITION BY player_id ORDER BY puzzle DESC) AS last_rank
+                FROM scores
+                WHERE puzzle >= ? AND puzzle <= ?
+            ) ranked
+            GROUP BY player_id
+        ) w JOIN players p USING (player_id)
+        ORDER BY w.end_ord DESC, w.player_id
+    """
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, (start, end))
+        rows = cur.fetchall()
+
+    return [dict(zip(cols, row)) for row in rows]
+
+def get_matchups(config: dict, player_uuid: str, puzzle: int):
+    """
+    A player's hard mode score on a puzzle with each of their ELO matchups that day, wins first
+    There is one row with no opponent if they played but have no matchups recorded
+    """
+    cols = ['player_id', 'player_name', 'elo', 'elo_delta', 'opponent_id', 'opponent_name', 'result', 'elo_change']
+    query_string = """
+        SELECT me.player_id, me.player_name, s.elo, s.elo_delta, m.opponent_id, o.player_name, m.result, m.elo_change
+        FROM players me
+        JOIN scores s ON s.player_id = me.player_id AND s.puzzle = ? AND s.hard_mode = 1
+        LEFT JOIN matchups m ON m.player_id = me.player_id AND m.puzzle = s.puzzle
+        LEFT JOIN players o ON o.player_id = m.opponent_id
+        WHERE me.player_uuid = ?
+        ORDER BY m.result DESC, o.player_name
+    """
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, (puzzle, player_uuid))
+        rows = cur.fetchall()
+
+    return [dict(zip(cols, row)) for row in rows]
+
+def get_matchup_totals(config: dict, player_uuid: str, start_puzzle: int, end_puzzle: int):
+    """
+    A player's wins, draws, losses and total ELO change against each opponent over [start_puzzle, end_puzzle], biggest losses first
+    """
+    cols = ['opponent_id', 'opponent_name', 'matches', 'wins', 'draws', 'losses', 'elo_change']
+    query_string = """
+        SELECT m.opponent_id, o.player_name, COUNT(*),
+            SUM(CASE WHEN m.result = 1 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN m.result = 0.5 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN m.result = 0 THEN 1 ELSE 0 END),
+            SUM(m.elo_change)
+        FROM players me
+        JOIN matchups m ON m.player_id = me.player_id
+        JOIN players o ON o.player_id = m.opponent_id
+        WHERE me.player_uuid = ? AND m.puzzle >= ? AND m.puzzle <= ?
+        GROUP BY m.opponent_id, o.player_name
+        ORDER BY SUM(m.elo_change), m.opponent_id
+    """
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, (player_uuid, start_puzzle, end_puzzle))
+        rows = cur.fetchall()
+
+    totals = []
+    for opponent_id, opponent_name, matches, wins, draws, losses, elo_change in rows:
+        totals.append({
+            'opponent_id': opponent_id,
+            'opponent_name': opponent_name,
+            'matches': int(matches),
+            'wins': int(wins),
+            'draws': int(draws),
+            'losses': int(losses),
+            'elo_change': float(elo_change),
+        })
+    return totals
+
+HISTORY_COLS = ['puzzle', 'elo', 'mu', 'sigma', 'ordinal']
+
+def get_rating_history(config: dict, player_id: int, start_puzzle: int = None, end_puzzle: int = None):
+    """
+    A player's rated hard mode scores as one list per column of HISTORY_COLS, in puzzle order
+    """
+    where = ["player_id = ?", "hard_mode = 1", "elo IS NOT NULL"]
+    params = [player_id]
+    if start_puzzle is not None:
+        where.append("puzzle >= ?")
+        params.append(start_puzzle)
+    if end_puzzle is not None:
+        where.append("puzzle <= ?")
+        params.append(end_puzzle)
+    # Served by idx_scores_player_puzzle
+    query_string = f"SELECT {', '.join(HISTORY_COLS)} FROM scores WHERE {' AND '.join(where)} ORDER BY puzzle, id"
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, tuple(params))
+        rows = cur.fetchall()
+
+    if rows == []:
+        return {col: [] for col in HISTORY_COLS}
+    puzzles, elos, mus, sigmas, ordinals = zip(*rows)
+    return {
+        'puzzle': [int(puzzle) for puzzle in puzzles],
+        'elo': [float(elo) for elo in elos],
+        'mu': [float(mu) for mu in mus],
+        'sigma': [float(sigma) for sigma in sigmas],
+        'ordinal': [float(ordinal) for ordinal in ordinals],
+    }
+
+def get_match_rows(config: dict, start_puzzle: int, end_puzzle: int, player_ids: list = None):
+    """
+    Rated hard mode scores over [start_puzzle, end_puzzle] as arrays of puzzle, player_id, calculated_score
+    and the player's ELO going into the puzzle, in (puzzle, id) order
+    """
+    cols = ['puzzle', 'player_id', 'calculated_score', 'elo']
+    where = ["puzzle >= ?", "puzzle <= ?", "hard_mode = 1", "elo IS NOT NULL"]
+    params = [start_puzzle, end_puzzle]
+    if player_ids is not None:
+        if player_ids == []:
+            return score_columns(cols, [])
+        where.append(f"player_id IN ({', '.join(['?'] * len(player_ids))})")
+        params.extend(player_ids)
+    query_string = f"SELECT puzzle, player_id, calculated_score, elo - elo_delta FROM scores WHERE {' AND '.join(where)} ORDER BY puzzle, id"
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, tuple(params))
+        rows = cur.fetchall()
+
+    return score_columns(cols, rows)
+
+def lookup_player(config: dict, player_uuid: str = False, player_id: int = False):
+    cache = get_player_cache(config)
+    _sync_player_cache(config, cache)
+    if player_uuid:
+        player_data = cache.get(player_uuid=player_uuid)
+    else:
+        player_data = cache.get(player_id=player_id)
+    if player_data is not None:
+        return player_data
+
+    if player_uuid:
+        query_string = f"SELECT {', '.join(PLAYER_COLS)} FROM players WHERE player_uuid = ?"
+        params = (player_uuid,)
+    else:
+        query_string = f"SELECT {', '.join(PLAYER_COLS)} FROM players WHERE player_id = ?"
+        params = (player_id,)
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, params)
+        player_raw = cur.fetchall()
+    if player_raw == []:
+        return {}
+
+    player_data = dict(zip(PLAYER_COLS, player_raw[0]))
+    cache.put(player_data)
+    return player_data
+
+def lookup_players(config: dict, player_uuids: list):
+    """
+    Players for many uuids, keyed by uuid. Cache misses are fetched in one query
+    Unregistered uuids are left out
+    """
+    cache = get_player_cache(config)
+    _sync_player_cache(config, cache)
+    players = {}
+    missing = []
+    for player_uuid in dict.fromkeys(player_uuids):
+        player_data = cache.get(player_uuid=player_uuid)
+        if player_data is None:
+            missing.append(player_uuid)
+        else:
+            players[player_uuid] = player_data
+    if not missing:
+        return players
+
+    query_string = f"SELECT {', '.join(PLAYER_COLS)} FROM players WHERE player_uuid IN ({', '.join('?' for _ in missing)})"
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, tuple(missing))
+        player_raw = cur.fetchall()
+
+    for player in player_raw:
+        player_data = dict(zip(PLAYER_COLS, player))
+        players[player_data['player_uuid']] = player_data
+        cache.put(player_data)
+    return players
+
+def get_submitted(config: dict, player_ids: list, puzzles: list):
+    """
+    Set of (player_id, puzzle) pairs that already have a score, for the given players and puzzles
+    """
+    player_ids = list(set(player_ids))
+    puzzles = list(set(puzzles))
+    if not player_ids or not puzzles:
+        return set()
+    query_string = f"SELECT player_id, puzzle FROM scores WHERE player_id IN ({', '.join('?' for _ in player_ids)}) AND puzzle IN ({', '.join('?' for _ in puzzles)})"
+    with db_cursor(config) as (conn, cur):
+        cur.execute(query_string, tuple(player_ids + puzzles))
+        return set((player_id, puzzle) for player_id, puzzle in cur.fetchall())
+
+def get_all_players(config: dict):
+    cache = get_player_cache(config)
+    _sync_player_cache(config, cache)
+
+    with db_cursor(config) as (conn, cur):
+        cur.execute(f"SELECT {', '.join(PLAYER_COLS)} FROM players")
+        player_raw = cur.fetchall()
+
+    players = []
+    for player in player_raw:
+        player_data = dict(zip(PLAYER_COLS, player))
+        players.append(player_data)
+        cache.put(player_data)
+
+    return players
+
+def get_leaderboard(config: dict, sort: str = 'ordinal', limit: int = None, offset: int = 0):
+    """
+    Players ranked by ordinal or elo, served from memory once loaded
+    """
+    _sync_player_cache(config, get_player_cache(config))
+    leaderboard = _get_leaderboard(config)
+    if not leaderboard.loaded:
+        token = leaderboard.load_token()
+        leaderboard.load(get_all_players(config), token)
+    return leaderboard.page(sort, limit, offset)
@@ -16,106 +16,127 @@ GNU General Public License for more details.
 
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Persistent connection and schema migrations for the SQLite backend, meant for small
+leagues that don't want to run a MariaDB server. The queries are shared with MariaDB
+and live in bin/sql_storage.py.
+
+One connection is opened per database file and kept for the life of the process.
+WAL mode lets other processes read while this one writes, and access from the worker
+threads is serialized with a lock, since SQLite only takes one writer at a time anyway.
 """
 
+import time
+import fcntl
 import sqlite3
-import logging
+import threading
+from contextlib import contextmanager
+
+from bin import metrics
+from bin.migrations import SQLITE_MIGRATIONS, migrate
+
+_connections = {}
+_connections_lock = threading.Lock()
+
+PRAGMA_DEFAULTS = {
+    'busy_timeout': 5000,
+    'cache_size': -16384,
+    'mmap_size': 268435456,
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY',
+}
 
-def check_db(config: dict):
+class SqliteConnection:
     """
-    Load sqlite3 db connection
-    Inputs:
-        config  obj     App configuration
-    Outputs:
-        db              DB connection
+    A single connection shared between threads, with usage stats like ConnectionPool.stats
     """
-    try:
-        with sqlite3.connect(config['database']) as db:
-            sq_cursor = db.cursor()
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.lock = threading.Lock()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+        }
 
-            # Check if the scores table is created, if not then make it
-            try:
-                sq_cursor.execute('SELECT * FROM scores LIMIT 5')
-                logging.debug(f"{config['database']} table 'scores' exists.")
-            except sqlite3.OperationalError:
-                sq_cursor.execute("CREATE TABLE scores(id integer primary key autoincrement, player_email text, player_name text, puzzle integer, raw_score text, score integer, calculated_score integer, hard_mode integer, elo real, mu real, sigma real, ordinal real, elo_delta real, ordinal_delta real)")
-                db.commit()
-                logging.debug(f"{config['database']} table 'scores' created.")
-            
-            sq_cursor.close()
-            return True
-    except:
-        return False
+    def stats(self):
+        stats = dict(self._stats)
+        stats['wait_time'] = round(stats['wait_time'], 6)
+        stats['size'] = 1
+        stats['in_use'] = 1 if self.lock.locked() else 0
+        return stats
+
+def _path(config: dict):
+    return (config.get('sqlite') or {}).get('path', 'wordle.db')
+
+def db_key(config: dict):
+    return ('sqlite', _path(config))
 
-def update_entry(config: dict, id: int, data: dict):
+def connect_db(config: dict):
     """
-    Update an entry in the db
+    Open the database file in WAL mode with the pragmas from the sqlite section of the config
     """
-    with sqlite3.connect(config['database']) as db:
-        db_cursor = db.cursor()
-        new_fields = ""
-        i = 1
-        for k, v in data.items():
-            if i == len(data):
-                if (isinstance(v, int) or isinstance(v, float)):
-                    new_fields = f"{new_fields} {k} = {v}"
-                else:
-                    new_fields = f"{new_fields} {k} = '{v}'"
-            else:
-                if (isinstance(v, int) or isinstance(v, float)):
-                    new_fields = f"{new_fields} {k} = {v},"
-                else:
-                    new_fields = f"{new_fields} {k} = '{v}',"
-            i += 1
-
-        query_string = f"UPDATE scores SET{new_fields} WHERE id = {id}"
-        db_cursor.execute(query_string)
-        db_cursor.close()
-        db.commit()
-        logging.debug(f"Updated row in scores: {query_string}")
-
-def add_entry(config: dict, data: dict):
+    sqlite_config = config.get('sqlite') or {}
+    conn = sqlite3.connect(_path(config), check_same_thread=False, timeout=sqlite_config.get('busy_timeout', PRAGMA_DEFAULTS['busy_timeout']) / 1000)
+    conn.execute("PRAGMA journal_mode = WAL")
+    for pragma, default in PRAGMA_DEFAULTS.items():
+        conn.execute(f"PRAGMA {pragma} = {sqlite_config.get(pragma, default)}")
+    return conn
+
+def get_connection(config: dict):
+    """
+    Get (or lazily open) the shared connection for the configured database file
+    """
+    key = db_key(config)
+    with _connections_lock:
+        if key not in _connections:
+            _connections[key] = SqliteConnection(connect_db(config))
+            metrics.count('wordle_db_connects_total')
+        return _connections[key]
+
+def get_pool_stats(config: dict):
+    return get_connection(config).stats()
+
+@contextmanager
+def db_cursor(config: dict):
     """
-    Add a wordle score entry to the db
+    Take the shared connection, yielding (conn, cur)
+    Any open transaction is rolled back when the connection is handed back,
+    so callers must commit their own writes
     """
-    with sqlite3.connect(config['database']) as db:
-        db_cursor = db.cursor()
-        cols = ""
-        vals = ""
-        i = 1
-        for k, v in data.items():
-            if i == len(data):
-                if (isinstance(v, int) or isinstance(v, float)):
-                    cols = f"{cols} {k}"
-                    vals = f"{vals} {v}"
-                else:
-                    cols = f"{cols} {k}"
-                    vals = f"{vals} '{v}'"
-            else:
-                if (isinstance(v, int) or isinstance(v, float)):
-                    cols = f"{cols} {k},"
-                    vals = f"{vals} {v},"
-                else:
-                    cols = f"{cols} {k},"
-                    vals = f"{vals} '{v}',"
-            i += 1
-
-        query_string = f"INSERT INTO scores ({cols}) VALUES ({vals})"
-        db_cursor.execute(query_string)
-        db.commit()
-        db_cursor.close()
-        logging.debug(f"Added row in scores: {query_string}")
-
-def get_entries(config: dict, query_string: str):
+    connection = get_connection(config)
+    if not connection.lock.acquire(blocking=False):
+        start = time.monotonic()
+        connection.lock.acquire()
+        connection._stats['waits'] += 1
+        connection._stats['wait_time'] += time.monotonic() - start
+    connection._stats['checkouts'] += 1
+    try:
+        cur = connection.conn.cursor()
+        try:
+            yield connection.conn, cur
+        finally:
+            cur.close()
+    finally:
+        try:
+            connection.conn.rollback()
+        finally:
+            connection.lock.release()
+
+def create_wordle_db(config: dict):
     """
-    Get rows for a given puzzle
+    Create the tables, or upgrade an existing database to the latest schema
     """
-    with sqlite3.connect(config['database']) as db:
-        db_cursor = db.cursor()
-        db_cursor.execute(query_string)
-        rows = db_cursor.fetchall()
-        logging.debug(f"Sending query to DB: {query_string}")
-        cols = [col[0] for col in db_cursor.description]
-        data = [dict(zip(cols, row)) for row in rows]
-        db_cursor.close()
-        return data
\ No newline at end of file
+    try:
+        # Serialize migrations when several workers start at once
+        with open(f"{_path(config)}.migrate-lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                with db_cursor(config) as (conn, cur):
+                    migrate(conn, cur, SQLITE_MIGRATIONS)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return True
+    except Exception as e:
+        print(e)
+        return False
@@ -0,0 +1,192 @@
+"""
+Competitive Ranked Wordle Storage
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+The storage interface the app is written against. Each function here hands off to
+the backend picked by storage.backend in config.yml, so the rest of the code never
+imports a backend directly. A backend is a module providing every function below
+with the same signature.
+
+    mariadb     bin/sql_storage.py over bin/mariadb_handler.py (default)
+    sqlite      bin/sql_storage.py over bin/sqlite3_handler.py
+    memory      bin/memory_storage.py, in process with nothing written to disk
+"""
+
+import importlib
+
+BACKENDS = {
+    'mariadb': 'bin.sql_storage',
+    'sqlite': 'bin.sql_storage',
+    'memory': 'bin.memory_storage',
+}
+
+def get_backend(config: dict):
+    name = (config.get('storage') or {}).get('backend', 'mariadb')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}', use one of {', '.join(BACKENDS)}")
+    return importlib.import_module(BACKENDS[name])
+
+# ---
+# Setup and stats
+# ---
+
+def create_wordle_db(config: dict):
+    """
+    Create the schema, or upgrade an existing one. Returns False if that failed
+    """
+    return get_backend(config).create_wordle_db(config)
+
+def get_pool_stats(config: dict):
+    return get_backend(config).get_pool_stats(config)
+
+def get_player_cache_stats(config: dict):
+    return get_backend(config).get_player_cache_stats(config)
+
+def get_cache_generations(config: dict):
+    """
+    name: generation counters for the players and scores tables, bumped on every write
+    """
+    return get_backend(config).get_cache_generations(config)
+
+# ---
+# Scores
+# ---
+
+def add_entry(config: dict, data: dict):
+    return get_backend(config).add_entry(config, data)
+
+def add_entries(config: dict, entries: list, closed: bool = False, dirty_from: int = None):
+    """
+    Insert many scores at once, returning how many were written
+    With dirty_from, only hard mode scores for that puzzle or later move the dirty watermark
+    """
+    return get_backend(config).add_entries(config, entries, closed=closed, dirty_from=dirty_from)
+
+def get_entries(config: dict, puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    """
+    Score rows matching every filter given, in (puzzle, id) order
+    """
+    return get_backend(config).get_entries(config, puzzle=puzzle, start=start, end=end, player_id=player_id, hard_mode=hard_mode)
+
+def get_entry_records(config: dict, puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    """
+    Score rows filtered as in get_entries, as read-only ScoreRow records instead of dicts
+    """
+    return get_backend(config).get_entry_records(config, puzzle=puzzle, start=start, end=end, player_id=player_id, hard_mode=hard_mode)
+
+def get_entry_columns(config: dict, cols: list, puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    """
+    The given columns of the score rows filtered as in get_entries, as {col: NumPy array}
+    """
+    return get_backend(config).get_entry_columns(config, cols, puzzle=puzzle, start=start, end=end, player_id=player_id, hard_mode=hard_mode)
+
+def get_entries_with_players(config: dict, puzzle: int = None, start: int = None, end: int = None, player_id: int = None, hard_mode: int = None):
+    """
+    Score rows as in get_entries, with the player's uuid, name, platform and current ratings
+    """
+    return get_backend(config).get_entries_with_players(config, puzzle=puzzle, start=start, end=end, player_id=player_id, hard_mode=hard_mode)
+
+def get_submitted(config: dict, player_ids: list, puzzles: list):
+    return get_backend(config).get_submitted(config, player_ids, puzzles)
+
+def update_score_entry(config: dict, id: int, data: dict):
+    return get_backend(config).update_score_entry(config, id, data)
+
+def get_daily_report_rows(config: dict, puzzle: int):
+    return get_backend(config).get_daily_report_rows(config, puzzle)
+
+def get_weekly_report_rows(config: dict, start: int, end: int):
+    return get_backend(config).get_weekly_report_rows(config, start, end)
+
+# ---
+# Players
+# ---
+
+def register_player(config: dict, player_data: dict):
+    return get_backend(config).register_player(config, player_data)
+
+def update_player_entry(config: dict, player_id: int, data: dict):
+    return get_backend(config).update_player_entry(config, player_id, data)
+
+def lookup_player(config: dict, player_uuid: str = False, player_id: int = False):
+    """
+    A player by uuid or player_id, or {} if they aren't registered
+    """
+    return get_backend(config).lookup_player(config, player_uuid=player_uuid, player_id=player_id)
+
+def lookup_players(config: dict, player_uuids: list):
+    return get_backend(config).lookup_players(config, player_uuids)
+
+def get_all_players(config: dict):
+    return get_backend(config).get_all_players(config)
+
+def get_leaderboard(config: dict, sort: str = 'ordinal', limit: int = None, offset: int = 0):
+    return get_backend(config).get_leaderboard(config, sort=sort, limit=limit, offset=offset)
+
+# ---
+# Ratings
+# ---
+
+def bulk_update_entries(config: dict, score_updates: list, player_updates: list, ledger: list = None, clear_ledger_after: int = None, watermark_version: int = None, matchups: dict = None):
+    """
+    Apply rating updates to scores and players (and the rating ledger and matchups) in one transaction
+    """
+    return get_backend(config).bulk_update_entries(config, score_updates, player_updates, ledger=ledger, clear_ledger_after=clear_ledger_after, watermark_version=watermark_version, matchups=matchups)
+
+def get_dirty_watermark(config: dict):
+    return get_backend(config).get_dirty_watermark(config)
+
+def get_rating_ledger(config: dict, start_puzzle: int):
+    return get_backend(config).get_rating_ledger(config, start_puzzle)
+
+def get_ledger_start(config: dict):
+    """
+    The first puzzle in the rating ledger, or None if it is empty
+    """
+    return get_backend(config).get_ledger_start(config)
+
+def get_ratings_before(config: dict, puzzle: int):
+    """
+    Ratings each player went into puzzle with, from their last rated hard mode score before it
+    Players with no rated score before puzzle are left out
+    """
+    return get_backend(config).get_ratings_before(config, puzzle)
+
+def get_matchups(config: dict, player_uuid: str, puzzle: int):
+    """
+    A player's hard mode score on a puzzle, joined with each of their ELO matchups that day
+    """
+    return get_backend(config).get_matchups(config, player_uuid, puzzle)
+
+def get_matchup_totals(config: dict, player_uuid: str, start_puzzle: int, end_puzzle: int):
+    """
+    A player's matchups over [start_puzzle, end_puzzle], summed per opponent
+    """
+    return get_backend(config).get_matchup_totals(config, player_uuid, start_puzzle, end_puzzle)
+
+def get_rating_history(config: dict, player_id: int, start_puzzle: int = None, end_puzzle: int = None):
+    """
+    A player's rating after each of their rated hard mode puzzles, as {'puzzle': [...], 'elo': [...], 'mu': [...], 'sigma': [...], 'ordinal': [...]}
+    """
+    return get_backend(config).get_rating_history(config, player_id, start_puzzle=start_puzzle, end_puzzle=end_puzzle)
+
+def get_match_rows(config: dict, start_puzzle: int, end_puzzle: int, player_ids: list = None):
+    """
+    Rated hard mode scores over [start_puzzle, end_puzzle] (for player_ids only, if given), as
+    {'puzzle': array, 'player_id': array, 'calculated_score': array, 'elo': array} with elo from before the puzzle
+    """
+    return get_backend(config).get_match_rows(config, start_puzzle, end_puzzle, player_ids=player_ids)
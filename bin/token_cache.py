@@ -0,0 +1,86 @@
+"""
+Competitive Ranked Wordle Token Cache
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Bearer tokens that already passed validation, mapped to the user they belong to, so
+authenticating a request is a dict lookup instead of a JWT decode. Entries expire
+with the token's own exp claim.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+class TokenCache:
+    """
+    LRU cache of validated tokens
+        max_size    int     Maximum number of tokens held
+    """
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+        }
+
+    def get(self, token: str):
+        """
+        User the token was validated for, or None on a miss or once it has expired
+        """
+        with self._lock:
+            cached = self._tokens.get(token)
+            if cached is None:
+                self._stats['misses'] += 1
+                return None
+            expires, user = cached
+            if expires <= time.time():
+                del self._tokens[token]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._tokens.move_to_end(token)
+            self._stats['hits'] += 1
+            return user
+
+    def put(self, token: str, expires: float, user):
+        """
+        Cache a validated token until expires (unix time, the token's exp claim)
+        """
+        if expires <= time.time():
+            return
+        with self._lock:
+            self._tokens[token] = (expires, user)
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._tokens)
+            stats['max_size'] = self.max_size
+        return stats
@@ -19,13 +19,26 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import re
 import math
-from datetime import date
+from datetime import date, timedelta
+
+SCORE_PATTERN = re.compile(r'Wordle ([\d,]+) ([\dX])\/6(\*?)')
 
 def parse_score(score):
     """
     Parse a raw score submission for the puzzle and score, then generate calculated score
     """
-    data = re.match(r'Wordle ([\d,]+) ([\dX])\/6(\*?)', score)
+    return _score_from_match(SCORE_PATTERN.match(score))
+
+def find_scores(text: str):
+    """
+    Parse every score found anywhere in a block of text
+    """
+    for match in SCORE_PATTERN.finditer(text):
+        data = _score_from_match(match)
+        data['raw_score'] = match.group(0)
+        yield data
+
+def _score_from_match(data):
     puzzle = data.group(1)
     score = data.group(2)
     hard_mode = data.group(3)
@@ -54,11 +67,30 @@ def parse_score(score):
 
     return data
 
+def build_score_entry(data: dict, raw_score: str, player_data: dict):
+    """
+    Score row for a parsed submission. Non-hard mode scores don't get rated, so they
+    carry the player's current ratings
+    """
+    data['player_id'] = player_data['player_id']
+    data['raw_score'] = raw_score
+    if data['hard_mode'] == 0:
+        data['elo'] = player_data['player_elo']
+        data['mu'] = player_data['player_mu']
+        data['sigma'] = player_data['player_sigma']
+        data['ordinal'] = player_data['player_ord']
+        data['elo_delta'] = player_data['elo_delta']
+        data['ordinal_delta'] = player_data['ord_delta']
+    return data
+
 def get_wordle_puzzle(today):
     first_wordle = date(2021, 6, 19)
     delta = today - first_wordle
     return delta.days
 
+def get_puzzle_date(puzzle: int):
+    return date(2021, 6, 19) + timedelta(days=puzzle)
+
 def calculate_elo(player_a_elo, player_b_elo, result):
     # elo_change = 32 * (result -1 / (1 + 10 ** ((player_b_elo - player_a_elo) / 400)))
     prob = 1.0 / (1 + math.pow(10, (player_b_elo - player_a_elo) / 400.0))
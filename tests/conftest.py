@@ -0,0 +1,78 @@
+"""
+Competitive Ranked Wordle Test Fixtures
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Every test taking config runs once per local storage backend, each on its own empty
+database: a scratch SQLite file, or a uniquely named in-memory store.
+"""
+
+import itertools
+
+import pytest
+
+from bin import memory_storage
+from bin.storage import create_wordle_db
+
+BACKENDS = ['sqlite', 'memory']
+
+_names = itertools.count()
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    return request.param
+
+def empty_config(backend: str, tmp_path):
+    """
+    Config for a new empty database on backend, with any SQLite file under tmp_path
+    """
+    name = f"test-{next(_names)}"
+    config = {
+        'storage': {'backend': backend},
+        'memory': {'name': name},
+        'sqlite': {'path': str(tmp_path / f"{name}.db")},
+    }
+    assert create_wordle_db(config)
+    return config
+
+@pytest.fixture
+def make_config(backend, tmp_path):
+    """
+    Build a config for another empty database on the backend under test
+    """
+    configs = []
+
+    def make():
+        configs.append(empty_config(backend, tmp_path))
+        return configs[-1]
+
+    yield make
+    for config in configs:
+        memory_storage.reset(config)
+
+@pytest.fixture
+def backend_configs(tmp_path):
+    """
+    One empty database per backend, for comparing them directly
+    """
+    configs = {backend: empty_config(backend, tmp_path) for backend in BACKENDS}
+    yield configs
+    for config in configs.values():
+        memory_storage.reset(config)
+
+@pytest.fixture
+def config(make_config):
+    return make_config()
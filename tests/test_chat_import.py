@@ -0,0 +1,62 @@
+"""
+Competitive Ranked Wordle Chat Import Tests
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from openskill.models import PlackettLuce
+
+from bin.storage import get_dirty_watermark, get_ledger_start, get_entries, register_player
+from bin.replay import replay_ratings
+from bin.chat_import import import_chat
+from benchmarks.synthetic import load_league, generate_players
+
+def test_import_only_queues_scores_inside_ledger(config):
+    load_league(config, 4, 10, 1010, play_rate=0.5, seed=4)
+    replay_ratings(config, PlackettLuce(), 1010, 1019)
+    assert get_ledger_start(config) is not None
+    assert get_dirty_watermark(config)[0] is None
+
+    lines = [
+        "[1/2/24, 9:00] Player 0: Wordle 1,001 3/6*",
+        "[1/2/24, 9:01] Player 1: Wordle 1,003 4/6*",
+        "[1/2/24, 9:02] Player 2: Wordle 1,004 5/6",
+    ]
+    stats = import_chat(config, lines)
+    assert stats['added'] == 3
+    assert stats['unrated'] == 2
+    assert stats['unrated_from'] == 1001
+    assert get_dirty_watermark(config)[0] is None
+
+    stats = import_chat(config, ["[1/2/24, 9:03] Player 3: Wordle 1,025 2/6*"])
+    assert stats['unrated'] == 0
+    assert get_dirty_watermark(config)[0] == 1025
+
+def test_following_the_import_message_rates_every_score(config):
+    for player in generate_players(3):
+        register_player(config, player)
+    lines = [
+        f"[1/2/24, 9:0{i}] Player {player}: Wordle 1,{puzzle} {guesses}/6*"
+        for i, (player, puzzle, guesses) in enumerate([(0, 941, 3), (1, 941, 4), (2, 941, 5), (0, 942, 2), (1, 942, 6), (1, 943, 3), (2, 943, 4)])
+    ]
+    stats = import_chat(config, lines)
+    assert stats['added'] == 7
+    assert stats['unrated'] == 7
+    assert (stats['unrated_from'], stats['last_puzzle']) == (1941, 1943)
+
+    # What /backfill-scores runs for the suggested range
+    replay_ratings(config, PlackettLuce(), stats['unrated_from'], stats['last_puzzle'])
+    assert all(entry['elo'] is not None and entry['elo_delta'] is not None for entry in get_entries(config, hard_mode=1))
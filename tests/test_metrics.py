@@ -0,0 +1,69 @@
+"""
+Competitive Ranked Wordle Metrics Tests
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+
+import pytest
+
+from bin import metrics
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    metrics.registry.clear()
+    yield
+    metrics.registry.clear()
+
+def request(middleware, headers: list = ()):
+    """
+    Send one GET through middleware, returning the response start message and the scope the app saw
+    """
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen['scope'] = metrics._current.get()
+        metrics.count('wordle_db_commits_total')
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': '/', 'headers': list(headers)}
+    asyncio.run(middleware(app)(scope, None, send))
+    return sent[0], seen['scope']
+
+def test_metrics_only_records_without_tracing():
+    start, scope = request(lambda app: metrics.MetricsMiddleware(app, metrics_enabled=True), [(metrics.TRACE_HEADER, b'1')])
+    assert scope is not None and scope.trace is None
+    assert b'x-wordle-trace-id' not in dict(start['headers'])
+    assert 'wordle_db_commits_total' in metrics.registry.render()
+
+def test_tracing_without_metrics_records_nothing():
+    start, scope = request(lambda app: metrics.MetricsMiddleware(app, metrics_enabled=False, trace_all=True))
+    assert scope.trace is not None
+    assert metrics.traces.get(dict(start['headers'])[b'x-wordle-trace-id'].decode()) is not None
+    assert 'wordle_db_commits_total' not in metrics.registry.render()
+
+def test_untraced_request_skips_the_scope_when_metrics_are_off():
+    start, scope = request(lambda app: metrics.MetricsMiddleware(app, metrics_enabled=False, trace_header=True))
+    assert scope is None
+    assert start['headers'] == []
+    assert metrics.registry.render().strip() == ''
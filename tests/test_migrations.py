@@ -0,0 +1,56 @@
+"""
+Competitive Ranked Wordle Migration Tests
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import sqlite3
+
+import pytest
+
+from bin.migrations import SQLITE_MIGRATIONS, MigrationError, migrate, get_schema_version
+
+def add_player(cur, name: str, player_uuid: str):
+    cur.execute("INSERT INTO players (player_name, player_mu, player_sigma, player_platform, player_uuid) VALUES (?, 25, 8.333, 'test', ?)", (name, player_uuid))
+
+def test_duplicate_uuids_stop_the_unique_index(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'wordle.db')
+    cur = conn.cursor()
+    assert migrate(conn, cur, SQLITE_MIGRATIONS, target=1) == 1
+    add_player(cur, 'Alice', 'uuid-a')
+    add_player(cur, 'Alice again', 'uuid-a')
+    add_player(cur, 'Bob', 'uuid-b')
+    conn.commit()
+
+    with pytest.raises(MigrationError) as error:
+        migrate(conn, cur, SQLITE_MIGRATIONS)
+    assert 'uuid-a (player_ids 1, 2)' in str(error.value)
+    assert 'uuid-b' not in str(error.value)
+    assert 'nothing needs re-rating' in str(error.value)
+
+    # Bob's scores don't move the suggested re-rate start, the duplicates' earliest score does
+    cur.executemany("INSERT INTO scores (player_id, puzzle) VALUES (?, ?)", [(3, 1001), (2, 1005), (1, 1007)])
+    conn.commit()
+    with pytest.raises(MigrationError) as error:
+        migrate(conn, cur, SQLITE_MIGRATIONS)
+    assert 'start_puzzle 1005' in str(error.value)
+    assert get_schema_version(cur) == 1
+
+    # Once the duplicate is merged away the upgrade goes through
+    cur.execute("DELETE FROM players WHERE player_id = 2")
+    conn.commit()
+    assert migrate(conn, cur, SQLITE_MIGRATIONS) == SQLITE_MIGRATIONS[-1][0]
+    conn.close()
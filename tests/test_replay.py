@@ -0,0 +1,101 @@
+"""
+Competitive Ranked Wordle Replay Tests
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from datetime import date
+
+import pytest
+from openskill.models import PlackettLuce
+
+from bin.storage import add_entry, bulk_update_entries, get_all_players, get_dirty_watermark, get_entries
+from bin.utilities import get_wordle_puzzle
+from bin.replay import RATING_COLS, replay_ratings, rerate
+from benchmarks.synthetic import load_league
+
+START = 1000
+PUZZLES = 30
+
+@pytest.fixture
+def model():
+    return PlackettLuce()
+
+def ratings(config: dict):
+    return {player['player_id']: [player[col] for col in RATING_COLS] for player in get_all_players(config)}
+
+def assert_same_ratings(actual: dict, expected: dict):
+    assert actual.keys() == expected.keys()
+    for player_id in expected:
+        assert actual[player_id] == pytest.approx(expected[player_id]), player_id
+
+def clear_ledger(config: dict):
+    # What a database upgraded through migration 5 looks like: rated history, but no ledger for it
+    bulk_update_entries(config, [], [], clear_ledger_after=0)
+
+def test_rerate_reuses_ledger(config, model):
+    load_league(config, 8, PUZZLES, START, seed=1)
+    replay_ratings(config, model, START, START + PUZZLES - 1)
+    expected = ratings(config)
+
+    result = rerate(config, model, START + 10)
+    assert result['end_puzzle'] == START + PUZZLES - 1
+    assert result['recalculated'] == 0
+    assert result['skipped'] == PUZZLES - 10
+    assert_same_ratings(ratings(config), expected)
+
+def test_rerate_without_ledger_keeps_ratings(config, model):
+    load_league(config, 8, PUZZLES, START, seed=2)
+    replay_ratings(config, model, START, START + PUZZLES - 1)
+    expected = ratings(config)
+
+    clear_ledger(config)
+    result = rerate(config, model, START + 10)
+    assert result['recalculated'] == PUZZLES - 10
+    assert_same_ratings(ratings(config), expected)
+
+def test_rerate_without_ledger_matches_full_replay(make_config, model):
+    late_score = {'player_id': 1, 'puzzle': START + 15, 'raw_score': 'Wordle 1,015 2/6*', 'score': 2, 'calculated_score': 5, 'hard_mode': 1}
+
+    config = make_config()
+    load_league(config, 8, PUZZLES, START, seed=3)
+    replay_ratings(config, model, START, START + PUZZLES - 1)
+    clear_ledger(config)
+    add_entry(config, dict(late_score))
+    assert get_dirty_watermark(config)[0] == START + 15
+    rerate(config, model)
+
+    fresh = make_config()
+    load_league(fresh, 8, PUZZLES, START, seed=3)
+    add_entry(fresh, dict(late_score))
+    replay_ratings(fresh, model, START, START + PUZZLES - 1)
+
+    assert_same_ratings(ratings(config), ratings(fresh))
+
+def test_rerate_stops_at_todays_puzzle(config, model):
+    load_league(config, 8, PUZZLES, START, seed=4)
+    replay_ratings(config, model, START, START + PUZZLES - 1)
+    future = get_wordle_puzzle(date.today()) + 30
+
+    # A score for a puzzle that isn't out yet waits for its day, instead of being rated into the ledger
+    add_entry(config, {'player_id': 1, 'puzzle': future, 'raw_score': f"Wordle {future:,} 3/6*", 'score': 3, 'calculated_score': 4, 'hard_mode': 1})
+    assert rerate(config, model)['puzzles'] == 0
+    assert get_entries(config, puzzle=future)[0]['elo'] is None
+
+    add_entry(config, {'player_id': 2, 'puzzle': START + 20, 'raw_score': 'Wordle 1,020 2/6*', 'score': 2, 'calculated_score': 5, 'hard_mode': 1})
+    result = rerate(config, model)
+    assert result['end_puzzle'] == START + PUZZLES - 1
+    assert get_entries(config, puzzle=future)[0]['elo'] is None
@@ -0,0 +1,217 @@
+"""
+Competitive Ranked Wordle Storage Backend Tests
+
+Copyright (C) 2025  Jivan RamjiSingh
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+The storage interface, run against every backend in conftest.BACKENDS so they behave the same.
+"""
+
+import pytest
+from openskill.models import PlackettLuce
+
+from bin.rows import ScoreRow
+from bin.storage import (
+    add_entry, add_entries, get_entries, get_entry_records, get_entry_columns, get_submitted,
+    register_player, lookup_player, get_all_players, update_player_entry, get_leaderboard,
+    get_weekly_report_rows, bulk_update_entries, get_dirty_watermark, get_rating_ledger,
+    get_ledger_start, get_matchups, get_matchup_totals,
+)
+from bin.replay import replay_ratings
+from benchmarks.synthetic import generate_players
+
+def register(config: dict, count: int):
+    """
+    Register count players, returning their rows in registration order
+    """
+    players = generate_players(count)
+    for player in players:
+        register_player(config, player)
+    return [lookup_player(config, player['player_uuid']) for player in players]
+
+def score(player_id: int, puzzle: int, guesses: int, hard_mode: int = 1):
+    return {
+        'player_id': player_id,
+        'puzzle': puzzle,
+        'raw_score': f"Wordle {puzzle:,} {guesses}/6{'*' if hard_mode else ''}",
+        'score': guesses,
+        'calculated_score': 7 - guesses,
+        'hard_mode': hard_mode,
+    }
+
+# ---
+# Scores
+# ---
+
+def test_add_entry_and_get_entries(config):
+    alice, bob = register(config, 2)
+    add_entry(config, score(bob['player_id'], 1001, 4))
+    add_entry(config, score(alice['player_id'], 1000, 3, hard_mode=0))
+    add_entry(config, score(alice['player_id'], 1001, 2))
+
+    entries = get_entries(config)
+    assert [(entry['puzzle'], entry['player_id']) for entry in entries] == [(1000, alice['player_id']), (1001, bob['player_id']), (1001, alice['player_id'])]
+    assert entries[0]['raw_score'] == 'Wordle 1,000 3/6'
+    assert entries[0]['elo'] is None
+    assert [entry['player_id'] for entry in get_entries(config, puzzle=1001, hard_mode=1)] == [bob['player_id'], alice['player_id']]
+    assert [entry['puzzle'] for entry in get_entries(config, player_id=alice['player_id'])] == [1000, 1001]
+    assert get_entries(config, start=1001, end=1001, hard_mode=0) == []
+
+def test_add_entries_fills_missing_columns(config):
+    alice, bob = register(config, 2)
+    rated = dict(score(alice['player_id'], 1000, 3), elo=410.0)
+    assert add_entries(config, [rated, score(bob['player_id'], 1000, 5)]) == 2
+    assert add_entries(config, []) == 0
+
+    entries = get_entries(config, puzzle=1000)
+    assert [entry['elo'] for entry in entries] == [410.0, None]
+    assert get_submitted(config, [alice['player_id'], bob['player_id']], [1000, 1001]) == {(alice['player_id'], 1000), (bob['player_id'], 1000)}
+    assert get_submitted(config, [], [1000]) == set()
+
+def test_get_entry_records_match_entries(config):
+    alice, bob = register(config, 2)
+    add_entries(config, [score(alice['player_id'], 1000, 3), score(bob['player_id'], 1000, 6, hard_mode=0), score(alice['player_id'], 1002, 4)])
+
+    records = get_entry_records(config, start=1000, end=1001)
+    assert all(isinstance(record, ScoreRow) for record in records)
+    assert [record.to_dict() for record in records] == get_entries(config, start=1000, end=1001)
+    assert [record.id for record in get_entry_records(config, hard_mode=1)] == [entry['id'] for entry in get_entries(config, hard_mode=1)]
+
+def test_get_entry_columns(config):
+    alice, bob = register(config, 2)
+    add_entries(config, [dict(score(alice['player_id'], 1000, 3), elo=410.0), score(bob['player_id'], 1000, 6), score(alice['player_id'], 1001, 4, hard_mode=0)])
+
+    columns = get_entry_columns(config, ['puzzle', 'calculated_score', 'elo'], hard_mode=1)
+    assert columns['puzzle'].tolist() == [1000, 1000]
+    assert columns['calculated_score'].tolist() == [4, 1]
+    assert columns['elo'][0] == 410.0
+    assert columns['elo'][1] != columns['elo'][1]
+    assert len(get_entry_columns(config, ['id'], puzzle=999)['id']) == 0
+    with pytest.raises(ValueError):
+        get_entry_columns(config, ['player_name'])
+
+# ---
+# Players
+# ---
+
+def test_leaderboard_follows_player_updates(config):
+    players = register(config, 3)
+    for player, ordinal, elo in zip(players, [1.0, 3.0, 2.0], [420, 380, 450]):
+        update_player_entry(config, player['player_id'], {'player_ord': ordinal, 'player_elo': elo})
+
+    assert [player['player_id'] for player in get_leaderboard(config)] == [players[1]['player_id'], players[2]['player_id'], players[0]['player_id']]
+    assert [player['player_id'] for player in get_leaderboard(config, sort='elo')] == [players[2]['player_id'], players[0]['player_id'], players[1]['player_id']]
+    assert [player['player_id'] for player in get_leaderboard(config, limit=1, offset=1)] == [players[2]['player_id']]
+
+    update_player_entry(config, players[0]['player_id'], {'player_ord': 5.0})
+    assert get_leaderboard(config, limit=1)[0]['player_id'] == players[0]['player_id']
+    assert lookup_player(config, player_id=players[0]['player_id'])['player_ord'] == 5.0
+    assert len(get_all_players(config)) == 3
+
+# ---
+# Reports
+# ---
+
+def test_weekly_report_rows(config):
+    alice, bob = register(config, 2)
+    add_entries(config, [
+        dict(score(alice['player_id'], 1000, 3), elo=410.0, ordinal=1.0),
+        dict(score(alice['player_id'], 1003, 5), elo=405.0, ordinal=2.0),
+        dict(score(bob['player_id'], 1001, 4), elo=390.0, ordinal=3.0),
+        dict(score(bob['player_id'], 1010, 2), elo=500.0, ordinal=9.0),
+    ])
+
+    rows = get_weekly_report_rows(config, 1000, 1006)
+    assert [row['player_id'] for row in rows] == [bob['player_id'], alice['player_id']]
+    assert rows[0]['player_name'] == bob['player_name']
+    assert rows[1]['start_elo'] == 410.0
+    assert rows[1]['end_elo'] == 405.0
+    assert rows[1]['start_ord'] == 1.0
+    assert rows[1]['end_ord'] == 2.0
+    assert rows[1]['average_score'] == pytest.approx(4.0)
+    assert get_weekly_report_rows(config, 900, 906) == []
+
+# ---
+# Ratings
+# ---
+
+def test_watermark_and_ledger(config):
+    alice, bob = register(config, 2)
+    assert get_dirty_watermark(config)[0] is None
+    add_entry(config, score(alice['player_id'], 1005, 3, hard_mode=0))
+    assert get_dirty_watermark(config)[0] is None
+
+    add_entry(config, score(alice['player_id'], 1005, 3))
+    add_entries(config, [score(bob['player_id'], 1003, 4), score(bob['player_id'], 1007, 4)])
+    dirty_from, version = get_dirty_watermark(config)
+    assert dirty_from == 1003
+    add_entries(config, [score(alice['player_id'], 1001, 2)], dirty_from=1002)
+    assert get_dirty_watermark(config) == (1003, version)
+
+    ledger = [
+        {'puzzle': puzzle, 'inputs_hash': f"hash-{puzzle}", 'ratings_before': {alice['player_id']: {'player_elo': 400}}, 'ratings_after': {alice['player_id']: {'player_elo': 400 + puzzle}}}
+        for puzzle in [1003, 1005, 1007]
+    ]
+    bulk_update_entries(config, [], [], ledger=ledger, watermark_version=version)
+    assert get_dirty_watermark(config)[0] is None
+    assert get_ledger_start(config) == 1003
+    assert [row['puzzle'] for row in get_rating_ledger(config, 1004)] == [1005, 1007]
+    assert get_rating_ledger(config, 1005)[0]['ratings_after'] == {alice['player_id']: {'player_elo': 1405}}
+
+    # A stale version leaves a newer watermark alone
+    add_entry(config, score(bob['player_id'], 1006, 5))
+    bulk_update_entries(config, [], [], clear_ledger_after=1004, watermark_version=version)
+    assert get_dirty_watermark(config)[0] == 1006
+    assert [row['puzzle'] for row in get_rating_ledger(config, 0)] == [1003]
+
+def test_bulk_update_entries(config):
+    alice, bob = register(config, 2)
+    add_entries(config, [score(alice['player_id'], 1000, 3), score(bob['player_id'], 1000, 4)])
+    first, second = get_entries(config)
+
+    bulk_update_entries(
+        config,
+        [(first['id'], {'elo': 416.0, 'elo_delta': 16.0}), (second['id'], {'elo': 384.0, 'elo_delta': -16.0})],
+        [(alice['player_id'], {'player_elo': 416.0, 'elo_delta': 16.0}), (bob['player_id'], {'player_elo': 384.0, 'elo_delta': -16.0})],
+    )
+    assert [entry['elo'] for entry in get_entries(config)] == [416.0, 384.0]
+    assert lookup_player(config, alice['player_uuid'])['player_elo'] == 416.0
+    assert get_leaderboard(config, sort='elo')[0]['player_id'] == alice['player_id']
+
+def test_matchups(config):
+    players = register(config, 3)
+    guesses = [3, 4, 4]
+    add_entries(config, [score(player['player_id'], 1000, guess) for player, guess in zip(players, guesses)])
+    add_entries(config, [score(player['player_id'], 1001, guess) for player, guess in zip(players[:2], [5, 2])])
+    replay_ratings(config, PlackettLuce(), 1000, 1001)
+
+    me = players[0]
+    rows = get_matchups(config, me['player_uuid'], 1000)
+    assert {row['opponent_id']: row['result'] for row in rows} == {players[1]['player_id']: 1.0, players[2]['player_id']: 1.0}
+    assert rows[0]['player_name'] == me['player_name']
+    assert sum(row['elo_change'] for row in rows) == pytest.approx(rows[0]['elo_delta'])
+    assert get_matchups(config, players[2]['player_uuid'], 1001) == []
+
+    totals = {total['opponent_id']: total for total in get_matchup_totals(config, me['player_uuid'], 1000, 1001)}
+    assert totals[players[1]['player_id']]['matches'] == 2
+    assert totals[players[1]['player_id']]['wins'] == 1
+    assert totals[players[1]['player_id']]['losses'] == 1
+    assert totals[players[2]['player_id']]['matches'] == 1
+    assert sum(total['elo_change'] for total in totals.values()) == pytest.approx(lookup_player(config, me['player_uuid'])['player_elo'] - 400)
+    assert get_matchup_totals(config, me['player_uuid'], 900, 999) == []
+
+    # Matchups against one opponent are zero sum
+    theirs = {total['opponent_id']: total for total in get_matchup_totals(config, players[1]['player_uuid'], 1000, 1001)}
+    assert theirs[me['player_id']]['elo_change'] == pytest.approx(-totals[players[1]['player_id']]['elo_change'])